@@ -9,6 +9,6 @@ agent_card = AgentCard(
     version="1.0.0",
     defaultInputModes=["text"],
     defaultOutputModes=["text"],
-    capabilities=AgentCapabilities(streaming=True),
+    capabilities=AgentCapabilities(streaming=True, pushNotifications=True),
     skills=[check_electric_bill, support_customer_issue],   
 )
\ No newline at end of file
@@ -4,7 +4,8 @@ check_electric_bill = AgentSkill(
     id="check_electric_bill",
     name="Check Electric Bill",
     description="Send the electric utility code, month, and year to check the bill.",
-    tags=["electric", "utility", "bill"],
+    # "cacheable": the same request returns the same bill, so callers may cache it.
+    tags=["electric", "utility", "bill", "cacheable"],
     examples=["Check the bill for electric code E001 for January 2024"],
 )
 
@@ -0,0 +1,41 @@
+import json
+import hashlib
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from a2a.server.apps import A2AStarletteApplication
+
+from settings.config import Config
+
+
+class CacheableCardApplication(A2AStarletteApplication):
+    """A2A Starlette application that serves the agent card with HTTP caching.
+
+    The card is serialized once at startup. Clients get an ETag and a
+    Cache-Control max-age, and a matching If-None-Match gets 304 Not Modified.
+    """
+
+    def __init__(self, *args, card_max_age: int = Config.A2A.card_max_age, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._card_body = json.dumps(
+            self.agent_card.model_dump(mode='json', exclude_none=True)
+        ).encode()
+        self._card_etag = '"%s"' % hashlib.sha256(self._card_body).hexdigest()[:32]
+        self._card_headers = {
+            "ETag": self._card_etag,
+            "Cache-Control": f"public, max-age={card_max_age}",
+        }
+
+    async def _handle_get_agent_card(self, request: Request) -> Response:
+        """Serve the agent card, or 304 if the client's copy is current."""
+        if_none_match = request.headers.get("if-none-match", "")
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if self._card_etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=self._card_headers)
+
+        return Response(
+            content=self._card_body,
+            media_type="application/json",
+            headers=self._card_headers,
+        )
@@ -22,17 +22,22 @@ from a2a.server.tasks import TaskUpdater
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
 from agents.electric_agent import ElectricAgent
+from a2a_server.electric_request_handler import (
+    is_streaming_request,
+    wants_push_notifications,
+)
+from settings.logging_config import TOKEN_LOGGER, correlation_scope
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+token_logger = logging.getLogger(TOKEN_LOGGER)
 
 
 class ElectricAgentExecutor(AgentExecutor):
     """Executor for the Electric Agent to handle requests and responses."""
 
-    def __init__(self):
+    def __init__(self, agent=None):
         super().__init__()
-        self.agent = ElectricAgent()
+        self.agent = agent or ElectricAgent()
 
     async def execute(
         self, 
@@ -43,7 +48,19 @@ class ElectricAgentExecutor(AgentExecutor):
         if not self._validate_request(context):
             raise ServerError(error=InvalidParamsError())
         
+        with correlation_scope(context.task_id):
+            await self._execute(context, event_queue)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
         query = context.get_user_input()
+        if not is_streaming_request(context.call_context):
+            await self._execute_non_streaming(query, context, event_queue)
+            return
+
         task = context.current_task
         if not task:
             task = new_task(context.message) # type: ignore
@@ -51,21 +68,51 @@ class ElectricAgentExecutor(AgentExecutor):
         updater = TaskUpdater(event_queue, task.id, task.contextId)
 
         async for streammode, res in self.agent.stream(query, context.task_id, stream_mode=['messages']):
-            print(res[0].text(), end='', flush=True)
+            text = res[0].text()
+            token_logger.debug("agent token", extra={"text": text})
             if (isinstance(res[0], AIMessage)):
-                if(res[0].text()):
+                if(text):
                     await updater.update_status(
                         TaskState.working,
                         new_agent_text_message(
-                            res[0].text(),
+                            text,
                             task.contextId,
                             task.id,
                         ),
                     )
         await updater.complete()
+        logger.info("Task completed", extra={"task_id": task.id})
 
+    async def _execute_non_streaming(
+        self,
+        query: str,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        """Run the agent to completion and emit the whole answer as one event."""
+        task = context.current_task
+        if not task and wants_push_notifications(context.configuration):
+            # A push-notified caller needs a task to follow, submitted before
+            # the agent starts so the request returns immediately.
+            task = new_task(context.message)  # type: ignore
+            await event_queue.enqueue_event(task)
+
+        response = await self.agent.invoke(query, context.task_id)
+        answer = response["messages"][-1].content
+
+        if not task:
+            # A plain message is returned to the caller as-is and never
+            # touches the task store.
+            await event_queue.enqueue_event(
+                new_agent_text_message(answer, context.context_id, context.task_id)
+            )
+            return
+
+        updater = TaskUpdater(event_queue, task.id, task.contextId)
+        await updater.complete(
+            new_agent_text_message(answer, task.contextId, task.id)
+        )
 
-    
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
@@ -0,0 +1,106 @@
+import asyncio
+
+from collections.abc import AsyncGenerator
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import Event
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import Message, MessageSendConfiguration, MessageSendParams, Task
+
+# Key set on the ServerCallContext state so the executor knows which A2A
+# method it is serving.
+STREAMING_STATE_KEY = "streaming"
+
+_END_OF_STREAM = object()
+
+
+class ElectricRequestHandler(DefaultRequestHandler):
+    """Request handler that tells the executor whether the caller streams,
+    keeps streamed tasks running when the caller disconnects and runs
+    push-notified requests in the background."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._detached_streams: set[asyncio.Task] = set()
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> Message | Task:
+        """Handle 'message/send' by running the executor's non-streaming path.
+
+        A non-blocking request with a push notification config is answered
+        with its task as soon as it is submitted; the result is delivered to
+        the caller's webhook instead of over a held connection.
+        """
+        context = context or ServerCallContext()
+        context.state[STREAMING_STATE_KEY] = False
+        if self._push_notifier and wants_push_notifications(params.configuration):
+            return await self._start_detached(params, context)
+        return await super().on_message_send(params, context)
+
+    async def _start_detached(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext,
+    ) -> Message | Task:
+        # The streaming path registers the webhook on the first Task event
+        # and notifies it on every update; closing the relay leaves the
+        # background consumer running the task to the end.
+        stream = self.on_message_send_stream(params, context)
+        try:
+            return await anext(stream)
+        finally:
+            await stream.aclose()
+
+    async def on_message_send_stream(
+        self,
+        params: MessageSendParams,
+        context: ServerCallContext | None = None,
+    ) -> AsyncGenerator[Event]:
+        """Handle 'message/stream' so the task outlives the caller's connection.
+
+        The default handler saves each event to the task store only as the
+        response consumes it, so a dropped connection freezes the stored task.
+        Here a background task consumes and saves the events and the response
+        only relays them: if the caller disconnects, the agent runs to the
+        end and the caller can pick the result up with tasks/get instead of
+        resubmitting the request.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        stream = super().on_message_send_stream(params, context)
+
+        async def drain():
+            try:
+                async for event in stream:
+                    events.put_nowait(event)
+            except Exception as e:
+                events.put_nowait(e)
+            finally:
+                events.put_nowait(_END_OF_STREAM)
+
+        drainer = asyncio.create_task(drain())
+        self._detached_streams.add(drainer)
+        drainer.add_done_callback(self._detached_streams.discard)
+
+        while (event := await events.get()) is not _END_OF_STREAM:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+
+def wants_push_notifications(configuration: MessageSendConfiguration | None) -> bool:
+    """Return True if the caller asked for a non-blocking, push-notified request."""
+    return bool(
+        configuration
+        and configuration.pushNotificationConfig
+        and configuration.blocking is False
+    )
+
+
+def is_streaming_request(context: ServerCallContext | None) -> bool:
+    """Return False only for requests marked as non-streaming by the handler."""
+    if context is None:
+        return True
+    return context.state.get(STREAMING_STATE_KEY, True)
@@ -0,0 +1,40 @@
+import logging
+
+from a2a.server.tasks import InMemoryPushNotifier
+from a2a.types import Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+# Header carrying the token the client registered with its webhook.
+NOTIFICATION_TOKEN_HEADER = "X-A2A-Notification-Token"
+
+_FINAL_STATES = frozenset({
+    TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected,
+})
+
+
+class ElectricPushNotifier(InMemoryPushNotifier):
+    """Push notifier that authenticates its calls and forgets finished tasks.
+
+    The client's token is sent with every notification so the receiver can
+    tell them from forged ones, and a task's webhook is dropped after its
+    final notification so the registry does not grow with every task served.
+    """
+
+    async def send_notification(self, task: Task) -> None:
+        push_info = await self.get_info(task.id)
+        if not push_info:
+            return
+
+        headers = {NOTIFICATION_TOKEN_HEADER: push_info.token} if push_info.token else {}
+        try:
+            response = await self._client.post(
+                push_info.url,
+                json=task.model_dump(mode='json', exclude_none=True),
+                headers=headers,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.error("Error sending push notification for task %s: %s", task.id, e)
+        if task.status.state in _FINAL_STATES:
+            await self.delete_info(task.id)
@@ -1,24 +1,45 @@
+import argparse
+import httpx
 import uvicorn
 
-from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
-from a2a.server.apps import A2AStarletteApplication
 
 from a2a_server.electric_agent_executor import ElectricAgentExecutor
+from a2a_server.electric_request_handler import ElectricRequestHandler
 from a2a_server.agent_card import agent_card
+from a2a_server.application import CacheableCardApplication
+from a2a_server.push_notifier import ElectricPushNotifier
+from settings.config import Config
+from settings.logging_config import setup_logging
 
 def main():
-    request_handler = DefaultRequestHandler(
-        agent_executor=ElectricAgentExecutor(),
+    parser = argparse.ArgumentParser(description="Electric Utility A2A server")
+    parser.add_argument(
+        "--stub-model", action="store_true", default=Config.STUB.enabled,
+        help="Serve a canned streamed reply instead of calling the LLM and MCP tools.",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    agent = None
+    if args.stub_model:
+        from agents.stub_agent import StubElectricAgent
+        agent = StubElectricAgent()
+
+    request_handler = ElectricRequestHandler(
+        agent_executor=ElectricAgentExecutor(agent),
         task_store=InMemoryTaskStore(),
+        push_notifier=ElectricPushNotifier(
+            httpx.AsyncClient(timeout=Config.A2A.push_timeout)
+        ),
     )
 
-    server = A2AStarletteApplication(
+    server = CacheableCardApplication(
         agent_card=agent_card,
         http_handler=request_handler,
     )
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9000)
+    uvicorn.run(server.build(), host=Config.A2A.host, port=Config.A2A.port)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
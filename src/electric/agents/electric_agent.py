@@ -4,6 +4,7 @@ project_root = os.path.join(os.path.dirname(__file__), '..')
 sys.path.append(project_root)
 
 import asyncio
+import logging
 
 from typing import Dict, Any, AsyncIterable
 
@@ -18,6 +19,7 @@ from settings.prompts import ELECTRIC_AGENT
 from agents.base_agent import BaseAgent
 
 
+logger = logging.getLogger(__name__)
 memory = MemorySaver()
 
 async def get_tools():
@@ -34,7 +36,7 @@ async def get_tools():
         mcp_tools = await client.get_tools()
         return mcp_tools
     except Exception as e:
-        print(f"Error connecting to MCP server: {str(e)}")
+        logger.error("Error connecting to MCP server: %s", e)
         raise
 
 
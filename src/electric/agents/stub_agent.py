@@ -0,0 +1,47 @@
+import asyncio
+
+from typing import Dict, Any, AsyncIterable
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from settings.config import Config
+from agents.base_agent import BaseAgent
+
+
+class StubElectricAgent(BaseAgent):
+    """Drop-in ElectricAgent replacement that streams a canned reply.
+
+    It needs no model or MCP server, so the A2A and streaming layers can be
+    benchmarked offline.
+    """
+
+    def __init__(
+        self,
+        reply: str = Config.STUB.reply,
+        token_delay: float = Config.STUB.token_delay,
+    ):
+        super().__init__(
+            agent_name="StubElectricAgent",
+            description="A stub agent that streams a fixed reply.",
+            content_types=['text', 'text/plain'],
+        )
+        self.reply = reply
+        self.token_delay = token_delay
+
+    def _tokens(self) -> list[str]:
+        words = self.reply.split(' ')
+        return [word + ' ' for word in words[:-1]] + words[-1:]
+
+    async def invoke(self, query, sessionId) -> str:
+        await asyncio.sleep(self.token_delay * len(self._tokens()))
+        return {'messages': [HumanMessage(content=query), AIMessage(content=self.reply)]}
+
+    async def stream(
+        self, query, sessionId, stream_mode=['updates', 'messages']
+    ) -> AsyncIterable[Dict[str, Any]]:
+        if 'messages' not in stream_mode:
+            return
+        for token in self._tokens():
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield 'messages', (AIMessageChunk(content=token), {})
@@ -1,5 +1,24 @@
+"""
+Concurrent A2A load generator.
+
+Opens N streaming sessions against any A2A agent, each running a multi-turn
+script that shares one contextId, and reports time-to-first-chunk,
+inter-chunk gap and total latency percentiles plus events/sec.
+
+    python client.py --url http://localhost:9000 --concurrency 50 \\
+        --ramp-up 10 --duration 60 --script script.json
+
+A script file is a JSON list of turns (strings) or a list of such lists; each
+session picks scripts round-robin. Start the server with --stub-model to
+benchmark the A2A and streaming layers without an LLM.
+"""
+import json
+import time
+import asyncio
 import logging
+import argparse
 
+from dataclasses import dataclass, field
 from typing import Any
 from uuid import uuid4
 
@@ -10,94 +29,184 @@ from a2a.types import (
     AgentCard,
     MessageSendParams,
     SendStreamingMessageRequest,
+    TaskStatusUpdateEvent,
 )
 
+DEFAULT_SCRIPT = [["My electric bill is too high!"]]
+# Seconds a session waits after a failed turn, doubling up to the maximum.
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadStats:
+    first_chunk: list[float] = field(default_factory=list)
+    chunk_gaps: list[float] = field(default_factory=list)
+    total: list[float] = field(default_factory=list)
+    events: int = 0
+    turns: int = 0
+    errors: int = 0
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of values; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_turn(client: A2AClient, text: str, context_id: str | None, stats: LoadStats) -> str | None:
+    """Send one streaming message and record its timings. Returns the contextId."""
+    message: dict[str, Any] = {
+        'role': 'user',
+        'parts': [{'kind': 'text', 'text': text}],
+        'messageId': uuid4().hex,
+    }
+    if context_id:
+        message['contextId'] = context_id
+    request = SendStreamingMessageRequest(
+        id=str(uuid4()), params=MessageSendParams(message=message)
+    )
+
+    started = time.perf_counter()
+    last_chunk = None
+    async for chunk in client.send_message_streaming(request):
+        stats.events += 1
+        event = chunk.root.result
+        context_id = getattr(event, 'contextId', context_id)
+        if not (isinstance(event, TaskStatusUpdateEvent) and event.status.message):
+            continue
+        now = time.perf_counter()
+        if last_chunk is None:
+            stats.first_chunk.append(now - started)
+        else:
+            stats.chunk_gaps.append(now - last_chunk)
+        last_chunk = now
+    stats.total.append(time.perf_counter() - started)
+    stats.turns += 1
+    return context_id
+
+
+async def run_session(
+    client: A2AClient,
+    script: list[str],
+    start_delay: float,
+    deadline: float | None,
+    stats: LoadStats,
+):
+    """Replay the script in a fresh context until the deadline passes.
+
+    Without a deadline the script is played exactly once. After a failed
+    turn the session backs off before restarting the script, so a server
+    that refuses connections is not retried in a tight loop.
+    """
+    await asyncio.sleep(start_delay)
+    retry_delay = RETRY_DELAY
+    while True:
+        context_id = None
+        failed = False
+        for text in script:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            try:
+                context_id = await run_turn(client, text, context_id, stats)
+            except Exception as e:
+                stats.errors += 1
+                logger.warning('Turn failed: %s', e)
+                failed = True
+                break
+        if not deadline:
+            return
+        if failed:
+            await asyncio.sleep(min(retry_delay, max(0.0, deadline - time.perf_counter())))
+            retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+        else:
+            retry_delay = RETRY_DELAY
+
+
+def report(stats: LoadStats, elapsed: float):
+    def line(name, values):
+        print(
+            f'{name:<18} p50={percentile(values, 50) * 1000:8.1f}ms '
+            f'p90={percentile(values, 90) * 1000:8.1f}ms '
+            f'p99={percentile(values, 99) * 1000:8.1f}ms'
+        )
 
-async def main() -> None:
-    PUBLIC_AGENT_CARD_PATH = '/.well-known/agent.json'
-
-    # Configure logging to show INFO level messages
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)  # Get a logger instance
-
-    # --8<-- [start:A2ACardResolver]
-
-    base_url = 'http://localhost:9000'
+    print(f'\nturns={stats.turns} errors={stats.errors} events={stats.events} elapsed={elapsed:.1f}s')
+    if not stats.turns:
+        print('no turns completed')
+        return
+    line('time-to-first', stats.first_chunk)
+    line('inter-chunk gap', stats.chunk_gaps)
+    line('total latency', stats.total)
+    print(f'events/sec         {stats.events / elapsed if elapsed else 0.0:.1f}')
+
+
+def load_script(path: str | None) -> list[list[str]]:
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path) as f:
+        script = json.load(f)
+    if script and all(isinstance(turn, str) for turn in script):
+        script = [script]
+    # Blank turns are skipped, and scripts left with nothing to send are dropped
+    # rather than spinning until the deadline.
+    scripts = []
+    for turns in script:
+        if isinstance(turns, list):
+            turns = [turn for turn in turns if isinstance(turn, str) and turn.strip()]
+            if turns:
+                scripts.append(turns)
+    return scripts
 
-    async with httpx.AsyncClient() as httpx_client:
-        # Initialize A2ACardResolver
-        resolver = A2ACardResolver(
-            httpx_client=httpx_client,
-            base_url=base_url,
-            # agent_card_path uses default, extended_agent_card_path also uses default
-        )
-        # --8<-- [end:A2ACardResolver]
 
-        # Fetch Public Agent Card and Initialize Client
-        final_agent_card_to_use: AgentCard | None = None
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Concurrent A2A streaming load generator')
+    parser.add_argument('--url', default='http://localhost:9000', help='Base URL serving the agent card.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of concurrent sessions.')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds over which sessions are started.')
+    parser.add_argument('--duration', type=float, default=0.0,
+                        help='Seconds to keep sessions running; 0 runs each script once.')
+    parser.add_argument('--script', help='JSON file with a list of turns, or a list of turn lists.')
+    args = parser.parse_args()
 
+    logging.basicConfig(level=logging.INFO)
+    scripts = load_script(args.script)
+    if not scripts or args.concurrency < 1:
+        logger.warning('No sessions to run: the script has no turns or --concurrency is 0')
+        report(LoadStats(), 0.0)
+        return
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as httpx_client:
         try:
-            logger.info(
-                f'Attempting to fetch public agent card from: {base_url}{PUBLIC_AGENT_CARD_PATH}'
-            )
-            _public_card = (
-                await resolver.get_agent_card()
-            )  # Fetches from default public path
-            logger.info('Successfully fetched public agent card:')
-            logger.info(
-                _public_card.model_dump_json(indent=2, exclude_none=True)
-            )
-            final_agent_card_to_use = _public_card
-            logger.info(
-                '\nUsing PUBLIC agent card for client initialization (default).'
-            )
+            card: AgentCard = await A2ACardResolver(httpx_client, args.url).get_agent_card()
         except Exception as e:
-            logger.error(
-                f'Critical error fetching public agent card: {e}', exc_info=True
-            )
             raise RuntimeError(
                 'Failed to fetch the public agent card. Cannot continue.'
             ) from e
-
-        # --8<-- [start:send_message]
-        client = A2AClient(
-            httpx_client=httpx_client, agent_card=final_agent_card_to_use
-        )
-        logger.info('A2AClient initialized.')
-
-        send_message_payload: dict[str, Any] = {
-            'message': {
-                'role': 'user',
-                'parts': [
-                    {'kind': 'text', 'text': 'My electric bill is too high!'}
-                ],
-                'messageId': uuid4().hex,
-            },
-        }
-        # request = SendMessageRequest(
-        #     id=str(uuid4()), params=MessageSendParams(**send_message_payload)
-        # )
-
-        # response = await client.send_message(request)
-        # print(response.model_dump(mode='json', exclude_none=True))
-        # --8<-- [end:send_message]
-
-        # --8<-- [start:send_message_streaming]
-
-        streaming_request = SendStreamingMessageRequest(
-            id=str(uuid4()), params=MessageSendParams(**send_message_payload)
-        )
-
-        stream_response = client.send_message_streaming(streaming_request)
-
-        async for chunk in stream_response:
-            chunk = chunk.model_dump(mode='json', exclude_none=True)
-            # print(chunk)
-            if "message" in chunk["result"]['status']:
-                print(chunk['result']['status']['message']['parts'][0]['text'], end='', flush=True)
-        # --8<-- [end:send_message_streaming]
+        logger.info('Load testing %s at %s', card.name, card.url)
+        client = A2AClient(httpx_client=httpx_client, agent_card=card)
+
+        stats = LoadStats()
+        started = time.perf_counter()
+        deadline = started + args.duration if args.duration else None
+        await asyncio.gather(*(
+            run_session(
+                client,
+                scripts[i % len(scripts)],
+                args.ramp_up * i / args.concurrency,
+                deadline,
+                stats,
+            )
+            for i in range(args.concurrency)
+        ))
+        report(stats, time.perf_counter() - started)
 
 
 if __name__ == '__main__':
-    import asyncio
     asyncio.run(main())
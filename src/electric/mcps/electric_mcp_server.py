@@ -7,7 +7,6 @@ Provides tools for checking electricity bills and assigning electricians.
 import sys
 import os
 project_root = os.path.join(os.path.dirname(__file__), '..')
-print(f"Project root: {project_root}")
 sys.path.append(project_root)
 
 import json
@@ -19,6 +18,9 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from settings.config import Config
+from settings.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
 
 # Create MCP server
 mcp = FastMCP(
@@ -132,4 +134,6 @@ def assign_electrician(address: str, issue_description: str) -> str:
 
 if __name__ == "__main__":
     # Initialize and run the server
+    setup_logging()
+    logger.info("Starting MCP server", extra={"project_root": project_root})
     mcp.run(transport=Config.MCP.transport,)
@@ -12,6 +12,28 @@ class Config:
         transport: str = "streamable-http"
         url: str = "http://localhost:3000/mcp/"
     
+    @dataclass
+    class A2A:
+        host: str = "0.0.0.0"
+        port: int = 9000
+        card_max_age: int = 300  # seconds clients may reuse the agent card
+        push_timeout: float = 10.0  # seconds to deliver one push notification
+
     @dataclass
     class OPENAI:
         api_key = os.getenv("OPENAI_API_KEY", "OPENAI_API_KEY")
+
+    @dataclass
+    class STUB:
+        enabled: bool = os.getenv("ELECTRIC_STUB_MODEL", "") == "1"
+        reply: str = (
+            "Your electric bill for this month is 128.90 USD and is due on the 15th. "
+            "Usage is 12% higher than last month, mostly from air conditioning."
+        )
+        token_delay: float = float(os.getenv("ELECTRIC_STUB_TOKEN_DELAY", "0.02"))
+
+    @dataclass
+    class LOGGING:
+        level: str = os.getenv("LOG_LEVEL", "INFO")
+        # Fraction of per-token DEBUG events that are written out.
+        token_sample_rate: float = float(os.getenv("LOG_TOKEN_SAMPLE_RATE", "0.01"))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the Electric A2A server request handling.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage
+from starlette.testclient import TestClient
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Message, MessageSendParams, TaskState, TaskStatusUpdateEvent
+
+from a2a_server.electric_agent_executor import ElectricAgentExecutor
+from a2a_server.electric_request_handler import ElectricRequestHandler
+from a2a_server.application import CacheableCardApplication
+from a2a_server.push_notifier import ElectricPushNotifier
+from a2a_server.agent_card import agent_card
+from agents.stub_agent import StubElectricAgent
+
+
+class FakeAgent:
+    """Agent stand-in that answers without calling a model."""
+
+    def __init__(self, answer="Your bill is 42 USD."):
+        self.answer = answer
+        self.invocations = 0
+
+    async def invoke(self, query, sessionId):
+        self.invocations += 1
+        return {"messages": [AIMessage(content=self.answer)]}
+
+
+def make_handler(agent, push_notifier=None):
+    executor = ElectricAgentExecutor.__new__(ElectricAgentExecutor)
+    executor.agent = agent
+    return ElectricRequestHandler(
+        agent_executor=executor,
+        task_store=InMemoryTaskStore(),
+        push_notifier=push_notifier,
+    )
+
+
+def make_params(text="Check my bill", configuration=None):
+    return MessageSendParams(
+        message={
+            "role": "user",
+            "parts": [{"kind": "text", "text": text}],
+            "messageId": "msg-1",
+        },
+        configuration=configuration,
+    )
+
+
+class TestNonStreamingSend:
+    """Test cases for the message/send path."""
+
+    @pytest.mark.asyncio
+    async def test_message_send_returns_single_message(self):
+        """A new message/send request is answered with one complete message."""
+        agent = FakeAgent()
+        handler = make_handler(agent)
+
+        result = await handler.on_message_send(make_params())
+
+        assert isinstance(result, Message)
+        assert result.parts[0].root.text == "Your bill is 42 USD."
+        assert agent.invocations == 1
+
+    @pytest.mark.asyncio
+    async def test_message_send_does_not_store_task(self):
+        """The single-message reply is not written to the task store."""
+        handler = make_handler(FakeAgent())
+
+        result = await handler.on_message_send(make_params())
+
+        assert await handler.task_store.get(result.taskId) is None
+
+
+class TestStreamingSend:
+    """Test cases for the message/stream path."""
+
+    @pytest.mark.asyncio
+    async def test_stub_agent_streams_reply(self):
+        """The stub agent's reply arrives as working updates, then completes."""
+        agent = StubElectricAgent(reply="Your bill is paid.", token_delay=0)
+        handler = make_handler(agent)
+
+        events = [event async for event in handler.on_message_send_stream(make_params())]
+        updates = [e for e in events if isinstance(e, TaskStatusUpdateEvent)]
+
+        text = "".join(
+            e.status.message.parts[0].root.text for e in updates if e.status.message
+        )
+        assert text == "Your bill is paid."
+        assert updates[-1].status.state == TaskState.completed
+
+
+    @pytest.mark.asyncio
+    async def test_task_completes_after_caller_disconnects(self):
+        """Closing the stream early leaves the agent running and the task stored."""
+        agent = StubElectricAgent(reply="Your bill is paid.", token_delay=0.01)
+        handler = make_handler(agent)
+
+        stream = handler.on_message_send_stream(make_params())
+        first = await anext(stream)
+        await stream.aclose()
+        async with asyncio.timeout(5):
+            while handler._detached_streams:
+                await asyncio.sleep(0.01)
+
+        task = await handler.task_store.get(first.id)
+        text = "".join(m.parts[0].root.text for m in task.history if m.role.value == "agent")
+        assert task.status.state == TaskState.completed
+        assert text == "Your bill is paid."
+
+
+class TestPushNotifications:
+    """Test cases for push-notified message/send requests."""
+
+    @pytest.mark.asyncio
+    async def test_task_returns_at_once_and_result_is_pushed(self):
+        """A non-blocking request returns its task; the answer arrives by webhook."""
+        notifications = []
+
+        def webhook(request):
+            notifications.append((request.headers.get("x-a2a-notification-token"), json.loads(request.content)))
+            return httpx.Response(204)
+
+        notifier = ElectricPushNotifier(httpx.AsyncClient(transport=httpx.MockTransport(webhook)))
+        handler = make_handler(FakeAgent(), push_notifier=notifier)
+        configuration = {
+            "acceptedOutputModes": ["text"],
+            "blocking": False,
+            "pushNotificationConfig": {"url": "http://client/push/abc", "token": "abc"},
+        }
+
+        task = await handler.on_message_send(make_params(configuration=configuration))
+        async with asyncio.timeout(5):
+            while handler._detached_streams:
+                await asyncio.sleep(0.01)
+
+        final = notifications[-1][1]
+        assert task.kind == "task"
+        assert {token for token, _ in notifications} == {"abc"}
+        assert final["status"]["state"] == "completed"
+        assert final["status"]["message"]["parts"][0]["text"] == "Your bill is 42 USD."
+        assert await notifier.get_info(task.id) is None
+
+
+class TestAgentCardEndpoint:
+    """Test cases for agent card caching headers."""
+
+    def make_client(self):
+        app = CacheableCardApplication(
+            agent_card=agent_card,
+            http_handler=make_handler(FakeAgent()),
+        )
+        return TestClient(app.build())
+
+    def test_card_has_cache_headers(self):
+        """The agent card is served with an ETag and a max-age."""
+        response = self.make_client().get("/.well-known/agent.json")
+
+        assert response.status_code == 200
+        assert response.json()["name"] == agent_card.name
+        assert response.headers["etag"]
+        assert "max-age=" in response.headers["cache-control"]
+
+    def test_matching_etag_returns_not_modified(self):
+        """A request with the current ETag gets 304 and no body."""
+        client = self.make_client()
+        etag = client.get("/.well-known/agent.json").headers["etag"]
+
+        response = client.get("/.well-known/agent.json", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
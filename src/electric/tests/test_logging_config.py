@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the structured logging pipeline.
+"""
+
+import json
+import logging
+import sys
+import os
+
+# Add the parent directory to the path to import the settings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings.logging_config import (
+    CorrelationIdFilter,
+    JsonFormatter,
+    SamplingFilter,
+    correlation_scope,
+)
+
+
+def make_record(msg="agent token", **extra):
+    record = logging.makeLogRecord({"name": "tokens", "msg": msg, "levelname": "DEBUG"})
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLoggingPipeline:
+    """Test cases for log filters and formatting."""
+
+    def test_correlation_id_is_attached_inside_scope(self):
+        """Records created inside a correlation scope carry its ID."""
+        record = make_record()
+        with correlation_scope("task-1"):
+            CorrelationIdFilter().filter(record)
+
+        assert record.correlation_id == "task-1"
+
+    def test_correlation_id_is_cleared_after_scope(self):
+        """The correlation ID does not leak out of its scope."""
+        with correlation_scope("task-1"):
+            pass
+        record = make_record()
+        CorrelationIdFilter().filter(record)
+
+        assert record.correlation_id is None
+
+    def test_sampling_filter_bounds(self):
+        """A rate of 0 drops every record and a rate of 1 keeps every record."""
+        records = [make_record() for _ in range(100)]
+
+        assert not any(SamplingFilter(0.0).filter(r) for r in records)
+        assert all(SamplingFilter(1.0).filter(r) for r in records)
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Extra fields are rendered alongside the message."""
+        record = make_record(text="Hello", correlation_id="task-1")
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data["message"] == "agent token"
+        assert data["text"] == "Hello"
+        assert data["correlation_id"] == "task-1"
@@ -2,71 +2,260 @@ import json
 import httpx
 import base64
 import uuid
+import random
 import asyncio
+import logging
 
 from typing import Dict
 from typing import List
+from itertools import islice
 from collections import defaultdict
+from dataclasses import dataclass
+
+from langgraph.config import get_config, get_stream_writer
 
-from a2a.client import A2ACardResolver
 from a2a.types import AgentCard
 from a2a.client import A2AClient
+from a2a.client.errors import A2AClientError
 from a2a.types import (
     AgentCard,
     DataPart,
+    GetTaskRequest,
+    JSONRPCErrorResponse,
     Message,
     MessageSendConfiguration,
     MessageSendParams,
+    PushNotificationConfig,
     SendStreamingMessageRequest,
     SendMessageRequest,
     SendMessageResponse,
     Part,
+    Role,
     Task,
+    TaskQueryParams,
     TaskState,
+    TaskStatusUpdateEvent,
     TextPart,
 )
 
+from a2a_client.card_cache import AGENT_CARD_PATH, AgentCardCache
+from a2a_client.capability_index import CapabilityIndex
+from a2a_client.circuit_breaker import CircuitBreaker
+from a2a_client.http import HttpClientPool, request_timeout, retry_async
+from a2a_client.result_cache import CACHEABLE_TAG, ResultCache, normalize_message
+from a2a_client.push_receiver import PushReceiver
+from a2a_client.session_contexts import SessionContextMap
+from settings.config import Config
+from settings.logging_config import TOKEN_LOGGER
+
+logger = logging.getLogger(__name__)
+token_logger = logging.getLogger(TOKEN_LOGGER)
+
+NO_REMOTE_AGENTS = "There's no remote agent available."
+# A task in any other state will not produce more output on its own.
+_ACTIVE_STATES = frozenset({TaskState.submitted, TaskState.working})
+
+
+@dataclass
+class RemoteEndpoint:
+    """One URL serving a remote agent, with its own health state."""
+    address: str
+    client: A2AClient
+    breaker: CircuitBreaker
+
+    @property
+    def url(self) -> str:
+        return self.client.url
+
 
 class AgentDictionary:
 
-    def __init__(self, agents_urls: List[str], httpx_client: httpx.AsyncClient):
+    def __init__(
+        self,
+        agents_urls: List[str],
+        httpx_client: httpx.AsyncClient,
+        card_cache: AgentCardCache | None = None,
+        http_pool: HttpClientPool | None = None,
+        result_cache: ResultCache | None = None,
+        push_receiver: PushReceiver | None = None,
+    ):
         self.agents_urls = agents_urls
-        self.agents_context: str = "There's no remote agent available."
         self.cards: dict[str, AgentCard] = {}
+        self.index = CapabilityIndex()
+        self._agent_summaries: dict[str, str] = {}
         self.a2a_clients: dict[str, Dict] = {}
+        self.session_contexts = SessionContextMap()
         self.httpx_client = httpx_client
-    
+        self.card_cache = card_cache or AgentCardCache(httpx_client)
+        # Per-agent connection pools; without one every call shares httpx_client.
+        self.http_pool = http_pool
+        # Opt-in cache for skills the remote card tags as cacheable.
+        self.result_cache = result_cache
+        # When set, agents that support push notifications are not streamed from.
+        self.push_receiver = push_receiver
+        self._background_tasks: list[asyncio.Task] = []
+
     @classmethod
-    async def create(cls, agents_urls: List[str], httpx_client: httpx.AsyncClient):
-        self = cls(agents_urls, httpx_client)
-        await self.init_remote_agents()
+    async def create(
+        cls,
+        agents_urls: List[str],
+        httpx_client: httpx.AsyncClient,
+        card_cache: AgentCardCache | None = None,
+        http_pool: HttpClientPool | None = None,
+        result_cache: ResultCache | None = None,
+        push_receiver: PushReceiver | None = None,
+        startup_timeout: float | None = Config.REMOTE_AGENTS.startup_timeout,
+    ):
+        self = cls(agents_urls, httpx_client, card_cache, http_pool, result_cache, push_receiver)
+        await self.init_remote_agents(startup_timeout)
         return self
 
-    async def init_remote_agents(self):
-        async with asyncio.TaskGroup() as task_group:
-            for address in self.agents_urls:
-                task_group.create_task(self.retrieve_card(address))
+    async def init_remote_agents(self, timeout: float | None = None):
+        """Start registering every agent URL and wait up to timeout seconds.
+
+        Agents that have not answered by then keep being retried in the
+        background and join the dictionary, and the prompt context, once
+        they respond. With no timeout this waits until every agent is registered.
+        """
+        registrations = [
+            asyncio.create_task(self._register_until_ready(address))
+            for address in self.agents_urls
+        ]
+        self._background_tasks.extend(registrations)
+        if not registrations:
+            return
+        _, pending = await asyncio.wait(registrations, timeout=timeout)
+        if pending:
+            logger.warning(
+                "Starting with %d of %d remote agents; the rest register in the background",
+                len(registrations) - len(pending), len(registrations),
+            )
+
+    async def _register_until_ready(self, address: str):
+        delay = Config.REMOTE_AGENTS.register_retry_delay
+        while True:
+            try:
+                await self.retrieve_card(address)
+                return
+            except A2AClientError as e:
+                logger.warning("Remote agent at %s unavailable, retrying in %.0fs: %s", address, delay, e)
+            except Exception:
+                logger.exception("Registering remote agent at %s failed, retrying in %.0fs", address, delay)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, Config.REMOTE_AGENTS.register_retry_max_delay)
 
     async def retrieve_card(self, address: str):
-        card_resolver = A2ACardResolver(self.httpx_client, address)
-        card = await card_resolver.get_agent_card()
-        await self.register_agent_card(card)
-    
-    async def register_agent_card(self, card: AgentCard):
+        card = await self.card_cache.get(address)
+        await self.register_agent_card(card, address)
+
+    async def register_agent_card(self, card: AgentCard, address: str | None = None):
+        """Register a card; a name already served by another address adds a failover endpoint.
+
+        Calls and health probes both go to the address the card was
+        discovered at, so replicas whose cards all advertise the same url
+        are still told apart.
+        """
         self.cards[card.name] = card
-        timeout = httpx.Timeout(30)
-        self.a2a_clients[card.name] = {
-            "client": await A2AClient.get_client_from_agent_card_url(
-                base_url=card.url,
-                httpx_client=self.httpx_client,
-                http_kwargs={"timeout": timeout}
-            ),
-            "context_id": None,
+        remote = self.a2a_clients.setdefault(
+            card.name, {"endpoints": []}
+        )
+        address = address or card.url
+        if all(endpoint.address != address for endpoint in remote["endpoints"]):
+            endpoint = RemoteEndpoint(
+                address=address,
+                client=A2AClient(httpx_client=self._http_for(address), url=address),
+                breaker=CircuitBreaker(
+                    Config.REMOTE_AGENTS.failure_threshold,
+                    Config.REMOTE_AGENTS.reset_timeout,
+                ),
+            )
+            remote["endpoints"].append(endpoint)
+            if Config.REMOTE_AGENTS.probe_interval:
+                self._background_tasks.append(
+                    asyncio.create_task(self._probe_loop(endpoint))
+                )
+        self.index.add(card)
+        self._agent_summaries[card.name] = json.dumps(self._describe(card))
+
+    def _http_for(self, url: str) -> httpx.AsyncClient:
+        return self.http_pool.client_for(url) if self.http_pool else self.httpx_client
+
+    @property
+    def agents_context(self) -> str:
+        """Prompt context for the first few registered agents."""
+        return self.agents_context_for("")
+
+    def agents_context_for(
+        self, query: str, k: int = Config.AGENT_INDEX.prompt_top_k,
+    ) -> str:
+        """Prompt context describing the k agents most relevant to query."""
+        if not self._agent_summaries:
+            return NO_REMOTE_AGENTS
+        names = [name for name, _ in self.index.search(query, k)]
+        if not names:
+            names = list(islice(self._agent_summaries, k))
+        return '\n'.join(self._agent_summaries[name] for name in names)
+
+    @staticmethod
+    def _describe(card: AgentCard) -> dict:
+        return {
+            'name': card.name,
+            'description': card.description,
+            'skills': [
+                {'id': skill.id, 'description': skill.description}
+                for skill in card.skills or []
+            ],
         }
-        agent_info = []
-        for ra in self.list_remote_agents():
-            agent_info.append(json.dumps(ra))
-        self.agents_context = '\n'.join(agent_info)
+
+    def find_agents(self, query: str, k: int = 5) -> list[dict]:
+        """Search the remote agents whose skills match what you need.
+
+        Use this when none of the agents in your instructions fits the task.
+
+        Args:
+          query: What the remote agent should do, e.g. "check my electric bill".
+          k: The maximum number of agents to return.
+
+        Returns:
+          The best matching agents with their skills, best match first.
+        """
+        return [
+            {**self._describe(self.cards[name]), 'score': round(score, 3)}
+            for name, score in self.index.search(query, k)
+        ]
+
+    async def _probe_loop(self, endpoint: RemoteEndpoint):
+        """Probe an endpoint periodically so its breaker tracks liveness between calls."""
+        interval = Config.REMOTE_AGENTS.probe_interval
+        while True:
+            await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+            await self.probe(endpoint)
+
+    async def probe(self, endpoint: RemoteEndpoint) -> bool:
+        """Fetch the endpoint's agent card with a short timeout and record the outcome."""
+        try:
+            response = await self._http_for(endpoint.address).get(
+                endpoint.address.rstrip('/') + AGENT_CARD_PATH,
+                timeout=Config.REMOTE_AGENTS.probe_timeout,
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Health probe failed for %s: %s", endpoint.address, e)
+            endpoint.breaker.record_failure()
+            return False
+        endpoint.breaker.record_success()
+        return True
+
+    def release_session(self, session_id: str):
+        """Forget the remote contexts of a session that has ended."""
+        self.session_contexts.release(session_id)
+
+    async def close(self):
+        """Stop background registrations and health checks."""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks.clear()
 
     def list_remote_agents(self):
         """List the available remote agents you can use to delegate the task."""
@@ -79,66 +268,330 @@ class AgentDictionary:
                 {'name': card.name, 'description': card.description}
             )
         return remote_agent_info
-    
+
     async def send_message(
-        self, agent_name: str, message: str,
+        self, agent_name: str, message: str, skill_id: str | None = None,
     ):
         """Sends a task either streaming (if supported) or non-streaming.
 
         This will send a message to the remote agent named agent_name.
+        When called inside the home-assistant graph, each remote chunk is
+        also forwarded to the graph's "custom" stream as it arrives.
 
         Args:
           agent_name: The name of the agent to send the task to.
           message: The message to send to the agent for the task.
-          tool_context: The tool context this method runs in.
+          skill_id: The ID of the agent skill the message is for, if known.
 
         Yields:
           A dictionary of JSON data.
         """
-        try:
-            print(f"Sending message to {agent_name}: {message} ...")
-            if agent_name not in self.a2a_clients:
-                raise ValueError(f'Agent {agent_name} not found')
-            client: A2AClient = self.a2a_clients[agent_name]["client"]
-            if not client:
-                raise ValueError(f'Client not available for {agent_name}')
-            
-            messageId = str(uuid.uuid4())
-            contextId = self.a2a_clients[agent_name]["context_id"]
-
-            messsage_params: MessageSendParams = MessageSendParams(
-                **{
-                    'message': {
-                        'role': 'user',
-                        'parts': [
-                            {'kind': 'text', 'text': message}
-                        ],
-                        'messageId': messageId,
-                        'contextId': contextId,
-                    },
-                }
+        logger.info("Sending message to %s", agent_name, extra={"agent": agent_name})
+        if agent_name not in self.a2a_clients:
+            return {"error": f'Agent {agent_name} not found'}
+        if self.result_cache is not None and self._is_cacheable(agent_name, skill_id):
+            # Keyed by session: the answer may depend on who is asking and
+            # on the session's remote context, e.g. which household's bill.
+            return await self.result_cache.get_or_call(
+                (agent_name, _session_id(), normalize_message(message)),
+                lambda: self._send_with_failover(agent_name, message),
+                should_cache=lambda output: isinstance(output, str),
             )
+        return await self._send_with_failover(agent_name, message)
+
+    def _is_cacheable(self, agent_name: str, skill_id: str | None) -> bool:
+        return any(
+            skill.id == skill_id and CACHEABLE_TAG in (skill.tags or [])
+            for skill in self.cards[agent_name].skills or []
+        )
+
+    async def _send_with_failover(self, agent_name: str, message: str):
+        remote = self.a2a_clients[agent_name]
+        last_error = None
+        for endpoint in remote["endpoints"]:
+            if not endpoint.breaker.allow_request():
+                continue
+            try:
+                output = await self._call_endpoint(endpoint, agent_name, message)
+            except (httpx.HTTPError, A2AClientError) as e:
+                # The remote context lives on the failed server; start afresh elsewhere.
+                endpoint.breaker.record_failure()
+                self.session_contexts.discard(_session_id(), agent_name)
+                last_error = e
+                logger.warning("Remote agent %s failed at %s: %s", agent_name, endpoint.url, e)
+                continue
+            except Exception as e:
+                endpoint.breaker.record_success()
+                logger.exception("Error sending message to %s", agent_name)
+                return {"error": str(e)}
+            endpoint.breaker.record_success()
+            return output
+
+        if last_error is None:
+            return {"error": f'Agent {agent_name} is unavailable, try again later'}
+        return {"error": str(last_error)}
+
+    async def _call_endpoint(
+        self, endpoint: RemoteEndpoint, agent_name: str, message: str,
+    ) -> str:
+        capabilities = self.cards[agent_name].capabilities
+        if self.push_receiver is not None and capabilities.pushNotifications:
+            return await self._push_message(endpoint, agent_name, message)
+        return await self._stream_message(endpoint, agent_name, message)
 
-            streaming_request = SendStreamingMessageRequest(
-                id=str(uuid.uuid4()), params=messsage_params
+    async def _get_task(self, endpoint: RemoteEndpoint, task_id: str) -> Task:
+        """Fetch a task from the endpoint running it.
+
+        tasks/get is idempotent, so transient failures are retried with backoff.
+        """
+        request = GetTaskRequest(id=str(uuid.uuid4()), params=TaskQueryParams(id=task_id))
+        try:
+            response = await retry_async(
+                lambda: endpoint.client.get_task(
+                    request, http_kwargs={"timeout": request_timeout()}
+                )
             )
-            response: SendMessageResponse = client.send_message_streaming(streaming_request)
-            messages = []
+        except A2AClientError:
+            endpoint.breaker.record_failure()
+            raise
+        endpoint.breaker.record_success()
+        if isinstance(response.root, JSONRPCErrorResponse):
+            raise ValueError(response.root.error.message)
+        return response.root.result
+
+    async def _resume_task(self, endpoint: RemoteEndpoint, task_id: str, reply: "_RemoteReply"):
+        """Poll a task whose stream ended early until it stops, collecting unseen agent messages.
+
+        The remote task keeps running after a disconnect, so its result is
+        collected instead of paying for the remote work a second time.
+        """
+        try:
+            async with asyncio.timeout(Config.REMOTE_AGENTS.resume_timeout):
+                while True:
+                    task = await self._get_task(endpoint, task_id)
+                    reply.add_task(task)
+                    if task.status.state not in _ACTIVE_STATES:
+                        return
+                    await asyncio.sleep(Config.REMOTE_AGENTS.resume_poll_interval)
+        except TimeoutError:
+            raise TimeoutError(f'Remote task {task_id} is still running') from None
+
+    async def send_message_many(
+        self,
+        agent_names: List[str],
+        message: str,
+        timeout: float | None = None,
+        first_n: int | None = None,
+    ) -> List[Dict]:
+        """Sends the same message to several remote agents at once.
+
+        Use this instead of repeated send_message calls when more than one
+        agent is needed for the same request.
+
+        Args:
+          agent_names: The names of the agents to send the message to.
+          message: The message to send to every agent.
+          timeout: Seconds to wait for each agent before giving up on it.
+          first_n: Stop once this many agents have answered; all by default.
+
+        Returns:
+          One result per agent, labelled with the agent name, in the order
+          the agents were given. Each has a status of "ok" (with the
+          response), "error", "timeout" or "skipped" when first_n was
+          reached before the agent answered.
+        """
+        timeout = timeout or Config.REMOTE_AGENTS.request_timeout
+        agent_names = list(dict.fromkeys(agent_names))
+        wanted = min(first_n or len(agent_names), len(agent_names))
+
+        async def call(agent_name):
+            async with asyncio.timeout(timeout):
+                return await self.send_message(agent_name, message)
+
+        tasks = {
+            asyncio.create_task(call(name)): name for name in agent_names
+        }
+        results: dict[str, Dict] = {}
+        answered = 0
+        pending = set(tasks)
+        try:
+            while pending and answered < wanted:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    results[tasks[task]] = result = self._fan_out_result(tasks[task], task)
+                    answered += result["status"] == "ok"
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return [
+            results.get(name, {"agent": name, "status": "skipped"})
+            for name in agent_names
+        ]
+
+    @staticmethod
+    def _fan_out_result(agent_name: str, task: asyncio.Task) -> Dict:
+        try:
+            output = task.result()
+        except TimeoutError:
+            return {"agent": agent_name, "status": "timeout"}
+        if isinstance(output, dict) and "error" in output:
+            return {"agent": agent_name, "status": "error", "error": output["error"]}
+        return {"agent": agent_name, "status": "ok", "response": output}
+
+    def _new_message(self, agent_name: str, message: str) -> tuple[str | None, dict]:
+        session_id = _session_id()
+        return session_id, {
+            'role': 'user',
+            'parts': [
+                {'kind': 'text', 'text': message}
+            ],
+            'messageId': str(uuid.uuid4()),
+            'contextId': self.session_contexts.get(session_id, agent_name),
+        }
+
+    async def _stream_message(
+        self, endpoint: RemoteEndpoint, agent_name: str, message: str,
+    ) -> str:
+        session_id, user_message = self._new_message(agent_name, message)
+        streaming_request = SendStreamingMessageRequest(
+            id=str(uuid.uuid4()), params=MessageSendParams(message=user_message)
+        )
+        response: SendMessageResponse = endpoint.client.send_message_streaming(
+            streaming_request,
+            http_kwargs={"timeout": request_timeout(read=Config.REMOTE_AGENTS.request_timeout)},
+        )
+        reply = _RemoteReply(agent_name)
+        task_id = None
+        finished = False
+        try:
             async for chunk in response:
-                chunk = chunk.model_dump(mode='json', exclude_none=True)
-                if "message" in chunk["result"]['status']:
-                    word = chunk["result"]["status"]["message"]["parts"][0]["text"]
-                    print(word, end='', flush=True)
-                    messages.append(word)
-                    
-            self.a2a_clients[agent_name]["context_id"] = chunk["result"]["contextId"]
-            output = ''.join(messages)
-            print(f"Response from {agent_name}: {output}")
-            return output
-        except Exception as e:
-            print(f"Error sending message to {agent_name}: {e}")
-            breakpoint()
-            return {"error": str(e)}
+                event = chunk.root
+                if isinstance(event, JSONRPCErrorResponse):
+                    raise ValueError(event.error.message)
+                result = event.result
+                self.session_contexts.set(session_id, agent_name, result.contextId)
+                task_id = result.id if isinstance(result, Task) else result.taskId
+                if isinstance(result, Message):
+                    reply.add(result)
+                    finished = True
+                elif isinstance(result, TaskStatusUpdateEvent):
+                    if result.status.message:
+                        reply.add(result.status.message)
+                    finished = result.final
+        except (httpx.HTTPError, A2AClientError) as e:
+            if task_id is None:
+                raise
+            logger.warning(
+                "Stream from %s dropped, resuming task %s: %s", agent_name, task_id, e,
+                extra={"agent": agent_name},
+            )
+        if not finished and task_id is not None:
+            await self._resume_task(endpoint, task_id, reply)
+        return reply.finish()
+
+    async def _push_message(
+        self, endpoint: RemoteEndpoint, agent_name: str, message: str,
+    ) -> str:
+        """Send without holding a connection; updates arrive at the push receiver."""
+        session_id, user_message = self._new_message(agent_name, message)
+        reply = _RemoteReply(agent_name)
+        with self.push_receiver.subscribe() as subscription:
+            request = SendMessageRequest(
+                id=str(uuid.uuid4()),
+                params=MessageSendParams(
+                    message=user_message,
+                    configuration=MessageSendConfiguration(
+                        acceptedOutputModes=['text'],
+                        blocking=False,
+                        pushNotificationConfig=PushNotificationConfig(
+                            url=subscription.url, token=subscription.token,
+                        ),
+                    ),
+                ),
+            )
+            response = await endpoint.client.send_message(
+                request, http_kwargs={"timeout": request_timeout()}
+            )
+            if isinstance(response.root, JSONRPCErrorResponse):
+                raise ValueError(response.root.error.message)
+            result = response.root.result
+            self.session_contexts.set(session_id, agent_name, result.contextId)
+            if isinstance(result, Message):
+                reply.add(result)
+                return reply.finish()
+
+            task = result
+            while task.status.state in _ACTIVE_STATES:
+                try:
+                    async with asyncio.timeout(Config.PUSH.notification_timeout):
+                        task = await subscription.updates.get()
+                except TimeoutError:
+                    # A lost notification must not strand the call.
+                    logger.warning(
+                        "No push notification for task %s, polling instead", task.id,
+                        extra={"agent": agent_name},
+                    )
+                    await self._resume_task(endpoint, task.id, reply)
+                    break
+                reply.add_task(task)
+        return reply.finish()
+
+
+class _RemoteReply:
+    """The agent messages of one remote call, each forwarded to the graph once."""
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self._write = _stream_writer()
+        # Text of the messages received so far, keyed by messageId in arrival order.
+        self._received: dict[str, str] = {}
+
+    def add(self, message: Message):
+        if message.messageId in self._received:
+            return
+        word = ''.join(
+            part.root.text for part in message.parts
+            if isinstance(part.root, TextPart)
+        )
+        token_logger.debug("remote token", extra={"agent": self.agent_name, "text": word})
+        self._write({"agent": self.agent_name, "text": word})
+        self._received[message.messageId] = word
+
+    def add_task(self, task: Task):
+        """Add the agent messages of a task snapshot that were not seen yet."""
+        for message in task.history or []:
+            if message.role == Role.agent:
+                self.add(message)
+        if task.status.message:
+            self.add(task.status.message)
+
+    def finish(self) -> str:
+        output = ''.join(self._received.values())
+        logger.info(
+            "Response from %s", self.agent_name,
+            extra={"agent": self.agent_name, "chars": len(output)},
+        )
+        return output
+
+
+def _session_id() -> str | None:
+    """The running graph's thread ID, which identifies the user session."""
+    try:
+        return get_config()["configurable"].get("thread_id")
+    except RuntimeError:
+        return None
+
+
+def _stream_writer():
+    """The running graph's custom stream writer, or a no-op outside a graph."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
 
 
 def group_messages_by_task(messages):
@@ -167,4 +620,4 @@ def group_messages_by_task(messages):
         task['user'] = task['user'].strip()
         task['agent'] = task['agent'].strip()
 
-    return dict(grouped)
\ No newline at end of file
+    return dict(grouped)
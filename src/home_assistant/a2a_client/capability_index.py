@@ -0,0 +1,92 @@
+import re
+import math
+import heapq
+
+from collections import Counter
+
+from a2a.types import AgentCard
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from i in is it my of on or the to with you your".split()
+)
+# Name and tag matches say more about an agent than a word in an example.
+_FIELD_WEIGHTS = {"name": 3, "tags": 2, "skill": 2, "description": 1, "examples": 1}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase text and split it into index terms, dropping stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class CapabilityIndex:
+    """Inverted index over agent cards with BM25 ranking.
+
+    Adding or removing a card only touches that card's terms, and a search
+    only visits the postings of the query terms, so both stay cheap with
+    hundreds of registered agents.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[str, int]] = {}
+        self.doc_lengths: dict[str, int] = {}
+        self._doc_terms: dict[str, list[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, card: AgentCard):
+        """Index a card, replacing any previous card with the same name."""
+        self.remove(card.name)
+        terms = Counter()
+        for field, text in self._fields(card):
+            for term in tokenize(text):
+                terms[term] += _FIELD_WEIGHTS[field]
+
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[card.name] = tf
+        length = sum(terms.values())
+        self.doc_lengths[card.name] = length
+        self._doc_terms[card.name] = list(terms)
+        self._total_length += length
+
+    def remove(self, name: str):
+        """Drop a card from the index if present."""
+        length = self.doc_lengths.pop(name, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(name):
+            del self.postings[term][name]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, k: int = 5) -> list[tuple[str, float]]:
+        """Return up to k (agent name, score) pairs ranked by BM25."""
+        if not self.doc_lengths:
+            return []
+        n_docs = len(self.doc_lengths)
+        avg_length = self._total_length / n_docs
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for name, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[name] / avg_length)
+                scores[name] = scores.get(name, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    @staticmethod
+    def _fields(card: AgentCard):
+        yield "name", card.name
+        yield "description", card.description or ""
+        for skill in card.skills or []:
+            yield "skill", f"{skill.id} {skill.name}"
+            yield "description", skill.description or ""
+            yield "tags", " ".join(skill.tags or [])
+            yield "examples", " ".join(skill.examples or [])
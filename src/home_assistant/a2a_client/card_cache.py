@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import httpx
+
+from dataclasses import dataclass, asdict
+from pydantic import ValidationError
+
+from a2a.client.errors import A2AClientHTTPError, A2AClientJSONError
+from a2a.types import AgentCard
+
+from a2a_client.http import request_timeout, retry_async
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+AGENT_CARD_PATH = "/.well-known/agent.json"
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CachedCard:
+    card: dict
+    etag: str | None
+    expires_at: float
+
+
+class AgentCardCache:
+    """Agent card cache persisted to local disk with conditional revalidation.
+
+    A fresh entry is served without touching the network. A stale entry is
+    revalidated with If-None-Match, so an unchanged card costs a 304 with no
+    body. Freshness follows the server's Cache-Control max-age, shortened by a
+    random jitter so instances started together do not revalidate together.
+    If the agent cannot be reached, the stale card is served instead of failing.
+    """
+
+    def __init__(
+        self,
+        httpx_client: httpx.AsyncClient,
+        directory: str | None = Config.CARD_CACHE.directory,
+        default_max_age: int = Config.CARD_CACHE.default_max_age,
+        fetch_timeout: float = Config.CARD_CACHE.fetch_timeout,
+    ):
+        self.httpx_client = httpx_client
+        self.directory = directory
+        self.default_max_age = default_max_age
+        self.fetch_timeout = fetch_timeout
+        self._entries: dict[str, CachedCard] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def get(self, base_url: str) -> AgentCard:
+        """Return the agent card served at base_url, fetching only when stale."""
+        url = base_url.rstrip('/') + AGENT_CARD_PATH
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(url) or self._load(url)
+            if entry and entry.expires_at > time.time():
+                return AgentCard.model_validate(entry.card)
+            entry = await self._fetch(url, entry)
+            self._entries[url] = entry
+            return AgentCard.model_validate(entry.card)
+
+    async def _fetch(self, url: str, entry: CachedCard | None) -> CachedCard:
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        async def get():
+            response = await self.httpx_client.get(
+                url, headers=headers, timeout=request_timeout(read=self.fetch_timeout)
+            )
+            if response.status_code >= 500 or response.status_code == 429:
+                response.raise_for_status()
+            return response
+
+        try:
+            response = await retry_async(get)
+        except httpx.HTTPStatusError as e:
+            response = e.response
+        except httpx.RequestError as e:
+            if entry:
+                logger.warning("Serving stale agent card for %s: %s", url, e)
+                return entry
+            raise A2AClientHTTPError(
+                503, f'Network communication error fetching agent card from {url}: {e}'
+            ) from e
+
+        expires_at = time.time() + self._max_age(response)
+        if response.status_code == 304 and entry:
+            entry.expires_at = expires_at
+            self._store(url, entry)
+            return entry
+
+        try:
+            response.raise_for_status()
+            card = AgentCard.model_validate(response.json())
+        except httpx.HTTPStatusError as e:
+            if entry:
+                logger.warning("Serving stale agent card for %s: %s", url, e)
+                return entry
+            raise A2AClientHTTPError(
+                e.response.status_code,
+                f'Failed to fetch agent card from {url}: {e}',
+            ) from e
+        except (json.JSONDecodeError, ValidationError) as e:
+            raise A2AClientJSONError(
+                f'Invalid agent card from {url}: {e}'
+            ) from e
+
+        entry = CachedCard(
+            card=card.model_dump(mode='json', exclude_none=True),
+            etag=response.headers.get("etag"),
+            expires_at=expires_at,
+        )
+        if "no-store" not in response.headers.get("cache-control", ""):
+            self._store(url, entry)
+        return entry
+
+    def _max_age(self, response: httpx.Response) -> float:
+        cache_control = response.headers.get("cache-control", "")
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        max_age = int(match.group(1)) if match else self.default_max_age
+        return max_age * random.uniform(0.8, 1.0)
+
+    def _path(self, url: str) -> str:
+        name = hashlib.sha256(url.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _load(self, url: str) -> CachedCard | None:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(url)) as f:
+                entry = CachedCard(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            AgentCard.model_validate(entry.card)
+        except ValidationError as e:
+            # Written by an SDK with another card schema; fetch the card afresh.
+            logger.warning("Dropping invalid cached agent card for %s: %s", url, e)
+            try:
+                os.remove(self._path(url))
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _store(self, url: str, entry: CachedCard):
+        if not self.directory:
+            return
+        path = self._path(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(asdict(entry), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not persist agent card for %s: %s", url, e)
@@ -0,0 +1,102 @@
+import random
+import asyncio
+import logging
+import importlib.util
+import httpx
+
+from typing import Awaitable, Callable, TypeVar
+from urllib.parse import urlsplit
+
+from a2a.client.errors import A2AClientHTTPError
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP/2 needs the h2 package, which requirements.txt installs through httpx[http2];
+# without it clients fall back to HTTP/1.1.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+
+def request_timeout(read: float = Config.HTTP.read_timeout) -> httpx.Timeout:
+    """Timeouts for one request, with `read` bounding the wait between bytes."""
+    return httpx.Timeout(
+        connect=Config.HTTP.connect_timeout,
+        read=read,
+        write=Config.HTTP.write_timeout,
+        pool=Config.HTTP.pool_timeout,
+    )
+
+
+def build_http_client(**kwargs) -> httpx.AsyncClient:
+    """An AsyncClient with the configured pool limits, timeouts and HTTP/2."""
+    kwargs.setdefault("limits", httpx.Limits(
+        max_connections=Config.HTTP.max_connections,
+        max_keepalive_connections=Config.HTTP.max_keepalive_connections,
+        keepalive_expiry=Config.HTTP.keepalive_expiry,
+    ))
+    kwargs.setdefault("timeout", request_timeout())
+    kwargs.setdefault("http2", Config.HTTP.http2 and HTTP2_AVAILABLE)
+    return httpx.AsyncClient(**kwargs)
+
+
+class HttpClientPool:
+    """One connection pool per remote origin.
+
+    Each agent gets its own limits, so a slow or busy agent exhausts only
+    its own connections instead of starving calls to every other agent.
+    """
+
+    def __init__(self, **client_kwargs):
+        self.client_kwargs = client_kwargs
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the client for url's scheme, host and port, creating it on first use."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None:
+            client = self._clients[origin] = build_http_client(**self.client_kwargs)
+        return client
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transport failures and overload or gateway statuses are worth retrying."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRYABLE_STATUS
+    if isinstance(error, A2AClientHTTPError):
+        return error.status_code in _RETRYABLE_STATUS
+    return False
+
+
+async def retry_async(
+    operation: Callable[[], Awaitable[T]],
+    attempts: int = Config.HTTP.retry_attempts,
+    base_delay: float = Config.HTTP.retry_base_delay,
+    max_delay: float = Config.HTTP.retry_max_delay,
+) -> T:
+    """Run an idempotent operation, retrying retryable errors with backoff.
+
+    Delays grow exponentially from base_delay up to max_delay, and each is
+    drawn uniformly below that bound ("full jitter") so clients that failed
+    together do not retry together.
+    """
+    for attempt in range(attempts):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            logger.debug("Retrying in %.2fs after %s", delay, e)
+            await asyncio.sleep(delay)
@@ -0,0 +1,108 @@
+import secrets
+import asyncio
+import logging
+import contextlib
+import uvicorn
+
+from dataclasses import dataclass, field
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from a2a.types import Task
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+PUSH_PATH = "/a2a/push/{token}"
+NOTIFICATION_TOKEN_HEADER = "X-A2A-Notification-Token"
+
+
+@dataclass
+class PushSubscription:
+    """A webhook registered for one remote task, and the updates it received."""
+    token: str
+    url: str
+    updates: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+class _Server(uvicorn.Server):
+    # The receiver runs inside the home assistant's event loop; leave
+    # Ctrl-C to the application instead of stopping only the receiver.
+    def capture_signals(self):
+        return contextlib.nullcontext()
+
+
+class PushReceiver:
+    """Local webhook endpoint for A2A push notifications.
+
+    Each remote task gets a subscription with a random token in its URL;
+    the remote agent POSTs task updates there and the caller awaits them
+    from the subscription's queue, so a long remote task costs an idle
+    future instead of an open connection.
+    """
+
+    def __init__(
+        self,
+        host: str = Config.PUSH.host,
+        port: int = Config.PUSH.port,
+        public_url: str = Config.PUSH.public_url,
+    ):
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip('/')
+        self.app = Starlette(routes=[Route(PUSH_PATH, self._handle, methods=["POST"])])
+        self._subscriptions: dict[str, PushSubscription] = {}
+        self._server: _Server | None = None
+        self._serve_task: asyncio.Task | None = None
+
+    async def start(self):
+        """Serve the webhook endpoint in the background."""
+        self._server = _Server(uvicorn.Config(
+            self.app, host=self.host, port=self.port, log_level="warning", lifespan="off",
+        ))
+        self._serve_task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._serve_task.done():
+                # serve() exits on its own if the port cannot be bound.
+                await self._serve_task
+                raise OSError(f"Push receiver could not listen on {self.host}:{self.port}")
+            await asyncio.sleep(0.01)
+        logger.info("Push receiver listening on %s:%d", self.host, self.port)
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.should_exit = True
+        await self._serve_task
+        self._server = self._serve_task = None
+
+    @contextlib.contextmanager
+    def subscribe(self):
+        """Register a webhook for the duration of one remote call."""
+        token = secrets.token_urlsafe(24)
+        subscription = PushSubscription(
+            token=token, url=self.public_url + PUSH_PATH.format(token=token),
+        )
+        self._subscriptions[token] = subscription
+        try:
+            yield subscription
+        finally:
+            del self._subscriptions[token]
+
+    async def _handle(self, request: Request) -> Response:
+        subscription = self._subscriptions.get(request.path_params["token"])
+        if subscription is None:
+            return Response(status_code=404)
+        header = request.headers.get(NOTIFICATION_TOKEN_HEADER)
+        if header is not None and header != subscription.token:
+            return Response(status_code=401)
+        try:
+            task = Task.model_validate(await request.json())
+        except (ValueError, ValidationError):
+            return Response(status_code=400)
+        subscription.updates.put_nowait(task)
+        return Response(status_code=204)
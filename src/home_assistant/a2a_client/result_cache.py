@@ -0,0 +1,87 @@
+import re
+import time
+import asyncio
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from settings.config import Config
+
+# Skills tagged with this on a remote card return the same answer for the same question.
+CACHEABLE_TAG = "cacheable"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Case-fold and collapse whitespace and trailing punctuation."""
+    return _WHITESPACE_RE.sub(" ", message.casefold()).strip().rstrip("?.! ")
+
+
+class ResultCache:
+    """Bounded TTL cache of remote call results with single-flight loading.
+
+    Entries expire `ttl` seconds after they are stored and the least recently
+    used entry is evicted beyond `max_entries`. Concurrent misses for the same
+    key share one call: the first caller runs it, the others await its result.
+    """
+
+    def __init__(
+        self,
+        ttl: float = Config.RESULT_CACHE.ttl,
+        max_entries: int = Config.RESULT_CACHE.max_entries,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the fresh value for key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_call(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the cached value for key, or run call once for all concurrent callers.
+
+        Results rejected by should_cache (e.g. errors) are shared with the
+        callers waiting on them but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = self._in_flight.get(key)
+        if task is None:
+            # The call runs in a task owned by the cache, so a caller that
+            # gives up (e.g. on a timeout) does not cancel it for the others.
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done, should_cache))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future, should_cache: Callable[[Any], bool]):
+        del self._in_flight[key]
+        # Retrieving the exception also keeps an unawaited failure from being logged.
+        if not task.cancelled() and task.exception() is None and should_cache(task.result()):
+            self.put(key, task.result())
@@ -0,0 +1,67 @@
+import time
+
+from collections import OrderedDict
+
+from settings.config import Config
+
+
+class SessionContextMap:
+    """Remote contextId per (local session, remote agent), bounded by LRU and TTL.
+
+    Each home-assistant session gets its own remote conversation with each
+    agent. Mappings idle for longer than `ttl` seconds are forgotten, the
+    least recently used mapping is evicted beyond `max_entries`, and
+    `release` drops everything a session holds when it ends. A forgotten
+    mapping simply starts a fresh remote context on the next call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = Config.REMOTE_AGENTS.session_contexts_max,
+        ttl: float = Config.REMOTE_AGENTS.session_context_ttl,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str | None, str], tuple[float, str]] = OrderedDict()
+        self._by_session: dict[str | None, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session_id: str | None, agent_name: str) -> str | None:
+        """Return the live contextId for the session and agent, or None."""
+        key = (session_id, agent_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        last_used, context_id = entry
+        now = time.monotonic()
+        if now - last_used > self.ttl:
+            self.discard(session_id, agent_name)
+            return None
+        self._entries[key] = (now, context_id)
+        self._entries.move_to_end(key)
+        return context_id
+
+    def set(self, session_id: str | None, agent_name: str, context_id: str):
+        key = (session_id, agent_name)
+        self._entries[key] = (time.monotonic(), context_id)
+        self._entries.move_to_end(key)
+        self._by_session.setdefault(session_id, set()).add(agent_name)
+        while len(self._entries) > self.max_entries:
+            (old_session, old_agent), _ = next(iter(self._entries.items()))
+            self.discard(old_session, old_agent)
+
+    def discard(self, session_id: str | None, agent_name: str):
+        """Forget one mapping, e.g. after failing over to a server without that context."""
+        self._entries.pop((session_id, agent_name), None)
+        agents = self._by_session.get(session_id)
+        if agents is not None:
+            agents.discard(agent_name)
+            if not agents:
+                del self._by_session[session_id]
+
+    def release(self, session_id: str | None):
+        """Forget every remote context held by a session that has ended."""
+        for agent_name in self._by_session.pop(session_id, ()):
+            self._entries.pop((session_id, agent_name), None)
@@ -0,0 +1,496 @@
+"""
+Unit tests for AgentDictionary remote messaging.
+"""
+
+import json
+import asyncio
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langgraph.prebuilt import create_react_agent
+
+from a2a_client.agent_dictionary import AgentDictionary
+from a2a_client.card_cache import AgentCardCache
+from a2a_client.circuit_breaker import CircuitBreaker, CircuitState
+from a2a_client.result_cache import ResultCache
+from settings.config import Config
+
+
+@pytest.fixture(autouse=True)
+def no_background_probes(monkeypatch):
+    monkeypatch.setattr(Config.REMOTE_AGENTS, "probe_interval", 0)
+
+
+def make_card(url, name="Electric Utility Agent", skills=()):
+    return AgentCard(
+        name=name,
+        description="Checks electricity bills.",
+        url=url,
+        version="1.0.0",
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        capabilities=AgentCapabilities(streaming=True),
+        skills=list(skills),
+    )
+
+
+def agent_message(text):
+    return {
+        "role": "agent",
+        "kind": "message",
+        "messageId": "m-" + text,
+        "parts": [{"kind": "text", "text": text}],
+    }
+
+
+def status_event(request_id, text=None, final=False, state="working"):
+    status = {"state": state}
+    if text is not None:
+        status["message"] = agent_message(text)
+    result = {
+        "kind": "status-update",
+        "taskId": "task-1",
+        "contextId": "ctx-1",
+        "final": final,
+        "status": status,
+    }
+    return f"data: {json.dumps({'jsonrpc': '2.0', 'id': request_id, 'result': result})}\n\n"
+
+
+class FakeAgents:
+    """Fake A2A hosts: `down` hosts refuse, `slow` hosts stall, the rest stream `words`.
+
+    With `drop_after`, streams break after that many words while the task
+    finishes remotely, and tasks/get returns the whole task.
+    """
+
+    def __init__(self, words=("Your ", "bill ", "is ", "paid."), down=(), slow=(), drop_after=None):
+        self.words = words
+        self.down = set(down)
+        self.slow = set(slow)
+        self.drop_after = drop_after
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.host in self.slow:
+            await asyncio.sleep(10)
+        if request.method == "GET":
+            return httpx.Response(200, json={})
+        rpc = json.loads(request.content)
+        if rpc["method"] == "tasks/get":
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": rpc["id"], "result": self.task()})
+        events = [status_event(rpc["id"], word) for word in self.words]
+        events.append(status_event(rpc["id"], final=True, state="completed"))
+        if self.drop_after is None:
+            return httpx.Response(200, text="".join(events), headers={"content-type": "text/event-stream"})
+
+        async def dropping():
+            for event in events[:self.drop_after]:
+                yield event.encode()
+            raise httpx.ReadError("connection reset")
+
+        return httpx.Response(200, content=dropping(), headers={"content-type": "text/event-stream"})
+
+    def task(self):
+        user = {"role": "user", "kind": "message", "messageId": "u-1",
+                "parts": [{"kind": "text", "text": "Check my bill"}]}
+        return {
+            "kind": "task",
+            "id": "task-1",
+            "contextId": "ctx-1",
+            "status": {"state": "completed"},
+            "history": [user] + [agent_message(word) for word in self.words],
+        }
+
+
+def make_dictionary(agents, result_cache=None):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(agents))
+    return AgentDictionary([], client, result_cache=result_cache)
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures open the circuit and refuse calls."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_allows_one_trial(self):
+        """After the reset timeout a single trial call is allowed."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+
+class TestSendMessage:
+    """Test cases for AgentDictionary.send_message."""
+
+    @pytest.mark.asyncio
+    async def test_streams_full_response(self):
+        """The streamed chunks are joined into one response."""
+        dictionary = make_dictionary(FakeAgents())
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+
+        output = await dictionary.send_message("Electric Utility Agent", "Check my bill")
+
+        assert output == "Your bill is paid."
+        assert dictionary.session_contexts.get(None, "Electric Utility Agent") == "ctx-1"
+
+    @pytest.mark.asyncio
+    async def test_dropped_stream_resumes_from_task(self):
+        """A dropped stream is resumed with tasks/get instead of resubmitting."""
+        agents = FakeAgents(drop_after=2)
+        dictionary = make_dictionary(agents)
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+
+        output = await dictionary.send_message("Electric Utility Agent", "Check my bill")
+
+        methods = [json.loads(r.content)["method"] for r in agents.requests]
+        assert output == "Your bill is paid."
+        assert methods == ["message/stream", "tasks/get"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_agent_returns_error(self):
+        """An unknown agent name is reported instead of raising."""
+        dictionary = make_dictionary(FakeAgents())
+
+        output = await dictionary.send_message("Nobody", "Hello")
+
+        assert "not found" in output["error"]
+
+    @pytest.mark.asyncio
+    async def test_fails_over_to_replica(self):
+        """A failing endpoint is skipped in favour of another serving the same card."""
+        agents = FakeAgents(down={"primary"})
+        dictionary = make_dictionary(agents)
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+        await dictionary.register_agent_card(make_card("http://replica:9000/"))
+
+        output = await dictionary.send_message("Electric Utility Agent", "Check my bill")
+
+        assert output == "Your bill is paid."
+        assert [r.url.host for r in agents.requests] == ["primary", "replica"]
+
+    @pytest.mark.asyncio
+    async def test_replicas_with_the_same_card_url_fail_over(self):
+        """Replicas are told apart by discovery address, and calls go to that address."""
+        agents = FakeAgents(down={"primary"})
+        dictionary = make_dictionary(agents)
+        card = make_card("http://localhost:9000/")
+        await dictionary.register_agent_card(card, "http://primary:9000")
+        await dictionary.register_agent_card(card, "http://replica:9000")
+
+        output = await dictionary.send_message("Electric Utility Agent", "Check my bill")
+
+        assert output == "Your bill is paid."
+        assert [r.url.host for r in agents.requests] == ["primary", "replica"]
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self):
+        """Once the circuit is open no request reaches the dead agent."""
+        agents = FakeAgents(down={"primary"})
+        dictionary = make_dictionary(agents)
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+        endpoint = dictionary.a2a_clients["Electric Utility Agent"]["endpoints"][0]
+
+        for _ in range(Config.REMOTE_AGENTS.failure_threshold):
+            assert "error" in await dictionary.send_message("Electric Utility Agent", "Hi")
+        sent = len(agents.requests)
+        output = await dictionary.send_message("Electric Utility Agent", "Hi")
+
+        assert "unavailable" in output["error"]
+        assert len(agents.requests) == sent
+        assert endpoint.breaker.state == CircuitState.OPEN
+
+    @pytest.mark.asyncio
+    async def test_probe_closes_circuit_on_recovery(self):
+        """A successful health probe closes an open circuit."""
+        agents = FakeAgents(down={"primary"})
+        dictionary = make_dictionary(agents)
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+        endpoint = dictionary.a2a_clients["Electric Utility Agent"]["endpoints"][0]
+        for _ in range(Config.REMOTE_AGENTS.failure_threshold):
+            assert not await dictionary.probe(endpoint)
+        assert endpoint.breaker.state == CircuitState.OPEN
+
+        agents.down.clear()
+
+        assert await dictionary.probe(endpoint)
+        assert endpoint.breaker.state == CircuitState.CLOSED
+
+
+class TestStartup:
+    """Test cases for partial-availability startup."""
+
+    @pytest.mark.asyncio
+    async def test_late_agent_registers_in_background(self, monkeypatch):
+        """Startup returns with the agents that answered; a late one joins afterwards."""
+        monkeypatch.setattr(Config.REMOTE_AGENTS, "register_retry_delay", 0.01)
+        down = {"water"}
+
+        def cards(request):
+            host = request.url.host
+            if host in down:
+                raise httpx.ConnectError("connection refused", request=request)
+            card = make_card(f"http://{host}:9000/", name=f"{host.title()} Agent")
+            return httpx.Response(200, json=card.model_dump(mode="json", exclude_none=True))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(cards))
+        dictionary = await AgentDictionary.create(
+            ["http://electric:9000", "http://water:9000"], client,
+            card_cache=AgentCardCache(client, directory=None),
+            startup_timeout=0.1,
+        )
+        assert list(dictionary.cards) == ["Electric Agent"]
+        assert "Water Agent" not in dictionary.agents_context_for("water")
+
+        down.clear()
+        async with asyncio.timeout(5):
+            while "Water Agent" not in dictionary.cards:
+                await asyncio.sleep(0.01)
+        await dictionary.close()
+
+        assert "Water Agent" in dictionary.agents_context_for("water")
+
+    @pytest.mark.asyncio
+    async def test_registration_retries_after_unexpected_errors(self, monkeypatch):
+        """An error other than A2AClientError is logged and retried, not fatal."""
+        monkeypatch.setattr(Config.REMOTE_AGENTS, "register_retry_delay", 0.01)
+        failures = [ValueError("bad card")]
+
+        def cards(request):
+            host = request.url.host
+            card = make_card(f"http://{host}:9000/", name=f"{host.title()} Agent")
+            return httpx.Response(200, json=card.model_dump(mode="json", exclude_none=True))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(cards))
+        dictionary = await AgentDictionary.create(
+            [], client, card_cache=AgentCardCache(client, directory=None),
+        )
+        register_agent_card = dictionary.register_agent_card
+
+        async def flaky(card, address=None):
+            if failures:
+                raise failures.pop()
+            await register_agent_card(card, address)
+
+        monkeypatch.setattr(dictionary, "register_agent_card", flaky)
+        async with asyncio.timeout(5):
+            await dictionary._register_until_ready("http://water:9000")
+        await dictionary.close()
+
+        assert "Water Agent" in dictionary.cards
+
+
+class TestResultCaching:
+    """Test cases for caching results of cacheable skills."""
+
+    SKILLS = [
+        AgentSkill(id="check_bill", name="Check Bill", description="Bills.",
+                   tags=["bill", "cacheable"]),
+        AgentSkill(id="support", name="Support", description="Issues.", tags=["support"]),
+    ]
+
+    async def make_agent(self, agents):
+        dictionary = make_dictionary(agents, result_cache=ResultCache(ttl=60))
+        await dictionary.register_agent_card(
+            make_card("http://primary:9000/", skills=self.SKILLS)
+        )
+        return dictionary
+
+    @pytest.mark.asyncio
+    async def test_cacheable_skill_is_served_from_cache(self):
+        """Repeated questions for a cacheable skill reach the agent once."""
+        agents = FakeAgents()
+        dictionary = await self.make_agent(agents)
+
+        first = await dictionary.send_message("Electric Utility Agent", "Check my bill", "check_bill")
+        second = await dictionary.send_message("Electric Utility Agent", " check my  BILL?", "check_bill")
+
+        assert first == second == "Your bill is paid."
+        assert len(agents.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_asks_share_one_call(self):
+        """Identical in-flight questions collapse into one remote call."""
+        agents = FakeAgents()
+        dictionary = await self.make_agent(agents)
+
+        outputs = await asyncio.gather(*(
+            dictionary.send_message("Electric Utility Agent", "Check my bill", "check_bill")
+            for _ in range(5)
+        ))
+
+        assert set(outputs) == {"Your bill is paid."}
+        assert len(agents.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_sessions_do_not_share_results(self):
+        """One session's cached answer is never served to another."""
+        agents = FakeAgents()
+        dictionary = await self.make_agent(agents)
+        model = ToolCallingFakeModel(responses=[
+            AIMessage(content="", tool_calls=[{
+                "name": "send_message",
+                "args": {"agent_name": "Electric Utility Agent", "message": "Check my bill",
+                         "skill_id": "check_bill"},
+                "id": "call-1",
+            }]),
+            AIMessage(content="Done."),
+        ])
+        graph = create_react_agent(model, tools=[dictionary.send_message])
+
+        for thread_id in ("alice", "alice", "bob"):
+            await graph.ainvoke(
+                {"messages": [("user", "Is my bill paid?")]},
+                {"configurable": {"thread_id": thread_id}},
+            )
+
+        assert len(agents.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_other_skills_are_not_cached(self):
+        """Skills without the cacheable tag always reach the agent."""
+        agents = FakeAgents()
+        dictionary = await self.make_agent(agents)
+
+        for _ in range(2):
+            await dictionary.send_message("Electric Utility Agent", "Help", "support")
+
+        assert len(agents.requests) == 2
+
+
+class TestSendMessageMany:
+    """Test cases for AgentDictionary.send_message_many."""
+
+    async def make_agents(self, agents):
+        dictionary = make_dictionary(agents)
+        for host in ("electric", "water", "gas"):
+            await dictionary.register_agent_card(
+                make_card(f"http://{host}:9000/", name=f"{host.title()} Agent")
+            )
+        return dictionary
+
+    @pytest.mark.asyncio
+    async def test_results_are_labelled_per_agent(self):
+        """Every agent answers and results keep the requested order."""
+        dictionary = await self.make_agents(FakeAgents(down={"gas"}))
+
+        results = await dictionary.send_message_many(
+            ["Water Agent", "Electric Agent", "Gas Agent", "Nobody"], "Check my bill"
+        )
+
+        assert [r["agent"] for r in results] == [
+            "Water Agent", "Electric Agent", "Gas Agent", "Nobody"
+        ]
+        assert [r["status"] for r in results] == ["ok", "ok", "error", "error"]
+        assert results[0]["response"] == "Your bill is paid."
+
+    @pytest.mark.asyncio
+    async def test_slow_agent_times_out_without_delaying_others(self):
+        """A stalled agent is reported as timed out after the per-agent timeout."""
+        dictionary = await self.make_agents(FakeAgents(slow={"gas"}))
+
+        results = await asyncio.wait_for(
+            dictionary.send_message_many(
+                ["Electric Agent", "Gas Agent"], "Check my bill", timeout=0.1
+            ),
+            timeout=2,
+        )
+
+        assert [r["status"] for r in results] == ["ok", "timeout"]
+
+    @pytest.mark.asyncio
+    async def test_first_n_cancels_the_rest(self):
+        """With first_n, the call returns once enough agents have answered."""
+        dictionary = await self.make_agents(FakeAgents(slow={"gas", "water"}))
+
+        results = await asyncio.wait_for(
+            dictionary.send_message_many(
+                ["Gas Agent", "Water Agent", "Electric Agent"], "Check my bill", first_n=1
+            ),
+            timeout=2,
+        )
+
+        assert [r["status"] for r in results] == ["skipped", "skipped", "ok"]
+
+
+class ToolCallingFakeModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class TestStreamingPassThrough:
+    """Test cases for forwarding remote chunks into the graph stream."""
+
+    @pytest.mark.asyncio
+    async def test_remote_chunks_reach_custom_stream(self):
+        """Remote chunks are emitted on the graph's custom stream as they arrive."""
+        dictionary = make_dictionary(FakeAgents())
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+        model = ToolCallingFakeModel(responses=[
+            AIMessage(content="", tool_calls=[{
+                "name": "send_message",
+                "args": {"agent_name": "Electric Utility Agent", "message": "Check my bill"},
+                "id": "call-1",
+            }]),
+            AIMessage(content="Done."),
+        ])
+        graph = create_react_agent(model, tools=[dictionary.send_message])
+
+        chunks = [
+            chunk async for mode, chunk in graph.astream(
+                {"messages": [("user", "Is my bill paid?")]}, stream_mode=["custom"]
+            )
+        ]
+
+        assert [c["text"] for c in chunks] == ["Your ", "bill ", "is ", "paid."]
+        assert {c["agent"] for c in chunks} == {"Electric Utility Agent"}
+
+    @pytest.mark.asyncio
+    async def test_remote_context_is_per_session(self):
+        """Each graph thread continues its own remote context."""
+        agents = FakeAgents()
+        dictionary = make_dictionary(agents)
+        await dictionary.register_agent_card(make_card("http://primary:9000/"))
+        model = ToolCallingFakeModel(responses=[
+            AIMessage(content="", tool_calls=[{
+                "name": "send_message",
+                "args": {"agent_name": "Electric Utility Agent", "message": "Check my bill"},
+                "id": "call-1",
+            }]),
+            AIMessage(content="Done."),
+        ])
+        graph = create_react_agent(model, tools=[dictionary.send_message])
+
+        for thread_id in ("alice", "alice", "bob"):
+            await graph.ainvoke(
+                {"messages": [("user", "Is my bill paid?")]},
+                {"configurable": {"thread_id": thread_id}},
+            )
+
+        sent = [json.loads(r.content)["params"]["message"].get("contextId") for r in agents.requests]
+        assert sent == [None, "ctx-1", None]
@@ -0,0 +1,119 @@
+"""
+Unit tests for the capability index and ranked agent search.
+"""
+
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+
+from a2a_client.agent_dictionary import AgentDictionary
+from a2a_client.capability_index import CapabilityIndex
+
+
+def make_card(name, description, skill_id, tags, examples=()):
+    return AgentCard(
+        name=name,
+        description=description,
+        url=f"http://{skill_id}:9000/",
+        version="1.0.0",
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[
+            AgentSkill(
+                id=skill_id,
+                name=skill_id.replace("_", " ").title(),
+                description=description,
+                tags=list(tags),
+                examples=list(examples),
+            )
+        ],
+    )
+
+
+ELECTRIC = make_card(
+    "Electric Utility Agent", "Checks electricity bills and assigns electricians.",
+    "check_electric_bill", ["electric", "bill"], ["Check the bill for code E001"],
+)
+FOOD = make_card(
+    "Food Provider Agent", "Orders meals from nearby restaurants.",
+    "order_food", ["food", "delivery"], ["Order a pizza for dinner"],
+)
+WEATHER = make_card(
+    "Weather Agent", "Reports weather forecasts.",
+    "get_forecast", ["weather", "forecast"],
+)
+
+
+class TestCapabilityIndex:
+    """Test cases for CapabilityIndex."""
+
+    def test_search_ranks_matching_agent_first(self):
+        """The agent whose skills match the query is ranked first."""
+        index = CapabilityIndex()
+        for card in (ELECTRIC, FOOD, WEATHER):
+            index.add(card)
+
+        results = index.search("how much is my electric bill", k=2)
+
+        assert results[0][0] == "Electric Utility Agent"
+        assert all(name != "Weather Agent" for name, _ in results)
+
+    def test_search_matches_skill_ids_and_examples(self):
+        """Skill IDs and examples are searchable."""
+        index = CapabilityIndex()
+        for card in (ELECTRIC, FOOD):
+            index.add(card)
+
+        assert index.search("order_food")[0][0] == "Food Provider Agent"
+        assert index.search("pizza")[0][0] == "Food Provider Agent"
+
+    def test_remove_and_replace(self):
+        """Re-adding a card replaces it and removing it drops its terms."""
+        index = CapabilityIndex()
+        index.add(FOOD)
+        index.add(FOOD)
+        assert len(index) == 1
+
+        index.remove(FOOD.name)
+
+        assert index.search("pizza") == []
+        assert index.postings == {}
+
+
+class TestAgentDictionaryRanking:
+    """Test cases for ranked agent context in AgentDictionary."""
+
+    @pytest.mark.asyncio
+    async def test_prompt_context_is_bounded(self):
+        """Only the top-k relevant agents are described in the prompt."""
+        dictionary = AgentDictionary([], httpx.AsyncClient())
+        for i in range(200):
+            await dictionary.register_agent_card(
+                make_card(f"Agent {i}", f"Handles chores {i}.", f"chore_{i}", ["chores"])
+            )
+        await dictionary.register_agent_card(ELECTRIC)
+
+        electric_context = dictionary.agents_context_for("check my electric bill", k=3)
+        chores_context = dictionary.agents_context_for("help with chores", k=3)
+        await dictionary.close()
+
+        assert electric_context.splitlines()[0].startswith('{"name": "Electric Utility Agent"')
+        assert len(chores_context.splitlines()) == 3
+
+    def test_find_agents_returns_skills(self):
+        """find_agents returns agent descriptions with their skills."""
+        dictionary = AgentDictionary([], httpx.AsyncClient())
+        dictionary.cards[FOOD.name] = FOOD
+        dictionary.index.add(FOOD)
+
+        results = dictionary.find_agents("order dinner", k=1)
+
+        assert results[0]["name"] == "Food Provider Agent"
+        assert results[0]["skills"][0]["id"] == "order_food"
@@ -0,0 +1,133 @@
+"""
+Unit tests for the agent card cache.
+"""
+
+import json
+import time
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_client.card_cache import AgentCardCache
+
+CARD = {
+    "name": "Electric Utility Agent",
+    "description": "An agent for managing electric utility tasks.",
+    "url": "http://electric:9000/",
+    "version": "1.0.0",
+    "defaultInputModes": ["text"],
+    "defaultOutputModes": ["text"],
+    "capabilities": {"streaming": True},
+    "skills": [],
+}
+
+
+class CardServer:
+    """Fake agent card endpoint that honours If-None-Match."""
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        headers = {"ETag": '"v1"', "Cache-Control": f"public, max-age={self.max_age}"}
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, json=CARD, headers=headers)
+
+
+def make_cache(server, directory):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    return AgentCardCache(client, directory=str(directory))
+
+
+class TestAgentCardCache:
+    """Test cases for AgentCardCache."""
+
+    @pytest.mark.asyncio
+    async def test_fresh_card_is_served_without_request(self, tmp_path):
+        """A second lookup within max-age does not hit the network."""
+        server = CardServer()
+        cache = make_cache(server, tmp_path)
+
+        first = await cache.get("http://electric:9000")
+        second = await cache.get("http://electric:9000/")
+
+        assert first.name == second.name == "Electric Utility Agent"
+        assert len(server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_card_is_reloaded_from_disk(self, tmp_path):
+        """A new cache instance reuses the card persisted by a previous one."""
+        server = CardServer()
+        await make_cache(server, tmp_path).get("http://electric:9000")
+
+        card = await make_cache(server, tmp_path).get("http://electric:9000")
+
+        assert card.name == "Electric Utility Agent"
+        assert len(server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_card_is_revalidated_with_etag(self, tmp_path):
+        """An expired entry is revalidated conditionally and kept on 304."""
+        server = CardServer(max_age=0)
+        cache = make_cache(server, tmp_path)
+
+        await cache.get("http://electric:9000")
+        card = await cache.get("http://electric:9000")
+
+        assert card.name == "Electric Utility Agent"
+        assert len(server.requests) == 2
+        assert server.requests[1].headers["if-none-match"] == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_stale_card_is_served_when_agent_is_down(self, tmp_path):
+        """A stale card is returned if revalidation cannot reach the agent."""
+        path = tmp_path / "stale.json"
+        cache = make_cache(CardServer(), tmp_path)
+        cache._path = lambda url: str(path)
+        path.write_text(json.dumps({"card": CARD, "etag": '"v1"', "expires_at": time.time() - 1}))
+
+        def unreachable(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        cache.httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(unreachable))
+        card = await cache.get("http://electric:9000")
+
+        assert card.name == "Electric Utility Agent"
+
+    @pytest.mark.asyncio
+    async def test_invalid_cached_card_is_refetched(self, tmp_path):
+        """A fresh disk entry that no longer validates is dropped and fetched again."""
+        server = CardServer()
+        path = tmp_path / "old.json"
+        cache = make_cache(server, tmp_path)
+        cache._path = lambda url: str(path)
+        path.write_text(json.dumps({"card": {"name": "Old"}, "etag": None, "expires_at": time.time() + 60}))
+
+        card = await cache.get("http://electric:9000")
+
+        assert card.name == "Electric Utility Agent"
+        assert len(server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_failure_is_retried(self, tmp_path):
+        """A 503 from the agent is retried before the fetch gives up."""
+        server = CardServer()
+        responses = iter([httpx.Response(503)])
+
+        def flaky(request):
+            return next(responses, None) or server(request)
+
+        cache = AgentCardCache(
+            httpx.AsyncClient(transport=httpx.MockTransport(flaky)), directory=str(tmp_path)
+        )
+        card = await cache.get("http://electric:9000")
+
+        assert card.name == "Electric Utility Agent"
+        assert len(server.requests) == 1
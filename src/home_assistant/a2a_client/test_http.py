@@ -0,0 +1,89 @@
+"""
+Unit tests for the shared HTTP client helpers.
+"""
+
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_client.http import HttpClientPool, build_http_client, retry_async
+
+
+class Flaky:
+    """Operation that fails with `error` a given number of times, then succeeds."""
+
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def http_error(status):
+    request = httpx.Request("GET", "http://agent:9000/")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+class TestRetryAsync:
+    """Test cases for retry_async."""
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self):
+        """Connection errors and 503s are retried until the call succeeds."""
+        connect = Flaky(2, httpx.ConnectError("refused"))
+        unavailable = Flaky(1, http_error(503))
+
+        assert await retry_async(connect, attempts=3, base_delay=0) == "ok"
+        assert await retry_async(unavailable, attempts=3, base_delay=0) == "ok"
+        assert connect.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """A 404 is raised at once."""
+        operation = Flaky(1, http_error(404))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await retry_async(operation, attempts=3, base_delay=0)
+        assert operation.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_attempts(self):
+        """The last error is raised once the attempts are used up."""
+        operation = Flaky(5, httpx.ReadTimeout("slow"))
+
+        with pytest.raises(httpx.ReadTimeout):
+            await retry_async(operation, attempts=2, base_delay=0)
+        assert operation.calls == 2
+
+
+class TestHttpClientPool:
+    """Test cases for HttpClientPool."""
+
+    @pytest.mark.asyncio
+    async def test_one_client_per_origin(self):
+        """URLs on the same origin share a client; other origins get their own."""
+        pool = HttpClientPool()
+
+        electric = pool.client_for("http://electric:9000/")
+        assert pool.client_for("http://electric:9000/a2a") is electric
+        assert pool.client_for("http://water:9000/") is not electric
+
+        await pool.aclose()
+        assert electric.is_closed
+
+    @pytest.mark.asyncio
+    async def test_timeouts_are_split(self):
+        """Connect and read timeouts are configured separately."""
+        async with build_http_client() as client:
+            assert client.timeout.connect < client.timeout.read
@@ -0,0 +1,129 @@
+"""
+Unit tests for the push notification receiver and push-mode messaging.
+"""
+
+import json
+import asyncio
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a.types import AgentCapabilities, AgentCard
+
+from a2a_client.agent_dictionary import AgentDictionary
+from a2a_client.push_receiver import PushReceiver
+from settings.config import Config
+
+CARD = AgentCard(
+    name="Electric Utility Agent",
+    description="Checks electricity bills.",
+    url="http://electric:9000/",
+    version="1.0.0",
+    defaultInputModes=["text"],
+    defaultOutputModes=["text"],
+    capabilities=AgentCapabilities(streaming=True, pushNotifications=True),
+    skills=[],
+)
+
+
+def task(state, text=None):
+    result = {"kind": "task", "id": "task-1", "contextId": "ctx-1", "status": {"state": state}}
+    if text:
+        result["status"]["message"] = {
+            "role": "agent", "kind": "message", "messageId": "m-1",
+            "parts": [{"kind": "text", "text": text}],
+        }
+    return result
+
+
+def receiver_client(receiver):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=receiver.app), base_url="http://push")
+
+
+class PushingAgent:
+    """Fake agent that accepts non-blocking sends and reports back by webhook."""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.requests = []
+        self.background = set()
+
+    def __call__(self, request):
+        rpc = json.loads(request.content)
+        self.requests.append(rpc)
+        push = rpc["params"]["configuration"]["pushNotificationConfig"]
+        delivery = asyncio.create_task(self.deliver(push))
+        self.background.add(delivery)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": rpc["id"], "result": task("submitted")})
+
+    async def deliver(self, push):
+        async with receiver_client(self.receiver) as client:
+            for update in (task("working"), task("completed", "Your bill is paid.")):
+                await client.post(push["url"], json=update, headers={"X-A2A-Notification-Token": push["token"]})
+
+
+class TestPushReceiver:
+    """Test cases for PushReceiver."""
+
+    @pytest.mark.asyncio
+    async def test_notification_reaches_subscription(self):
+        """A task posted to a subscription's URL is queued for its caller."""
+        receiver = PushReceiver(public_url="http://push")
+        async with receiver_client(receiver) as client:
+            with receiver.subscribe() as subscription:
+                response = await client.post(subscription.url, json=task("completed", "Done."))
+                update = subscription.updates.get_nowait()
+
+        assert response.status_code == 204
+        assert update.status.message.parts[0].root.text == "Done."
+
+    @pytest.mark.asyncio
+    async def test_unknown_or_forged_notifications_are_rejected(self):
+        """Unknown tokens get 404 and mismatched token headers get 401."""
+        receiver = PushReceiver(public_url="http://push")
+        async with receiver_client(receiver) as client:
+            with receiver.subscribe() as subscription:
+                forged = await client.post(
+                    subscription.url, json=task("completed"),
+                    headers={"X-A2A-Notification-Token": "wrong"},
+                )
+            expired = await client.post(subscription.url, json=task("completed"))
+
+        assert forged.status_code == 401
+        assert expired.status_code == 404
+        assert subscription.updates.empty()
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self):
+        """The receiver serves on a local port until stopped."""
+        receiver = PushReceiver(port=0)
+        await receiver.start()
+        await receiver.stop()
+
+
+class TestPushMode:
+    """Test cases for push-mode messaging in AgentDictionary."""
+
+    @pytest.mark.asyncio
+    async def test_result_arrives_by_push(self, monkeypatch):
+        """A push-capable agent is sent a non-blocking request and answers by webhook."""
+        receiver = PushReceiver(public_url="http://push")
+        agent = PushingAgent(receiver)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(agent))
+        dictionary = AgentDictionary([], client, push_receiver=receiver)
+        monkeypatch.setattr(Config.REMOTE_AGENTS, "probe_interval", 0)
+        await dictionary.register_agent_card(CARD)
+
+        output = await asyncio.wait_for(
+            dictionary.send_message("Electric Utility Agent", "Check my bill"), timeout=5
+        )
+
+        configuration = agent.requests[0]["params"]["configuration"]
+        assert output == "Your bill is paid."
+        assert agent.requests[0]["method"] == "message/send"
+        assert configuration["blocking"] is False
+        assert configuration["pushNotificationConfig"]["url"].startswith("http://push/a2a/push/")
@@ -0,0 +1,82 @@
+"""
+Unit tests for the remote result cache.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_client.result_cache import ResultCache, normalize_message
+
+
+class TestResultCache:
+    """Test cases for ResultCache."""
+
+    def test_normalize_message(self):
+        """Case, spacing and trailing punctuation do not change the key."""
+        assert normalize_message("  Check my\tBILL?! ") == normalize_message("check my bill")
+
+    def test_entries_expire(self):
+        """An entry past its TTL is dropped."""
+        cache = ResultCache(ttl=0)
+        cache.put("key", "value")
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Beyond max_entries the least recently used entry goes first."""
+        cache = ResultCache(ttl=60, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_but_not_cached(self):
+        """Waiters get the in-flight failure; the next call tries again."""
+        cache = ResultCache(ttl=60)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("down")
+
+        results = await asyncio.gather(
+            *(cache.get_or_call("key", failing) for _ in range(3)), return_exceptions=True
+        )
+        with pytest.raises(RuntimeError):
+            await cache.get_or_call("key", failing)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_caller_giving_up_does_not_cancel_others(self):
+        """A caller that times out leaves the shared call running for the rest."""
+        cache = ResultCache(ttl=60)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "paid"
+
+        async def impatient():
+            async with asyncio.timeout(0.02):
+                return await cache.get_or_call("key", slow)
+
+        results = await asyncio.gather(
+            impatient(), cache.get_or_call("key", slow), return_exceptions=True
+        )
+
+        assert isinstance(results[0], TimeoutError)
+        assert results[1] == "paid"
+        assert cache.get("key") == "paid"
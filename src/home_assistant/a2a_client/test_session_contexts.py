@@ -0,0 +1,56 @@
+"""
+Unit tests for per-session remote context mapping.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path to import the A2A client
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a_client.session_contexts import SessionContextMap
+
+
+class TestSessionContextMap:
+    """Test cases for SessionContextMap."""
+
+    def test_sessions_are_isolated(self):
+        """Each session keeps its own context with the same agent."""
+        contexts = SessionContextMap()
+        contexts.set("alice", "Electric", "ctx-a")
+        contexts.set("bob", "Electric", "ctx-b")
+
+        assert contexts.get("alice", "Electric") == "ctx-a"
+        assert contexts.get("bob", "Electric") == "ctx-b"
+        assert contexts.get("carol", "Electric") is None
+
+    def test_idle_contexts_expire(self):
+        """A context idle past the TTL is dropped."""
+        contexts = SessionContextMap(ttl=-1)
+        contexts.set("alice", "Electric", "ctx-a")
+
+        assert contexts.get("alice", "Electric") is None
+        assert len(contexts) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Beyond max_entries the least recently used mapping goes first."""
+        contexts = SessionContextMap(max_entries=2)
+        contexts.set("alice", "Electric", "ctx-a")
+        contexts.set("bob", "Electric", "ctx-b")
+        contexts.get("alice", "Electric")
+        contexts.set("carol", "Electric", "ctx-c")
+
+        assert contexts.get("alice", "Electric") == "ctx-a"
+        assert contexts.get("bob", "Electric") is None
+
+    def test_release_drops_session(self):
+        """Releasing a session forgets all its contexts and nobody else's."""
+        contexts = SessionContextMap()
+        contexts.set("alice", "Electric", "ctx-a")
+        contexts.set("alice", "Water", "ctx-w")
+        contexts.set("bob", "Electric", "ctx-b")
+
+        contexts.release("alice")
+
+        assert len(contexts) == 1
+        assert contexts.get("bob", "Electric") == "ctx-b"
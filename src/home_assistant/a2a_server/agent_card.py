@@ -0,0 +1,17 @@
+from a2a.types import AgentCard, AgentCapabilities
+from a2a_server.agent_skills import control_devices, energy_insights
+from settings.config import Config
+
+agent_card = AgentCard(
+    name="Home Assistant Agent",
+    description="A smart home assistant that controls devices and helps households " \
+    "save energy. Pass metadata.home_id, with its metadata.home_token when the " \
+    "server requires one, to choose the household; otherwise the session gets " \
+    "a household of its own.",
+    url=Config.A2A.url,
+    version="1.0.0",
+    defaultInputModes=["text"],
+    defaultOutputModes=["text"],
+    capabilities=AgentCapabilities(streaming=True),
+    skills=[control_devices, energy_insights],
+)
@@ -0,0 +1,17 @@
+from a2a.types import AgentSkill
+
+control_devices = AgentSkill(
+    id="control_devices",
+    name="Control Home Devices",
+    description="Turn lights and air conditioners on or off, one device or many at once, or apply a scene.",
+    tags=["home", "devices", "lights", "air conditioner"],
+    examples=["Turn off everything except the bedroom air conditioner"],
+)
+
+energy_insights = AgentSkill(
+    id="energy_insights",
+    name="Energy Insights",
+    description="Summarize, forecast and flag unusual device energy use, and suggest savings.",
+    tags=["home", "energy", "usage", "forecast"],
+    examples=["How did I do this week?", "How much energy will I use tomorrow?"],
+)
@@ -0,0 +1,149 @@
+import hmac
+import time
+import asyncio
+import hashlib
+import logging
+
+from collections import OrderedDict
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Part, Task, TaskState, TextPart, UnsupportedOperationError
+from a2a.utils import new_agent_text_message, new_task
+from a2a.utils.errors import ServerError
+from langchain_core.messages import AIMessage
+
+from settings.config import Config
+from settings.logging_config import correlation_scope
+from tools.energy_tools import EnergyTools
+from tools.home_histories import PRIVATE_HOME_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class HomeAssistantAgentExecutor(AgentExecutor):
+    """Serves every household's conversations from one HomeAssistantAgent.
+
+    The agent's graph is compiled once; each A2A contextId is a session
+    (the graph's thread_id), so its message history and remote agent
+    contexts are its own. Device state and usage history belong to the
+    home named in the message's metadata.home_id, or to a home private to
+    the session when none is given. With `home_token_secret` set, a named
+    home also needs its metadata.home_token, and messages without one are
+    rejected. Messages within one session run one at a time, and sessions
+    idle for longer than `idle_timeout` are released.
+    """
+
+    def __init__(
+        self,
+        agent=None,
+        idle_timeout: float = Config.A2A.session_idle_timeout,
+        home_token_secret: str = Config.A2A.home_token_secret,
+    ):
+        super().__init__()
+        # Set by the server once the agent has been created in its event loop.
+        self.agent = agent
+        self.idle_timeout = idle_timeout
+        self.home_token_secret = home_token_secret
+        self._sessions: OrderedDict[str, tuple[float, asyncio.Lock]] = OrderedDict()
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        """Run the agent for one message and stream its answer as task updates."""
+        with correlation_scope(context.task_id):
+            lock = self._session_lock(context.context_id)
+            self._release_idle_sessions()
+            async with lock:
+                await self._execute(context, event_queue)
+            self._touch(context.context_id)
+
+    async def _execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)  # type: ignore
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.contextId)
+
+        try:
+            home_id = home_id_for(context, self.home_token_secret)
+        except PermissionError as e:
+            await updater.reject(new_agent_text_message(str(e), task.contextId, task.id))
+            return
+        answer = []
+        async for stream_mode, chunk in self.agent.stream(context.get_user_input(), task.contextId, home_id):
+            if stream_mode != 'messages' or not isinstance(chunk[0], AIMessage):
+                continue
+            text = chunk[0].content
+            if text:
+                answer.append(text)
+                await updater.update_status(
+                    TaskState.working,
+                    new_agent_text_message(text, task.contextId, task.id),
+                )
+        # The tokens already went out as working updates, so the full answer
+        # is the task's artifact rather than a repeat in the final status.
+        if answer:
+            await updater.add_artifact([Part(root=TextPart(text="".join(answer)))], name="answer")
+        await updater.complete()
+        logger.info("Task completed", extra={"task_id": task.id})
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        entry = self._sessions.get(session_id)
+        lock = entry[1] if entry else asyncio.Lock()
+        self._sessions[session_id] = (time.monotonic(), lock)
+        self._sessions.move_to_end(session_id)
+        return lock
+
+    def _touch(self, session_id: str):
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._sessions[session_id] = (time.monotonic(), entry[1])
+            self._sessions.move_to_end(session_id)
+
+    def _release_idle_sessions(self):
+        # Sessions are ordered by last use, so only expired ones are visited.
+        now = time.monotonic()
+        while self._sessions:
+            session_id, (last_used, lock) = next(iter(self._sessions.items()))
+            if now - last_used <= self.idle_timeout or lock.locked():
+                break
+            del self._sessions[session_id]
+            self.agent.end_session(session_id)
+            EnergyTools.discard_home(session_home_id(session_id))
+            logger.info("Released idle session %s", session_id)
+
+    async def cancel(
+        self, request: RequestContext, event_queue: EventQueue
+    ) -> Task | None:
+        raise ServerError(error=UnsupportedOperationError())
+
+
+def home_id_for(context: RequestContext, secret: str = "") -> str:
+    """The household a message is for: metadata.home_id, or one private to its session.
+
+    Raises PermissionError for another session's private home, or, when a
+    secret is given, for a home_id without its home_token.
+    """
+    metadata = (context.message.metadata if context.message else None) or {}
+    home_id = metadata.get("home_id")
+    if not home_id:
+        return session_home_id(context.context_id)
+    home_id = str(home_id)
+    if home_id.startswith(PRIVATE_HOME_PREFIX):
+        raise PermissionError(f"Home {home_id} is private to another session.")
+    if secret and not hmac.compare_digest(str(metadata.get("home_token", "")), home_token(home_id, secret)):
+        raise PermissionError(f"A valid home_token is required to act on home {home_id}.")
+    return home_id
+
+
+def home_token(home_id: str, secret: str) -> str:
+    """The token that lets a caller act on home_id: its HMAC-SHA256 under the secret, in hex."""
+    return hmac.new(secret.encode(), home_id.encode(), hashlib.sha256).hexdigest()
+
+
+def session_home_id(session_id: str) -> str:
+    return f"{PRIVATE_HOME_PREFIX}{session_id}"
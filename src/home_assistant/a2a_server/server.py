@@ -0,0 +1,46 @@
+import contextlib
+import uvicorn
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+
+from agents.home_assistant import HomeAssistantAgent
+from a2a_client.http import build_http_client
+from a2a_server.agent_card import agent_card
+from a2a_server.home_assistant_agent_executor import HomeAssistantAgentExecutor
+from settings.config import Config
+from settings.logging_config import setup_logging
+
+
+def build_app():
+    """The A2A application; one agent and compiled graph serve every session."""
+    executor = HomeAssistantAgentExecutor()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # The agent starts background tasks, so it is created in the server's loop.
+        async with build_http_client() as httpx_client:
+            executor.agent = await HomeAssistantAgent.create(httpx_client=httpx_client)
+            try:
+                yield
+            finally:
+                await executor.agent.close()
+
+    request_handler = DefaultRequestHandler(
+        agent_executor=executor,
+        task_store=InMemoryTaskStore(),
+    )
+    server = A2AStarletteApplication(
+        agent_card=agent_card,
+        http_handler=request_handler,
+    )
+    return server.build(lifespan=lifespan)
+
+
+def main():
+    setup_logging()
+    uvicorn.run(build_app(), host=Config.A2A.host, port=Config.A2A.port)
+
+if __name__ == "__main__":
+    main()
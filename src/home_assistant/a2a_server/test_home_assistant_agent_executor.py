@@ -0,0 +1,173 @@
+"""
+Unit tests for serving HomeAssistantAgent over A2A.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+from langchain_core.messages import AIMessageChunk, ToolMessage
+
+# Add the parent directory to the path to import the A2A server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import MessageSendParams, Task, TaskState, TaskStatusUpdateEvent
+
+from a2a_server.home_assistant_agent_executor import HomeAssistantAgentExecutor, home_token, session_home_id
+from tools.energy_tools import EnergyTools
+
+
+class FakeHomeAgent:
+    """Agent stand-in that streams a canned reply and records sessions."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.ended = []
+
+    async def stream(self, query, sessionId, home_id=None):
+        self.calls.append((query, sessionId, home_id))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            yield 'updates', {'tools': {'messages': [ToolMessage(content="ok", tool_call_id="1")]}}
+            for token in ("Done", " for ", home_id):
+                await asyncio.sleep(self.delay)
+                yield 'messages', (AIMessageChunk(content=token), {})
+        finally:
+            self.running -= 1
+
+    def end_session(self, sessionId):
+        self.ended.append(sessionId)
+
+
+def make_handler(agent, **kwargs):
+    return DefaultRequestHandler(
+        agent_executor=HomeAssistantAgentExecutor(agent, **kwargs),
+        task_store=InMemoryTaskStore(),
+    )
+
+
+def make_params(text="Turn off the lights", context_id=None, home_id=None, home_token=None):
+    message = {
+        "role": "user",
+        "parts": [{"kind": "text", "text": text}],
+        "messageId": f"msg-{text}-{context_id}",
+    }
+    if context_id:
+        message["contextId"] = context_id
+    if home_id:
+        message["metadata"] = {"home_id": home_id}
+    if home_token:
+        message["metadata"]["home_token"] = home_token
+    return MessageSendParams(message=message)
+
+
+class TestHomeAssistantAgentExecutor:
+    """Test cases for HomeAssistantAgentExecutor."""
+
+    @pytest.mark.asyncio
+    async def test_send_returns_completed_task(self):
+        """message/send runs the agent for the message's home and returns the full answer."""
+        agent = FakeHomeAgent()
+        handler = make_handler(agent)
+
+        task = await handler.on_message_send(make_params(context_id="ctx-1", home_id="home-1"))
+
+        assert isinstance(task, Task)
+        assert task.status.state == TaskState.completed
+        assert task.status.message is None
+        assert task.artifacts[0].parts[0].root.text == "Done for home-1"
+        assert agent.calls == [("Turn off the lights", "ctx-1", "home-1")]
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_tokens(self):
+        """message/stream sends each token as a working update, then completes without repeating them."""
+        handler = make_handler(FakeHomeAgent())
+
+        events = [e async for e in handler.on_message_send_stream(make_params(context_id="ctx-1", home_id="h"))]
+        updates = [e for e in events if isinstance(e, TaskStatusUpdateEvent)]
+
+        assert [e.status.message.parts[0].root.text for e in updates[:-1]] == ["Done", " for ", "h"]
+        assert updates[-1].status.state == TaskState.completed
+        assert updates[-1].status.message is None
+
+    @pytest.mark.asyncio
+    async def test_sessions_without_home_get_their_own(self):
+        """Without a home_id, each session controls a home of its own."""
+        agent = FakeHomeAgent()
+        handler = make_handler(agent)
+
+        await handler.on_message_send(make_params(context_id="ctx-1"))
+        await handler.on_message_send(make_params(context_id="ctx-2"))
+
+        assert [home_id for _, _, home_id in agent.calls] == [session_home_id("ctx-1"), session_home_id("ctx-2")]
+
+    @pytest.mark.asyncio
+    async def test_sessions_run_concurrently_but_each_in_order(self):
+        """Different sessions share the agent at once; one session's messages queue."""
+        agent = FakeHomeAgent(delay=0.02)
+        handler = make_handler(agent)
+
+        await asyncio.gather(
+            handler.on_message_send(make_params("a", context_id="ctx-1")),
+            handler.on_message_send(make_params("b", context_id="ctx-2")),
+        )
+        assert agent.max_running == 2
+
+        agent.max_running = 0
+        await asyncio.gather(
+            handler.on_message_send(make_params("c", context_id="ctx-1")),
+            handler.on_message_send(make_params("d", context_id="ctx-1")),
+        )
+        assert agent.max_running == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_released(self):
+        """A session idle past the timeout has its history and private home freed."""
+        agent = FakeHomeAgent()
+        handler = make_handler(agent, idle_timeout=0.05)
+        EnergyTools.DEVICES.home(session_home_id("ctx-1"))
+        EnergyTools.history(session_home_id("ctx-1"))
+
+        await handler.on_message_send(make_params(context_id="ctx-1"))
+        await asyncio.sleep(0.1)
+        await handler.on_message_send(make_params(context_id="ctx-2"))
+
+        assert agent.ended == ["ctx-1"]
+        assert session_home_id("ctx-1") not in EnergyTools.DEVICES
+        assert session_home_id("ctx-1") not in EnergyTools.HISTORIES
+
+    @pytest.mark.asyncio
+    async def test_home_id_needs_its_token_when_a_secret_is_set(self):
+        """With a secret, a named home is only used with its home_token."""
+        agent = FakeHomeAgent()
+        handler = make_handler(agent, home_token_secret="s3cret")
+
+        rejected = await handler.on_message_send(make_params(context_id="ctx-1", home_id="home-1"))
+        forged = await handler.on_message_send(
+            make_params(context_id="ctx-2", home_id="home-1", home_token=home_token("home-1", "other"))
+        )
+        accepted = await handler.on_message_send(
+            make_params(context_id="ctx-3", home_id="home-1", home_token=home_token("home-1", "s3cret"))
+        )
+
+        assert rejected.status.state == forged.status.state == TaskState.rejected
+        assert accepted.status.state == TaskState.completed
+        assert agent.calls == [("Turn off the lights", "ctx-3", "home-1")]
+
+    @pytest.mark.asyncio
+    async def test_private_homes_cannot_be_named(self):
+        """A caller cannot reach into another session's private home."""
+        agent = FakeHomeAgent()
+        handler = make_handler(agent)
+
+        task = await handler.on_message_send(make_params(context_id="ctx-2", home_id=session_home_id("ctx-1")))
+
+        assert task.status.state == TaskState.rejected
+        assert not agent.calls
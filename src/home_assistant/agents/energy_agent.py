@@ -1,18 +1,47 @@
 from crewai import Agent, Task, Crew
 from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Any, Optional, Type
 
 
 from agents.base_agent import BaseAgent
 from tools.energy_tools import EnergyTools
+from tools.forecasting import forecast_usage
+from tools.usage_analytics import summarize_usage
 
 
-class GetHistoricalData(BaseTool):
-    name: str = "get_historical_data"
-    description: str = "Retrieve historical data of device usage."
+class UsageSummaryQuery(BaseModel):
+    start: Optional[str] = Field(None, description="ISO time at which the summary starts.")
+    end: Optional[str] = Field(None, description="ISO time at which the summary ends.")
+
+
+class SummarizeEnergyUsage(BaseTool):
+    name: str = "summarize_energy_usage"
+    description: str = (
+        "Summarize device usage: on-hours and estimated kWh per device and room, "
+        "on-hours by hour of the day, and overlapping usage."
+    )
+    args_schema: Type[BaseModel] = UsageSummaryQuery
+    history: Any = None
+    rollups: Any = None
+
+    def _run(self, start=None, end=None) -> dict:
+        return summarize_usage(self.history, start, end, self.rollups)
+
+
+class ForecastEnergyUsage(BaseTool):
+    name: str = "forecast_energy_usage"
+    description: str = (
+        "Forecast kWh for the next day and the next week, per device and room, "
+        "from the usual usage at each hour of the week."
+    )
+    history: Any = None
+    rollups: Any = None
+
+    def _run(self) -> dict:
+        return forecast_usage({"home": self.history}, rollups={"home": self.rollups}).get("home", {})
+
 
-    def _run(self) -> str:
-        return EnergyTools.get_historical_data()
-    
 class EnergyAgent(BaseAgent):
     def __init__(self, streamable=False):
         super().__init__(
@@ -20,36 +49,37 @@ class EnergyAgent(BaseAgent):
             description="An agent for analyzing and managing energy consumption and production.",
             content_types=['text', 'text/plain'],
         )
-        self._set_up_crew()
-    
-    def _set_up_crew(self) -> Crew:
-        get_historical_data_tool = GetHistoricalData()
+
+    def _set_up_crew(self, history, rollups=None) -> Crew:
+        summarize_energy_usage_tool = SummarizeEnergyUsage(history=history, rollups=rollups)
+        forecast_energy_usage_tool = ForecastEnergyUsage(history=history, rollups=rollups)
 
         # 🧠 Agent 1: Phân tích lịch sử
         analyzer_agent = Agent(
             role="Usage Pattern Analyzer",
             goal="Analyze device usage patterns from historical data",
             backstory="An AI analyst who finds patterns in usage logs",
-            tools=[get_historical_data_tool]
+            tools=[summarize_energy_usage_tool]
         )
 
         # 🧠 Agent 2: Lên kế hoạch tiết kiệm
         planner_agent = Agent(
             role="Energy Saving Planner",
             goal="Suggest energy-saving plans based on usage analysis",
-            backstory="An expert who helps reduce electricity consumption intelligently"
+            backstory="An expert who helps reduce electricity consumption intelligently",
+            tools=[forecast_energy_usage_tool]
         )
 
         # 📝 Task 1: Phân tích thói quen sử dụng
         analyze_task = Task(
-            description="Use the tool to fetch device usage history and detect patterns by device and room.",
+            description="Use the tool to fetch the device usage summary and detect patterns by device, room and hour of the day.",
             expected_output="Summary of usage trends and repeated behaviors.",
             agent=analyzer_agent
         )
 
         # 📝 Task 2: Lên lịch tối ưu
         plan_task = Task(
-            description="Use the output from the analysis to suggest energy-saving schedules.",
+            description="Use the output from the analysis and the forecast for the coming week to suggest energy-saving schedules.",
             expected_output="Recommended changes in usage schedule for LIGHT and AIR_CONDITIONER.",
             agent=planner_agent
         )
@@ -59,10 +89,16 @@ class EnergyAgent(BaseAgent):
             agents=[analyzer_agent, planner_agent],
             tasks=[analyze_task, plan_task]
         )
-        self.crew = crew
+        return crew
 
-    def invoke(self) -> str:
-        result = self.crew.kickoff()
+    def invoke(self, history=None, rollups=None) -> str:
+        # The crew runs off the event loop, so it reads a copy of the history
+        # rather than the store the loop is appending to. Each run gets its
+        # own crew, so runs for different homes can proceed in parallel.
+        if history is None:
+            home = EnergyTools.history()
+            history, rollups = home.store.copy(), home.rollups
+        result = self._set_up_crew(history, rollups).kickoff()
         return {"output": result}
 
 if __name__ == "__main__":
@@ -1,19 +1,26 @@
 import httpx
 import asyncio
+import logging
 
 from typing import Dict, Any, AsyncIterable
 
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from agents.base_agent import BaseAgent
 from settings.config import Config
 from settings.prompts import HOME_ASSISTANT_AGENT
 from tools.energy_tools import EnergyTools
 from tools.agent_tools import AgentTools
+from tools.ingestion import EventIngestor
 from a2a_client.agent_dictionary import AgentDictionary
+from a2a_client.http import HttpClientPool
+from a2a_client.push_receiver import PushReceiver
+from a2a_client.result_cache import ResultCache
 
+logger = logging.getLogger(__name__)
 memory = MemorySaver()
 
 class HomeAssistantAgent(BaseAgent):
@@ -51,40 +58,112 @@ class HomeAssistantAgent(BaseAgent):
             api_key=Config.OPENAI.api_key
         )
 
+        self.ingestor = None
+        if Config.INGEST.jsonl_path or Config.INGEST.socket_path:
+            # Local sources carry the default home's events.
+            self.ingestor = EventIngestor(EnergyTools.history(Config.HOMES.default_home_id).store)
+            self.ingestor.start()
+            if Config.INGEST.jsonl_path:
+                self.ingestor.add_source(self.ingestor.tail_jsonl(Config.INGEST.jsonl_path))
+            if Config.INGEST.socket_path:
+                await self.ingestor.serve_unix(Config.INGEST.socket_path)
+
+        self.rules_task = asyncio.create_task(EnergyTools.HISTORIES.run_rules())
+
+        self.http_pool = HttpClientPool()
+        self.push_receiver = None
+        if Config.PUSH.enabled:
+            self.push_receiver = PushReceiver()
+            await self.push_receiver.start()
         agent_dictionary = await AgentDictionary.create(
             agents_urls=["http://localhost:9000"],
-            httpx_client=self.httpx_client
+            httpx_client=self.httpx_client,
+            http_pool=self.http_pool,
+            result_cache=ResultCache() if Config.RESULT_CACHE.enabled else None,
+            push_receiver=self.push_receiver,
         )
-        a2a_agent_instruction = agent_dictionary.agents_context
-        print(a2a_agent_instruction)
+        self.agent_dictionary = agent_dictionary
+        logger.info("Remote agents: %s", list(agent_dictionary.cards))
 
         tools = [
             EnergyTools.change_light_status,
             EnergyTools.change_air_conditioner_status,
+            EnergyTools.apply_device_changes,
+            EnergyTools.summarize_energy_usage,
+            EnergyTools.recent_energy_usage,
+            EnergyTools.forecast_energy_usage,
+            EnergyTools.get_device_alerts,
             AgentTools.analyze_energy_usage,
             agent_dictionary.list_remote_agents,
+            agent_dictionary.find_agents,
             agent_dictionary.send_message,
+            agent_dictionary.send_message_many,
             ]
         
         self.graph = create_react_agent(
             self.model,
             checkpointer=memory,
-            prompt=HOME_ASSISTANT_AGENT.format(a2a_agent_instruction=a2a_agent_instruction),
+            prompt=self._build_prompt,
             tools=tools
         )
 
+    def _build_prompt(self, state) -> list:
+        """System prompt describing only the remote agents relevant to the latest user turn."""
+        query = next(
+            (_text(m.content) for m in reversed(state["messages"]) if isinstance(m, HumanMessage)),
+            "",
+        )
+        a2a_agent_instruction = self.agent_dictionary.agents_context_for(query)
+        system = HOME_ASSISTANT_AGENT.format(a2a_agent_instruction=a2a_agent_instruction)
+        return [SystemMessage(content=system)] + state["messages"]
+
+    def end_session(self, sessionId):
+        """Free the local history and remote contexts held for a finished session."""
+        memory.delete_thread(sessionId)
+        self.agent_dictionary.release_session(sessionId)
+
+    async def close(self):
+        """Stop background work started by the agent."""
+        self.rules_task.cancel()
+        await self.agent_dictionary.close()
+        await self.http_pool.aclose()
+        if self.push_receiver is not None:
+            await self.push_receiver.stop()
+        if self.ingestor is not None:
+            await self.ingestor.stop()
+        EnergyTools.HISTORIES.save()
+
 
     
-    async def invoke(self, query, sessionId) -> str:
-        config = {'configurable': {'thread_id': sessionId}}
+    @staticmethod
+    def _config(sessionId, home_id=None) -> dict:
+        # The device tools act on home_id, or on the default home without it.
+        return {'configurable': {'thread_id': sessionId, 'home_id': home_id}}
+
+    async def invoke(self, query, sessionId, home_id=None) -> str:
+        config = self._config(sessionId, home_id)
+        await EnergyTools.load_home(home_id)
         response = await self.graph.ainvoke({'messages': [('user', query)]}, config)
         return response
 
     async def stream(
-        self, query, sessionId
+        self, query, sessionId, home_id=None
     ) -> AsyncIterable[Dict[str, Any]]:
         inputs = {'messages': [('user', query)]}
-        config = {'configurable': {'thread_id': sessionId}}
+        config = self._config(sessionId, home_id)
+        await EnergyTools.load_home(home_id)
+
+        # 'custom' carries remote agent chunks forwarded by AgentDictionary.send_message.
+        async for stream_mode, chunk in self.graph.astream(inputs, config, stream_mode=['updates', 'messages', 'custom']):
+            yield stream_mode, chunk
+
 
-        async for stream_mode, chunk in self.graph.astream(inputs, config, stream_mode=['updates', 'messages']):
-            yield stream_mode, chunk
\ No newline at end of file
+def _text(content) -> str:
+    """The text of message content, which may be a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
@@ -6,8 +6,12 @@ import httpx
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
 from agents.home_assistant import HomeAssistantAgent
+from a2a_client.http import build_http_client
+from settings.logging_config import setup_logging, correlation_scope
 
 async def main():
+    setup_logging()
+
     # 🖨️ Helper to print messages
     def print_console(msg):
         if isinstance(msg, HumanMessage):
@@ -21,6 +25,7 @@ async def main():
     class StreamAgentResult:
         def __init__(self):
             self.msg_id = None
+            self.remote_agent = None
 
         def log(self, streammod, response):
             # print("response", response)
@@ -35,8 +40,15 @@ async def main():
                         id = response[0].id
                         if self.msg_id != id:
                             self.msg_id = id
+                            self.remote_agent = None
                             print(f"\n\033[92m🤖 Agent:\033[0m", end='', flush=True)
                         print(response[0].content, end='', flush=True)
+            elif streammod == 'custom':
+                if self.remote_agent != response["agent"]:
+                    self.remote_agent = response["agent"]
+                    self.msg_id = None
+                    print(f"\n\033[96m📡 {response['agent']}:\033[0m ", end='', flush=True)
+                print(response["text"], end='', flush=True)
 
     # 🔁 Main loop (new session every time)
     async def chat_loop(agent: HomeAssistantAgent, streamable=False):
@@ -47,18 +59,23 @@ async def main():
             if user_input.lower() in ("exit", "quit"):
                 print("\n👋 Bye!")
                 break
-            if not streamable:
-                responses = await agent.invoke(user_input, session_id)
-                print_console(responses["messages"][-1])
-            else:
-                stream_agent_result = StreamAgentResult()
-                async for streammod, res in agent.stream(user_input, session_id):
-                    # print(res)
-                    stream_agent_result.log(streammod, res)
-    async with httpx.AsyncClient() as httpx_client:
+            with correlation_scope():
+                if not streamable:
+                    responses = await agent.invoke(user_input, session_id)
+                    print_console(responses["messages"][-1])
+                else:
+                    stream_agent_result = StreamAgentResult()
+                    async for streammod, res in agent.stream(user_input, session_id):
+                        # print(res)
+                        stream_agent_result.log(streammod, res)
+    async with build_http_client() as httpx_client:
         agent = await HomeAssistantAgent.create(httpx_client=httpx_client)
         session_id = "example_session"
-        await chat_loop(agent, streamable=True)
+        try:
+            await chat_loop(agent, streamable=True)
+        finally:
+            agent.end_session(session_id)
+            await agent.close()
 
 
 if __name__ == "__main__":
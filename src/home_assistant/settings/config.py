@@ -5,6 +5,127 @@ from dataclasses import dataclass
 
 @dataclass
 class Config:
+    @dataclass
+    class A2A:
+        host: str = os.getenv("HOME_A2A_HOST", "0.0.0.0")
+        port: int = int(os.getenv("HOME_A2A_PORT", "9100"))
+        url: str = os.getenv("HOME_A2A_URL", f"http://localhost:{port}/")
+        session_idle_timeout: float = 3600.0  # seconds before an idle session is released
+        # With a secret set, metadata.home_id is only honoured with a matching
+        # metadata.home_token (see home_token()), issued by whatever authenticates
+        # households. Without one, any caller may act on any home it names.
+        home_token_secret: str = os.getenv("HOME_A2A_HOME_TOKEN_SECRET", "")
+
     @dataclass
     class OPENAI:
         api_key = os.getenv("OPENAI_API_KEY", "OPENAI_API_KEY")
+
+    @dataclass
+    class LOGGING:
+        level: str = os.getenv("LOG_LEVEL", "INFO")
+        # Fraction of per-token DEBUG events that are written out.
+        token_sample_rate: float = float(os.getenv("LOG_TOKEN_SAMPLE_RATE", "0.01"))
+
+    @dataclass
+    class HTTP:
+        connect_timeout: float = 5.0
+        read_timeout: float = 30.0
+        write_timeout: float = 10.0
+        pool_timeout: float = 5.0  # wait for a free connection before failing
+        max_connections: int = 20  # per remote agent
+        max_keepalive_connections: int = 10
+        keepalive_expiry: float = 60.0
+        http2: bool = True  # needs h2, installed by httpx[http2] in requirements.txt
+        retry_attempts: int = 3  # idempotent calls only
+        retry_base_delay: float = 0.2
+        retry_max_delay: float = 2.0
+
+    @dataclass
+    class CARD_CACHE:
+        directory: str = os.getenv(
+            "AGENT_CARD_CACHE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "home_assistant", "agent_cards"),
+        )
+        default_max_age: int = 300  # used when the server sends no max-age
+        fetch_timeout: float = 30.0
+
+    @dataclass
+    class AGENT_INDEX:
+        prompt_top_k: int = 3  # remote agents described in each prompt
+
+    @dataclass
+    class RESULT_CACHE:
+        # Only skills tagged "cacheable" on the remote card are ever cached.
+        enabled: bool = os.getenv("REMOTE_RESULT_CACHE", "true").lower() == "true"
+        ttl: float = 300.0
+        max_entries: int = 1024
+
+    @dataclass
+    class PUSH:
+        # Receive remote results by webhook instead of holding a stream open.
+        enabled: bool = os.getenv("A2A_PUSH_ENABLED", "") == "1"
+        host: str = os.getenv("A2A_PUSH_HOST", "127.0.0.1")
+        port: int = int(os.getenv("A2A_PUSH_PORT", "8765"))
+        # Base URL remote agents use to reach the receiver.
+        public_url: str = os.getenv("A2A_PUSH_PUBLIC_URL", f"http://localhost:{port}")
+        notification_timeout: float = 60.0  # seconds between updates before polling
+
+    @dataclass
+    class HOMES:
+        # Home controlled by sessions that do not pass a home_id.
+        default_home_id: str = os.getenv("DEFAULT_HOME_ID", "default")
+        # Named homes kept in memory when a history archive is configured;
+        # the least recently used is saved and unloaded beyond this.
+        max_loaded_homes: int = 1000
+
+    @dataclass
+    class ANALYSIS:
+        workers: int = 4  # energy crew runs in parallel, for different homes
+
+    @dataclass
+    class INGEST:
+        # Local device-event sources; each is used when its path is set.
+        jsonl_path: str = os.getenv("INGEST_JSONL_PATH", "")
+        socket_path: str = os.getenv("INGEST_SOCKET_PATH", "")
+        queue_size: int = 10_000  # events buffered before sources are slowed down
+        batch_size: int = 1000
+        batch_interval: float = 0.05  # seconds a partial batch waits for more events
+        dedup_window: int = 100_000  # recent events remembered for deduplication
+        poll_interval: float = 0.2  # seconds between reads at the end of a tailed file
+
+    @dataclass
+    class RULES:
+        long_running_hours: float = 10.0  # device on in an empty room
+        off_time_alpha: float = 0.2  # weight of the latest off time in the usual one
+        late_light_tolerance_minutes: float = 60.0
+        min_samples: int = 3  # off times seen before lateness is judged
+        spike_sigmas: float = 3.0
+        spike_min_samples: int = 7  # days of an hour's baseline before spikes are flagged
+        max_alerts: int = 100
+        tick_interval: float = 60.0  # seconds between time-based checks
+
+    @dataclass
+    class FORECAST:
+        weeks: int = 4  # history used for the hour-of-week profile
+        alpha: float = 0.5  # weight of the latest week against older ones
+
+    @dataclass
+    class ARCHIVE:
+        # Device history is kept on disk under this directory when it is set.
+        directory: str = os.getenv("HISTORY_ARCHIVE_DIR", "")
+        raw_retention_days: int = 90  # older raw events are kept as hourly rollups
+
+    @dataclass
+    class REMOTE_AGENTS:
+        request_timeout: float = 30.0  # seconds without progress before a call fails
+        probe_interval: float = 15.0  # seconds between health probes; 0 disables them
+        probe_timeout: float = 2.0
+        failure_threshold: int = 3  # consecutive failures that open the circuit
+        reset_timeout: float = 30.0  # seconds before an open circuit allows a trial call
+        startup_timeout: float = 5.0  # agents answering later register in the background
+        register_retry_delay: float = 1.0
+        register_retry_max_delay: float = 60.0
+        resume_poll_interval: float = 0.5  # tasks/get polling after a dropped stream
+        resume_timeout: float = 120.0
+        session_contexts_max: int = 10_000  # (session, agent) remote contexts kept
+        session_context_ttl: float = 3600.0  # seconds idle before a remote context is dropped
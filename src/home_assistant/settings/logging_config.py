@@ -0,0 +1,109 @@
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from settings.config import Config
+
+# Per-token events go to this logger so they can be sampled independently.
+TOKEN_LOGGER = "tokens"
+
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_listener: QueueListener | None = None
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamp each record with the correlation ID of the current request."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep roughly `rate` of the records that reach it."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only render what the writer thread cannot do safely later; the JSON
+        # formatting itself happens off the caller's thread.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def setup_logging(
+    level: str = Config.LOGGING.level,
+    token_sample_rate: float = Config.LOGGING.token_sample_rate,
+):
+    """Route all logging through a queue drained by a background writer thread.
+
+    Callers on the event loop only enqueue records; formatting and the
+    write to stderr happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+    logging.getLogger(TOKEN_LOGGER).addFilter(SamplingFilter(token_sample_rate))
+
+
+@contextmanager
+def correlation_scope(value: str | None = None):
+    """Set the correlation ID for log records emitted inside the block."""
+    token = correlation_id.set(value or uuid.uuid4().hex)
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)
@@ -1,16 +1,55 @@
+import asyncio
+import weakref
+
+from concurrent.futures import ThreadPoolExecutor
+
 from agents.energy_agent import EnergyAgent
+from settings.config import Config
+from tools.energy_tools import EnergyTools
+
 
 class AgentTools:
 
     agent = EnergyAgent()
+    # Crew runs are blocking, so they go to worker threads instead of
+    # stalling the event loop; each run builds its own crew.
+    executor = ThreadPoolExecutor(
+        max_workers=Config.ANALYSIS.workers, thread_name_prefix="energy-analysis"
+    )
+    # Per history store: (version, analysis) of its last completed run.
+    # Weakly keyed, so a discarded home's analysis goes with its store.
+    _cached: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    _in_flight: dict[tuple[int, int], asyncio.Future] = {}
 
     @classmethod
-    def analyze_energy_usage(cls):
+    async def analyze_energy_usage(cls):
         """
         Analyze energy usage data to identify patterns and anomalies.
 
         """
-        output = cls.agent.invoke()
-        return output
+        home = EnergyTools.history()
+        history = home.store
+        version = history.version
+        cached = cls._cached.get(history)
+        if cached is not None and cached[0] == version:
+            return cached[1]
 
-        
\ No newline at end of file
+        key = (id(history), version)
+        future = cls._in_flight.get(key)
+        if future is None:
+            # The loop keeps appending to the store, so the crew reads a copy.
+            future = asyncio.get_running_loop().run_in_executor(
+                cls.executor, cls.agent.invoke, history.copy(), home.rollups
+            )
+            cls._in_flight[key] = future
+            future.add_done_callback(lambda done: cls._finish(history, key, done))
+        # Shielded so one caller giving up does not cancel the run for the others.
+        return await asyncio.shield(future)
+
+    @classmethod
+    def _finish(cls, history, key: tuple[int, int], future: asyncio.Future):
+        del cls._in_flight[key]
+        if not future.cancelled() and future.exception() is None:
+            cached = cls._cached.get(history)
+            if cached is None or cached[0] < key[1]:
+                cls._cached[history] = (key[1], future.result())
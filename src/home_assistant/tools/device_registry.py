@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+from tools.history_store import STATUSES
+
+DEVICE_TYPES = ("LIGHT", "AIR_CONDITIONER")
+DEFAULT_ROOMS = ("living_room", "bedroom", "kitchen")
+ANY = "*"
+
+# Named scenes as (room, device type, status) changes; "*" matches every room or type.
+SCENES = {
+    "all_off": [(ANY, ANY, "OFF")],
+    "away": [(ANY, ANY, "OFF")],
+    "good_night": [
+        (ANY, ANY, "OFF"),
+        ("bedroom", "AIR_CONDITIONER", "ON"),
+    ],
+    "good_morning": [("bedroom", "AIR_CONDITIONER", "OFF"), ("kitchen", "LIGHT", "ON")],
+    "evening": [("living_room", "LIGHT", "ON"), ("kitchen", "LIGHT", "ON")],
+}
+
+
+class Device:
+    """Current state of one device; slots keep a record to a few dozen bytes."""
+    __slots__ = ("room", "device_type", "status", "changed_at")
+
+    def __init__(self, room: str, device_type: str, status: str = "OFF", changed_at: float | None = None):
+        self.room = room
+        self.device_type = device_type
+        self.status = status
+        self.changed_at = changed_at
+
+    def to_dict(self) -> dict:
+        return {
+            "room": self.room,
+            "device": self.device_type,
+            "status": self.status,
+            "changed_at": self.changed_at,
+        }
+
+
+class Home:
+    """The devices of one home, keyed by (room, device type), and the lock guarding them."""
+    __slots__ = ("home_id", "rooms", "devices", "lock")
+
+    def __init__(self, home_id: str, rooms, keys):
+        self.home_id = home_id
+        self.rooms = list(rooms)
+        self.devices = {key: Device(*key) for key in keys}
+        self.lock = asyncio.Lock()
+
+
+class DeviceRegistry:
+    """Device state for many homes in one process.
+
+    Lookups are dict accesses by home ID and then (room, device type).
+    Changes to a home run under that home's asyncio lock, so concurrent
+    sessions controlling the same home see each other's changes in order,
+    while different homes never wait on each other. Homes are created with
+    the default layout the first time they are used.
+    """
+
+    def __init__(self, rooms=DEFAULT_ROOMS, device_types=DEVICE_TYPES):
+        self.rooms = tuple(rooms)
+        self.device_types = tuple(device_types)
+        # Every home's device dict shares these key tuples.
+        self._keys = tuple((room, device_type) for room in self.rooms for device_type in self.device_types)
+        self._homes: dict[str, Home] = {}
+
+    def __len__(self) -> int:
+        return len(self._homes)
+
+    def __contains__(self, home_id: str) -> bool:
+        return home_id in self._homes
+
+    def home(self, home_id: str) -> Home:
+        home = self._homes.get(home_id)
+        if home is None:
+            home = self._homes[home_id] = Home(home_id, self.rooms, self._keys)
+        return home
+
+    def discard(self, home_id: str):
+        """Forget a home, e.g. one that only lived for a finished session."""
+        self._homes.pop(home_id, None)
+
+    def get(self, home_id: str, room: str, device_type: str) -> Device | None:
+        return self.home(home_id).devices.get((room, device_type))
+
+    def add_device(self, home_id: str, room: str, device_type: str) -> Device:
+        """Register a device, adding its room to the home if needed."""
+        home = self.home(home_id)
+        if room not in home.rooms:
+            home.rooms.append(room)
+        device = home.devices.get((room, device_type))
+        if device is None:
+            device = home.devices[(room, device_type)] = Device(room, device_type)
+        return device
+
+    async def set_status(self, home_id: str, room: str, device_type: str, status: str) -> tuple[str, Device]:
+        """Set a device's status under the home lock and return its previous status.
+
+        Raises KeyError if the home has no such device and ValueError for an
+        unknown status.
+        """
+        if status not in STATUSES:
+            raise ValueError(f"Invalid status: {status}. Expected one of {STATUSES}.")
+        home = self.home(home_id)
+        async with home.lock:
+            device = home.devices[(room, device_type)]
+            previous = device.status
+            if previous != status:
+                device.status = status
+                device.changed_at = time.time()
+            return previous, device
+
+    async def apply(self, home_id: str, changes) -> tuple[bool, list[dict]]:
+        """Apply (room, device type, status) changes to a home all at once.
+
+        "*" as the room or device type expands to every matching device. The
+        changes are checked first and applied under one hold of the home
+        lock, so either all of them take effect or, if any is invalid, none
+        do. Returns whether they were applied and a result per device.
+        """
+        home = self.home(home_id)
+        async with home.lock:
+            targets, results = [], []
+            for room, device_type, status in changes:
+                matched = [
+                    device for device in home.devices.values()
+                    if room in (ANY, device.room) and device_type in (ANY, device.device_type)
+                ]
+                error = None
+                if status not in STATUSES:
+                    error = f"Invalid status: {status}. Expected one of {STATUSES}."
+                elif not matched:
+                    error = f"No {device_type} in {room}. Available rooms are {home.rooms}."
+                if error:
+                    results.append({"room": room, "device": device_type, "status": status, "result": error})
+                else:
+                    targets.extend((device, status) for device in matched)
+
+            if results:
+                return False, results
+            # A later change to the same device wins, as if applied in order.
+            final = {id(device): (device, status) for device, status in targets}
+            now = time.time()
+            for device, status in final.values():
+                result = "unchanged" if device.status == status else "changed"
+                if result == "changed":
+                    device.status = status
+                    device.changed_at = now
+                results.append({
+                    "room": device.room, "device": device.device_type, "status": status, "result": result,
+                })
+            return True, results
+
+    def snapshot(self, home_id: str) -> list[dict]:
+        """The state of every device in a home."""
+        return [device.to_dict() for device in self.home(home_id).devices.values()]
@@ -1,82 +1,123 @@
+from datetime import datetime
+from typing_extensions import TypedDict
+
+from langgraph.config import get_config
+
+from settings.config import Config
+from tools.device_registry import SCENES, DeviceRegistry
+from tools.forecasting import forecast_usage
+from tools.history_archive import HistoryArchive
+from tools.home_histories import HomeHistories, HomeHistory
+from tools.usage_analytics import summarize_usage
+
+
+# Example history of the default home, used when no history archive is configured.
+SAMPLE_HISTORY = [
+    {
+        "device": "LIGHT",
+        "room": "living_room",
+        "status": "ON",
+        "time": "2025-06-21T18:00:00",
+        "note": "Turned on as it got dark"
+    },
+    {
+        "device": "LIGHT",
+        "room": "living_room",
+        "status": "OFF",
+        "time": "2025-06-21T23:00:00",
+        "note": "User went to bed"
+    },
+    {
+        "device": "AIR_CONDITIONER",
+        "room": "bedroom",
+        "status": "ON",
+        "time": "2025-06-21T22:30:00",
+        "note": "Turned on before sleep"
+    },
+    {
+        "device": "AIR_CONDITIONER",
+        "room": "bedroom",
+        "status": "OFF",
+        "time": "2025-06-22T06:30:00",
+        "note": "Turned off after waking up"
+    },
+    {
+        "device": "LIGHT",
+        "room": "kitchen",
+        "status": "ON",
+        "time": "2025-06-22T06:45:00",
+        "note": "Turned on during breakfast"
+    },
+    {
+        "device": "LIGHT",
+        "room": "kitchen",
+        "status": "OFF",
+        "time": "2025-06-22T07:30:00",
+        "note": "Turned off after leaving the kitchen"
+    },
+    {
+        "device": "LIGHT",
+        "room": "living_room",
+        "status": "ON",
+        "time": "2025-06-22T18:10:00",
+        "note": "Turned on at sunset"
+    },
+    {
+        "device": "LIGHT",
+        "room": "living_room",
+        "status": "OFF",
+        "time": "2025-06-22T23:15:00",
+        "note": "Turned off before sleep"
+    },
+    {
+        "device": "AIR_CONDITIONER",
+        "room": "bedroom",
+        "status": "ON",
+        "time": "2025-06-22T22:20:00",
+        "note": "Scheduled cooling before sleep"
+    },
+    {
+        "device": "AIR_CONDITIONER",
+        "room": "bedroom",
+        "status": "OFF",
+        "time": "2025-06-23T06:40:00",
+        "note": "Auto-off after scheduled sleep period"
+    }
+]
+
+
+class DeviceChange(TypedDict):
+    room: str  # a room name, or "*" for every room
+    device: str  # 'LIGHT', 'AIR_CONDITIONER', or "*" for every device type
+    status: str  # 'ON' or 'OFF'
+
+
 class EnergyTools:
-    LIGHT = {    }
-    AIR_CONDITIONER = {    }
-    ROOM = ["living_room", "bedroom", "kitchen"]
-    HISTORICAL_DATA = [
-        {
-            "device": "LIGHT",
-            "room": "living_room",
-            "status": "ON",
-            "time": "2025-06-21T18:00:00",
-            "note": "Turned on as it got dark"
-        },
-        {
-            "device": "LIGHT",
-            "room": "living_room",
-            "status": "OFF",
-            "time": "2025-06-21T23:00:00",
-            "note": "User went to bed"
-        },
-        {
-            "device": "AIR_CONDITIONER",
-            "room": "bedroom",
-            "status": "ON",
-            "time": "2025-06-21T22:30:00",
-            "note": "Turned on before sleep"
-        },
-        {
-            "device": "AIR_CONDITIONER",
-            "room": "bedroom",
-            "status": "OFF",
-            "time": "2025-06-22T06:30:00",
-            "note": "Turned off after waking up"
-        },
-        {
-            "device": "LIGHT",
-            "room": "kitchen",
-            "status": "ON",
-            "time": "2025-06-22T06:45:00",
-            "note": "Turned on during breakfast"
-        },
-        {
-            "device": "LIGHT",
-            "room": "kitchen",
-            "status": "OFF",
-            "time": "2025-06-22T07:30:00",
-            "note": "Turned off after leaving the kitchen"
-        },
-        {
-            "device": "LIGHT",
-            "room": "living_room",
-            "status": "ON",
-            "time": "2025-06-22T18:10:00",
-            "note": "Turned on at sunset"
-        },
-        {
-            "device": "LIGHT",
-            "room": "living_room",
-            "status": "OFF",
-            "time": "2025-06-22T23:15:00",
-            "note": "Turned off before sleep"
-        },
-        {
-            "device": "AIR_CONDITIONER",
-            "room": "bedroom",
-            "status": "ON",
-            "time": "2025-06-22T22:20:00",
-            "note": "Scheduled cooling before sleep"
-        },
-        {
-            "device": "AIR_CONDITIONER",
-            "room": "bedroom",
-            "status": "OFF",
-            "time": "2025-06-23T06:40:00",
-            "note": "Auto-off after scheduled sleep period"
-        }
-    ]
+    DEVICES = DeviceRegistry()
+    ARCHIVE = HistoryArchive() if Config.ARCHIVE.directory else None
+    # The default home is pinned: local event sources append to its store.
+    HISTORIES = HomeHistories(ARCHIVE, pinned=frozenset({Config.HOMES.default_home_id}))
+    if ARCHIVE is None:
+        HISTORIES.get(Config.HOMES.default_home_id).store.extend(SAMPLE_HISTORY)
+
+    @classmethod
+    def history(cls, home_id: str | None = None) -> HomeHistory:
+        """The history of home_id, by default of the home the running graph controls."""
+        return cls.HISTORIES.get(home_id or current_home_id())
+
+    @classmethod
+    async def load_home(cls, home_id: str | None = None) -> HomeHistory:
+        """Load a home's history off the event loop, before a graph run uses it."""
+        return await cls.HISTORIES.load(home_id or Config.HOMES.default_home_id)
+
+    @classmethod
+    def discard_home(cls, home_id: str):
+        """Forget a home's devices and history."""
+        cls.DEVICES.discard(home_id)
+        cls.HISTORIES.discard(home_id)
 
     @classmethod
-    def change_light_status(cls, room: str, status: str) -> str:
+    async def change_light_status(cls, room: str, status: str) -> str:
         """
         Change the status of the light in a specified room.
         Args:
@@ -86,16 +127,10 @@ class EnergyTools:
             str: A message indicating the result of the operation.
         """
 
-        if room not in cls.ROOM:
-            return f"Invalid room: {room}. Available rooms are {cls.ROOM}."
-        current_status = cls.LIGHT.get(room, "OFF")
-        if current_status == status:
-            return f"Light in {room} is already {status}."
-        cls.LIGHT[room] = status
-        return f"Light in {room} is now {status}."
+        return await cls._change_status("LIGHT", "Light", room, status)
 
     @classmethod
-    def change_air_conditioner_status(cls, room: str, status: str) -> str:
+    async def change_air_conditioner_status(cls, room: str, status: str) -> str:
         """ 
         Change the status of the air conditioner in a specified room.
         Args:
@@ -105,22 +140,154 @@ class EnergyTools:
             str: A message indicating the result of the operation.
         """
 
-        if room not in cls.ROOM:
-            return f"Invalid room: {room}. Available rooms are {cls.ROOM}."
-        current_status = cls.AIR_CONDITIONER.get(room, "OFF")
-        if current_status == status:
-            return f"Air conditioner in {room} is already {status}."
-        cls.AIR_CONDITIONER[room] = status
-        return f"Air conditioner in {room} is now {status}."
+        return await cls._change_status("AIR_CONDITIONER", "Air conditioner", room, status)
+
+    @classmethod
+    async def apply_device_changes(
+        cls,
+        changes: list[DeviceChange] | None = None,
+        scene: str | None = None,
+    ) -> dict:
+        """
+        Change several devices in one call, e.g. "turn off everything" or
+        "lights off in the kitchen and living room". Either all changes are
+        applied or, if any is invalid, none are.
+        Args:
+            changes (list): Device changes, each with a room, device and status;
+                use "*" as the room or device to match all of them.
+            scene (str): Optional named scene applied before the changes, one of
+                'all_off', 'away', 'good_night', 'good_morning' or 'evening'.
+        Returns:
+            dict: Whether the changes were applied and the result for each device.
+        """
+
+        planned = []
+        if scene is not None:
+            if scene not in SCENES:
+                return {"applied": False, "error": f"Unknown scene: {scene}. Available scenes are {list(SCENES)}."}
+            planned.extend(SCENES[scene])
+        planned.extend((change["room"], change["device"], change["status"]) for change in changes or ())
+        if not planned:
+            return {"applied": False, "error": "No changes or scene given."}
+        home_id = current_home_id()
+        applied, results = await cls.DEVICES.apply(home_id, planned)
+        if applied:
+            cls._record(home_id, [
+                (result["room"], result["device"], result["status"])
+                for result in results if result["result"] == "changed"
+            ])
+        return {"applied": applied, "results": results}
+
+    @classmethod
+    async def _change_status(cls, device_type: str, label: str, room: str, status: str) -> str:
+        home_id = current_home_id()
+        rooms = cls.DEVICES.home(home_id).rooms
+        if room not in rooms:
+            return f"Invalid room: {room}. Available rooms are {rooms}."
+        try:
+            previous, _ = await cls.DEVICES.set_status(home_id, room, device_type, status)
+        except KeyError:
+            return f"There is no {label.lower()} in {room}."
+        except ValueError as e:
+            return str(e)
+        if previous == status:
+            return f"{label} in {room} is already {status}."
+        cls._record(home_id, [(room, device_type, status)])
+        return f"{label} in {room} is now {status}."
+
+    @classmethod
+    def forecast_energy_usage(cls) -> dict:
+        """
+        Forecast energy use for the next day and the next week, per device and
+        room, from the usual usage at each hour of the week.
+        Returns:
+            dict: Forecast kWh for the next day and week, in total and per device and room.
+        """
+
+        home_id = current_home_id()
+        history = cls.history(home_id)
+        return forecast_usage({home_id: history.store}, rollups={home_id: history.rollups}).get(home_id, {})
+
+    @classmethod
+    def get_device_alerts(cls, limit: int = 10) -> list:
+        """
+        Get recent alerts about unusual device usage: an air conditioner left
+        running in an empty room, a light on past its usual off time, or an
+        hour of usage far above normal.
+        Args:
+            limit (int): The maximum number of alerts to return, newest first.
+        Returns:
+            list: Alerts with the rule, device, room, time and a message.
+        """
+
+        rules = cls.history().rules
+        rules.tick()
+        return rules.recent_alerts(limit)
+
+    @classmethod
+    def _record(cls, home_id: str, changes: list[tuple[str, str, str]]):
+        store = cls.history(home_id).store
+        now = datetime.now()
+        for room, device_type, status in changes:
+            store.append(now, device_type, room, status, "Changed by HomeBot")
     
     @classmethod
-    def get_historical_data(cls) -> list:
+    def get_historical_data(
+        cls,
+        start: str | None = None,
+        end: str | None = None,
+        device: str | None = None,
+        room: str | None = None,
+    ) -> list:
         """
         Retrieve historical data of device usage.
+        Args:
+            start (str): Optional ISO time; only events at or after it are returned.
+            end (str): Optional ISO time; only events before it are returned.
+            device (str): Optional device type, e.g. 'LIGHT' or 'AIR_CONDITIONER'.
+            room (str): Optional room name.
         Returns:
             list: A list of dictionaries containing historical data of device usage.
         """
-        
-        return cls.HISTORICAL_DATA
+
+        return cls.history().store.records(start, end, device, room)
+
+    @classmethod
+    def summarize_energy_usage(cls, start: str | None = None, end: str | None = None) -> dict:
+        """
+        Summarize device usage: on-hours and estimated kWh per device and room,
+        on-hours by hour of the day, and how often devices were on together.
+        Args:
+            start (str): Optional ISO time; the summary covers events at or after it.
+            end (str): Optional ISO time; the summary covers events before it.
+        Returns:
+            dict: The usage summary.
+        """
+
+        history = cls.history()
+        return summarize_usage(history.store, start, end, history.rollups)
+
+    @classmethod
+    def recent_energy_usage(cls, days: int = 7) -> dict:
+        """
+        Report on-hours and estimated kWh per device and room over the last days,
+        e.g. to answer "how did I do this week". Cheaper than a full summary.
+        Args:
+            days (int): How many days back from the latest event to cover.
+        Returns:
+            dict: The usage over the period and the hourly on-time profile.
+        """
+
+        aggregates = cls.history().aggregates
+        usage = aggregates.summary(days)
+        usage["on_hours_by_hour_of_day"] = aggregates.hourly_profile()
+        return usage
 
 
+def current_home_id() -> str:
+    """The home controlled by the running graph, from its `home_id` config."""
+    try:
+        home_id = get_config()["configurable"].get("home_id")
+    except RuntimeError:
+        home_id = None
+    return home_id or Config.HOMES.default_home_id
@@ -0,0 +1,165 @@
+from typing import Mapping
+
+import numpy as np
+
+from settings.config import Config
+from tools.history_store import DeviceHistoryStore, to_isoformat, to_timestamp
+from tools.usage_analytics import (
+    DEFAULT_POWER_KW,
+    DEVICE_POWER_KW,
+    add_rollups,
+    energy_intervals,
+    usage_intervals,
+)
+
+_HOUR = 3600
+_WEEK_HOURS = 7 * 24
+
+
+def hourly_kwh(
+    start: np.ndarray,
+    stop: np.ndarray,
+    row: np.ndarray,
+    window_start: np.ndarray,
+    power_kw: np.ndarray,
+    shape: tuple[int, int],
+) -> np.ndarray:
+    """Spread on-intervals into an hourly kWh matrix.
+
+    Interval i belongs to matrix row `row[i]`, whose first column is the
+    hour starting at `window_start[i]` (a multiple of 3600). Each interval is
+    split into the hours it covers and the pieces are summed with one
+    bincount, so the cost is linear in the total number of on-hours.
+    """
+    first = start // _HOUR
+    last = (stop - 1) // _HOUR
+    pieces = last - first + 1
+    # For each hour piece: its interval and its offset from the interval's first hour.
+    interval = np.repeat(np.arange(len(start)), pieces)
+    offset = np.arange(len(interval)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    hour = first[interval] + offset
+    seconds = np.minimum(stop[interval], (hour + 1) * _HOUR) - np.maximum(start[interval], hour * _HOUR)
+    column = hour - window_start[interval] // _HOUR
+    index = row[interval] * shape[1] + column
+    kwh = seconds / _HOUR * power_kw[interval]
+    return np.bincount(index, weights=kwh, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+def seasonal_forecast(
+    history: np.ndarray,
+    observed_from: np.ndarray,
+    horizon: int,
+    alpha: float = Config.FORECAST.alpha,
+) -> np.ndarray:
+    """Forecast each row of an hourly series from its hour-of-week profile.
+
+    `history` is (rows, weeks * 168) ending at the forecast origin, and
+    columns before `observed_from[row]` predate that row's data. The
+    profile for each hour of the week is an exponentially smoothed average
+    over weeks, weighting week k back by (1 - alpha) ** k. Hours of the
+    week never observed, e.g. with under a week of history, fall back to
+    the mean for the same hour of the day.
+    """
+    rows, hours = history.shape
+    weeks = hours // _WEEK_HOURS
+    observed = np.arange(hours)[None, :] >= observed_from[:, None]
+    values = np.where(observed, history, 0.0).reshape(rows, weeks, _WEEK_HOURS)
+    mask = observed.reshape(rows, weeks, _WEEK_HOURS)
+
+    decay = (1 - alpha) ** np.arange(weeks - 1, -1, -1)[None, :, None]
+    weight = (decay * mask).sum(axis=1)
+    weekly = (decay * values).sum(axis=1) / np.maximum(weight, 1e-12)
+
+    daily_values = values.reshape(rows, weeks * 7, 24).sum(axis=1)
+    daily_count = mask.reshape(rows, weeks * 7, 24).sum(axis=1)
+    daily = daily_values / np.maximum(daily_count, 1)
+    profile = np.where(weight > 0, weekly, np.tile(daily, 7))
+
+    # Column `hours + t` of the series is hour-of-week slot t % 168 of the profile.
+    return profile[:, np.arange(horizon) % _WEEK_HOURS]
+
+
+def forecast_usage(
+    stores: Mapping[str, DeviceHistoryStore],
+    weeks: int = Config.FORECAST.weeks,
+    origin=None,
+    rollups: Mapping[str, tuple[np.ndarray, list[str], list[str]] | None] | None = None,
+) -> dict[str, dict]:
+    """Next-day and next-week kWh forecasts per device and room for many homes at once.
+
+    Each home is forecast from the hour after its latest event, or from
+    `origin`, using its last `weeks` weeks of history, including any days
+    past retention found in its `rollups`. The histories of all homes are
+    stacked into one matrix and forecast in a single pass.
+    """
+    window = weeks * _WEEK_HOURS
+    keys, origins, observed_from = [], [], []
+    starts, stops, rows, window_starts, powers = [], [], [], [], []
+    for home_id, store in stores.items():
+        home_rollups = (rollups or {}).get(home_id)
+        times = store.query().time
+        if home_rollups is not None:
+            # A rolled-up hour spans from its start to the end of the hour.
+            hours = home_rollups[0]["time"].astype(np.int64)
+            times = np.concatenate([times, hours, hours + _HOUR])
+        if not len(times):
+            continue
+        home_origin = to_timestamp(origin) if origin is not None else int(times.max())
+        home_origin = -(-home_origin // _HOUR) * _HOUR
+        window_start = home_origin - window * _HOUR
+        intervals = energy_intervals(
+            usage_intervals(store.query(window_start, home_origin), until=home_origin), store.devices,
+        )
+        intervals, _, devices, rooms = add_rollups(
+            intervals, store.devices, store.rooms, home_rollups, window_start, home_origin,
+        )
+        # Hours before the home's first event are unknown, not zero usage.
+        first_hour = max(0, (int(times.min()) - window_start) // _HOUR)
+
+        row_offset = len(keys)
+        keys.extend((home_id, device, room) for device in devices for room in rooms)
+        origins.extend([home_origin] * (len(devices) * len(rooms)))
+        observed_from.extend([first_hour] * (len(devices) * len(rooms)))
+        starts.append(np.maximum(intervals.start, window_start))
+        stops.append(intervals.stop)
+        rows.append(row_offset + intervals.device.astype(np.int64) * len(rooms) + intervals.room)
+        window_starts.append(np.full(len(intervals.start), window_start, dtype=np.int64))
+        device_kw = np.array([DEVICE_POWER_KW.get(d, DEFAULT_POWER_KW) for d in devices])
+        powers.append(device_kw[intervals.device])
+
+    if not keys:
+        return {}
+    history = hourly_kwh(
+        np.concatenate(starts), np.concatenate(stops), np.concatenate(rows),
+        np.concatenate(window_starts), np.concatenate(powers), (len(keys), window),
+    )
+    forecast = seasonal_forecast(history, np.array(observed_from), _WEEK_HOURS)
+    next_day = forecast[:, :24].sum(axis=1)
+    next_week = forecast.sum(axis=1)
+
+    results: dict[str, dict] = {}
+    for (home_id, device, room), home_origin, day, week in zip(keys, origins, next_day, next_week):
+        home = results.setdefault(home_id, {
+            "from": to_isoformat(home_origin),
+            "next_day_kwh": 0.0,
+            "next_week_kwh": 0.0,
+            "devices": {},
+            "rooms": {},
+        })
+        home["next_day_kwh"] += day
+        home["next_week_kwh"] += week
+        for totals, name in ((home["devices"], device), (home["rooms"], room)):
+            entry = totals.setdefault(name, {"next_day_kwh": 0.0, "next_week_kwh": 0.0})
+            entry["next_day_kwh"] += day
+            entry["next_week_kwh"] += week
+
+    for home in results.values():
+        home["next_day_kwh"] = round(float(home["next_day_kwh"]), 2)
+        home["next_week_kwh"] = round(float(home["next_week_kwh"]), 2)
+        for totals in (home["devices"], home["rooms"]):
+            for name, entry in list(totals.items()):
+                if not entry["next_week_kwh"]:
+                    del totals[name]
+                    continue
+                totals[name] = {field: round(float(value), 2) for field, value in entry.items()}
+    return results
@@ -0,0 +1,263 @@
+import os
+import json
+import mmap
+import tempfile
+import functools
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from settings.config import Config
+from tools.history_store import DeviceHistoryStore, HistoryView, to_timestamp
+from tools.usage_analytics import usage_intervals
+
+_HOUR = 3600
+_DAY = 24 * _HOUR
+
+# One raw event: seconds since the previous event of the day (the first is
+# seconds since midnight), then dictionary codes for device, room and status.
+EVENT_DTYPE = np.dtype([("delta", "<u4"), ("device", "<u2"), ("room", "<u2"), ("status", "u1")])
+# Seconds a device was on during one hour of a day, and how often it was switched on.
+ROLLUP_DTYPE = np.dtype([("hour", "u1"), ("device", "<u2"), ("room", "<u2"), ("on_seconds", "<u2"), ("switched_on", "<u2")])
+
+
+def _day(timestamp: int) -> date:
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+
+def _day_start(day: date) -> int:
+    return (day - date(1970, 1, 1)).days * _DAY
+
+
+class HistoryArchive:
+    """Device history on disk: one file of raw events per home and day.
+
+    Each home directory holds `dictionary.json` with the device and room
+    names behind the codes, `days/YYYY-MM-DD.npy` with that day's events as
+    packed 9-byte records, and `rollups/YYYY-MM-DD.npy` with hourly on-time
+    for days past retention. Files are plain .npy arrays opened with
+    mmap_mode, so reading a range costs a few system calls per day and one
+    cumulative sum to undo the timestamp deltas, with no per-event parsing.
+    """
+
+    def __init__(self, directory: str = Config.ARCHIVE.directory):
+        self.directory = directory
+
+    def _home_dir(self, home_id: str, *parts: str) -> str:
+        return os.path.join(self.directory, home_id, *parts)
+
+    def _dictionary(self, home_id: str) -> dict[str, list[str]]:
+        path = self._home_dir(home_id, "dictionary.json")
+        if not os.path.exists(path):
+            return {"devices": [], "rooms": []}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def days(self, home_id: str, kind: str = "days") -> list[date]:
+        """The days stored for a home, oldest first; kind is 'days' or 'rollups'."""
+        directory = self._home_dir(home_id, kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(date.fromisoformat(name[:-4]) for name in os.listdir(directory) if name.endswith(".npy"))
+
+    def save(self, home_id: str, store: DeviceHistoryStore, start=None):
+        """Write the store's events from `start` on, replacing those days on disk.
+
+        Without `start`, the days from the last one archived on are
+        rewritten, so saving a store that only grew since it was loaded
+        leaves older days untouched. Days already rolled up by
+        `apply_retention` are never written as raw events again.
+        """
+        if start is None:
+            archived = self.days(home_id)
+            start = _day_start(archived[-1]) if archived else None
+        rolled_up = self.days(home_id, "rollups")
+        if rolled_up:
+            first_raw_day = _day_start(rolled_up[-1]) + _DAY
+            start = first_raw_day if start is None else max(to_timestamp(start), first_raw_day)
+        view = store.query(start)
+        if not len(view.time):
+            return
+
+        # Archive codes are append-only; translate the store's codes to them.
+        dictionary = self._dictionary(home_id)
+        codes = {}
+        for name, values in (("devices", store.devices), ("rooms", store.rooms)):
+            known = {value: code for code, value in enumerate(dictionary[name])}
+            for value in values:
+                if value not in known:
+                    known[value] = len(dictionary[name])
+                    dictionary[name].append(value)
+            codes[name] = np.array([known[value] for value in values], dtype=np.uint16)
+        os.makedirs(self._home_dir(home_id, "days"), exist_ok=True)
+        _write_json(self._home_dir(home_id, "dictionary.json"), dictionary)
+
+        day_index = view.time // _DAY
+        boundaries = np.flatnonzero(np.diff(day_index)) + 1
+        for chunk in np.split(np.arange(len(view.time)), boundaries):
+            time = view.time[chunk]
+            records = np.empty(len(chunk), dtype=EVENT_DTYPE)
+            records["delta"] = np.diff(time, prepend=time[0] // _DAY * _DAY)
+            records["device"] = codes["devices"][view.device[chunk]]
+            records["room"] = codes["rooms"][view.room[chunk]]
+            records["status"] = view.status[chunk]
+            _write_npy(self._home_dir(home_id, "days", f"{_day(int(time[0])).isoformat()}.npy"), records)
+
+    def query(self, home_id: str, start=None, end=None) -> tuple[HistoryView, list[str], list[str]]:
+        """Memory-map the raw events in [start, end) as columns, with the device and room names."""
+        dictionary = self._dictionary(home_id)
+        start = None if start is None else to_timestamp(start)
+        end = None if end is None else to_timestamp(end)
+        chunks, day_starts = [], []
+        for day in self.days(home_id):
+            day_start = _day_start(day)
+            if (start is not None and day_start + _DAY <= start) or (end is not None and day_start >= end):
+                continue
+            chunks.append(_map_npy(self._home_dir(home_id, "days", f"{day.isoformat()}.npy"), EVENT_DTYPE))
+            day_starts.append(day_start)
+
+        # Joining the raw bytes skips numpy's per-array structured dtype checks.
+        records = np.concatenate([np.empty(0, np.uint8)] + [chunk.view(np.uint8) for chunk in chunks]).view(EVENT_DTYPE)
+        lengths = np.array([len(chunk) for chunk in chunks], dtype=np.int64)
+        # Undo the per-day deltas with one cumulative sum, restarting at each day.
+        delta = records["delta"].astype(np.int64)
+        offsets = np.repeat(np.array(day_starts, dtype=np.int64), lengths)
+        running = np.r_[0, np.cumsum(delta)]
+        first_of_day = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        time = offsets + running[1:] - running[first_of_day]
+
+        keep = np.ones(len(time), dtype=bool)
+        if start is not None:
+            keep &= time >= start
+        if end is not None:
+            keep &= time < end
+        view = HistoryView(time[keep], records["device"][keep], records["room"][keep], records["status"][keep])
+        return view, dictionary["devices"], dictionary["rooms"]
+
+    def load(self, home_id: str, start=None, end=None) -> DeviceHistoryStore:
+        """A history store with the archived raw events in [start, end)."""
+        view, devices, rooms = self.query(home_id, start, end)
+        return DeviceHistoryStore.from_columns(*view, devices=devices, rooms=rooms)
+
+    def apply_retention(self, home_id: str, keep_days: int = Config.ARCHIVE.raw_retention_days, today=None):
+        """Replace raw events before the last `keep_days` days, today included, with hourly rollups.
+
+        A device still on at the cutoff is counted as on until the cutoff.
+        """
+        today = _day(to_timestamp(today if today is not None else datetime.now()))
+        cutoff = _day_start(today - timedelta(days=keep_days - 1))
+        expired = [day for day in self.days(home_id) if _day_start(day) < cutoff]
+        if not expired:
+            return
+
+        view, _, _ = self.query(home_id, end=cutoff)
+        rollups = _hourly_rollups(usage_intervals(view, until=cutoff))
+        os.makedirs(self._home_dir(home_id, "rollups"), exist_ok=True)
+        # Rollups are sorted by hour, so each day is a contiguous slice.
+        day_numbers = np.array([_day_start(day) // _DAY for day in expired])
+        lo = np.searchsorted(rollups["day"], day_numbers, side="left")
+        hi = np.searchsorted(rollups["day"], day_numbers, side="right")
+        for day, first, last in zip(expired, lo, hi):
+            day_hours = rollups[first:last]
+            records = np.empty(len(day_hours), dtype=ROLLUP_DTYPE)
+            for field in ROLLUP_DTYPE.names:
+                records[field] = day_hours[field]
+            _write_npy(self._home_dir(home_id, "rollups", f"{day.isoformat()}.npy"), records)
+            os.remove(self._home_dir(home_id, "days", f"{day.isoformat()}.npy"))
+
+    def rollups(self, home_id: str, start=None, end=None) -> tuple[np.ndarray, list[str], list[str]]:
+        """Hourly rollups for the days in [start, end), with the hour as an absolute timestamp."""
+        dictionary = self._dictionary(home_id)
+        start_day = None if start is None else _day(to_timestamp(start))
+        end_day = None if end is None else _day(to_timestamp(end))
+        parts = []
+        for day in self.days(home_id, "rollups"):
+            if (start_day is not None and day < start_day) or (end_day is not None and day >= end_day):
+                continue
+            records = _map_npy(self._home_dir(home_id, "rollups", f"{day.isoformat()}.npy"), ROLLUP_DTYPE)
+            part = np.empty(len(records), dtype=[("time", "<i8")] + ROLLUP_DTYPE.descr[1:])
+            part["time"] = _day_start(day) + records["hour"].astype(np.int64) * _HOUR
+            for field in ROLLUP_DTYPE.names[1:]:
+                part[field] = records[field]
+            parts.append(part)
+        dtype = [("time", "<i8")] + ROLLUP_DTYPE.descr[1:]
+        rollups = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        return rollups, dictionary["devices"], dictionary["rooms"]
+
+
+def _hourly_rollups(intervals) -> np.ndarray:
+    """On-seconds and switch-ons per (day, hour, device, room) as a structured array."""
+    first = intervals.start // _HOUR
+    pieces = (intervals.stop - 1) // _HOUR - first + 1
+    interval = np.repeat(np.arange(len(first)), pieces)
+    hour = first[interval] + np.arange(len(interval)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    seconds = (
+        np.minimum(intervals.stop[interval], (hour + 1) * _HOUR)
+        - np.maximum(intervals.start[interval], hour * _HOUR)
+    )
+    device = intervals.device[interval].astype(np.int64)
+    room = intervals.room[interval].astype(np.int64)
+    # Switch-ons are counted in the hour each interval starts.
+    starts = np.zeros(len(interval), dtype=np.int64)
+    starts[np.cumsum(pieces) - pieces] = 1
+
+    key = (hour << 32) | (device << 16) | room
+    unique, inverse = np.unique(key, return_inverse=True)
+    rollups = np.empty(len(unique), dtype=[
+        ("day", "<i8"), ("hour", "u1"), ("device", "<u2"), ("room", "<u2"),
+        ("on_seconds", "<u2"), ("switched_on", "<u2"),
+    ])
+    absolute_hour = unique >> 32
+    rollups["day"] = absolute_hour // 24
+    rollups["hour"] = absolute_hour % 24
+    rollups["device"] = (unique >> 16) & 0xFFFF
+    rollups["room"] = unique & 0xFFFF
+    rollups["on_seconds"] = np.bincount(inverse, weights=seconds, minlength=len(unique))
+    rollups["switched_on"] = np.bincount(inverse, weights=starts, minlength=len(unique))
+    return rollups
+
+
+def _map_npy(path: str, dtype: np.dtype) -> np.ndarray:
+    """Memory-map a one-dimensional .npy file written by `_write_npy`.
+
+    np.load(mmap_mode="r") parses each header with ast, which dominates
+    the cost of reading hundreds of small day files; our own files only
+    need the header's length and a check of its dtype.
+    """
+    with open(path, "rb") as file:
+        prefix = file.read(12)
+        if prefix[:6] != b"\x93NUMPY":
+            raise ValueError(f"{path} is not a .npy file")
+        if prefix[6] == 1:
+            header_length = 10 + int.from_bytes(prefix[8:10], "little")
+        else:
+            header_length = 12 + int.from_bytes(prefix[8:12], "little")
+        file.seek(0)
+        header = file.read(header_length).decode("latin1")
+        if _descr_header(dtype) not in header:
+            raise ValueError(f"{path} does not hold {dtype} records")
+        if os.fstat(file.fileno()).st_size == header_length:
+            return np.empty(0, dtype=dtype)
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=dtype, offset=header_length)
+
+
+@functools.lru_cache
+def _descr_header(dtype: np.dtype) -> str:
+    return f"'descr': {np.lib.format.dtype_to_descr(dtype)!r}, 'fortran_order': False"
+
+
+def _write_npy(path: str, array: np.ndarray):
+    # Write then rename, so readers never map a half-written file.
+    directory = os.path.dirname(path)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as file:
+        np.save(file, array)
+    os.replace(file.name, path)
+
+
+def _write_json(path: str, data: dict):
+    directory = os.path.dirname(path)
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(file.name, path)
@@ -0,0 +1,236 @@
+from datetime import datetime, timezone
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+STATUSES = ("OFF", "ON")
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def to_timestamp(value: datetime | str | int) -> int:
+    """Convert a datetime, ISO string or timestamp to integer seconds.
+
+    Naive times are wall-clock times in the home and are stored as if they
+    were UTC, so hours of the day survive the round trip unchanged.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def to_isoformat(timestamp: int) -> str:
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class HistoryView(NamedTuple):
+    """Column arrays for a selection of events, in time order."""
+    time: np.ndarray  # int64 seconds
+    device: np.ndarray  # codes into DeviceHistoryStore.devices
+    room: np.ndarray  # codes into DeviceHistoryStore.rooms
+    status: np.ndarray  # codes into STATUSES
+
+
+class _Dictionary:
+    """Bidirectional mapping between strings and small integer codes."""
+
+    def __init__(self):
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class DeviceHistoryStore:
+    """Columnar, time-ordered store of device status events.
+
+    Each event is a timestamp, a device, a room and an ON/OFF status kept in
+    parallel NumPy columns (13 bytes per event); device and room names are
+    dictionary-encoded. Appends in time order are amortized O(1) through
+    capacity doubling, and a time range is found by binary search, so a
+    query costs O(log n) plus the size of the matching slice.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._time = np.empty(capacity, dtype=np.int64)
+        self._device = np.empty(capacity, dtype=np.uint16)
+        self._room = np.empty(capacity, dtype=np.uint16)
+        self._status = np.empty(capacity, dtype=np.uint8)
+        self._size = 0
+        # Bumped on every change so derived results can be cached per version.
+        self.version = 0
+        self._devices = _Dictionary()
+        self._rooms = _Dictionary()
+        # Free-text notes are rare, so they are kept by row outside the columns.
+        self.notes: dict[int, str] = {}
+        self._subscribers: list[Callable[[int, str, str, str], None]] = []
+
+    @classmethod
+    def from_columns(
+        cls,
+        time: np.ndarray,
+        device: np.ndarray,
+        room: np.ndarray,
+        status: np.ndarray,
+        devices: list[str],
+        rooms: list[str],
+    ) -> "DeviceHistoryStore":
+        """Build a store from time-ordered column arrays and their dictionaries, without per-event work."""
+        self = cls(capacity=max(len(time), 16))
+        for column, values in zip(self._columns(), (time, device, room, status)):
+            column[:len(values)] = values
+        self._size = len(time)
+        for dictionary, values in ((self._devices, devices), (self._rooms, rooms)):
+            for value in values:
+                dictionary.encode(value)
+        return self
+
+    def copy(self) -> "DeviceHistoryStore":
+        """An independent copy of the events, e.g. for a reader on another thread."""
+        view = self.query()
+        copy = DeviceHistoryStore.from_columns(*view, devices=list(self.devices), rooms=list(self.rooms))
+        copy.notes = dict(self.notes)
+        copy.version = self.version
+        return copy
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def devices(self) -> list[str]:
+        return self._devices.values
+
+    @property
+    def rooms(self) -> list[str]:
+        return self._rooms.values
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns, including unused capacity."""
+        return sum(column.nbytes for column in self._columns())
+
+    def _columns(self):
+        return self._time, self._device, self._room, self._status
+
+    def append(
+        self,
+        time: datetime | str | int,
+        device: str,
+        room: str,
+        status: str,
+        note: str | None = None,
+    ) -> int:
+        """Add one event and return its row."""
+        if status not in _STATUS_CODES:
+            raise ValueError(f"Invalid status: {status}. Expected one of {STATUSES}.")
+        timestamp = to_timestamp(time)
+        if self._size == len(self._time):
+            self._grow()
+
+        row = self._size
+        if row and timestamp < self._time[row - 1]:
+            # Late events are rare; shift the newer ones to keep time order.
+            row = int(np.searchsorted(self._time[:self._size], timestamp, side="right"))
+            for column in self._columns():
+                column[row + 1:self._size + 1] = column[row:self._size]
+            self.notes = {r + (r >= row): n for r, n in self.notes.items()}
+
+        self._time[row] = timestamp
+        self._device[row] = self._devices.encode(device)
+        self._room[row] = self._rooms.encode(room)
+        self._status[row] = _STATUS_CODES[status]
+        if note:
+            self.notes[row] = note
+        self._size += 1
+        self.version += 1
+        for callback in self._subscribers:
+            callback(timestamp, device, room, status)
+        return row
+
+    def subscribe(self, callback: Callable[[int, str, str, str], None]):
+        """Call callback(timestamp, device, room, status) after every appended event."""
+        self._subscribers.append(callback)
+
+    def extend(self, records: Iterable[dict]):
+        """Add events given as dicts with time, device, room, status and optional note."""
+        for record in records:
+            self.append(
+                record["time"], record["device"], record["room"],
+                record["status"], record.get("note"),
+            )
+
+    def _grow(self):
+        capacity = max(2 * len(self._time), 16)
+        for name in ("_time", "_device", "_room", "_status"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _bounds(self, start, end) -> tuple[int, int]:
+        time = self._time[:self._size]
+        lo = 0 if start is None else int(np.searchsorted(time, to_timestamp(start), side="left"))
+        hi = self._size if end is None else int(np.searchsorted(time, to_timestamp(end), side="left"))
+        return lo, max(lo, hi)
+
+    def _rows(self, start=None, end=None, device=None, room=None) -> np.ndarray | slice:
+        lo, hi = self._bounds(start, end)
+        if device is None and room is None:
+            return slice(lo, hi)
+        mask = np.ones(hi - lo, dtype=bool)
+        for value, dictionary, column in (
+            (device, self._devices, self._device),
+            (room, self._rooms, self._room),
+        ):
+            if value is None:
+                continue
+            code = dictionary.codes.get(value)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            mask &= column[lo:hi] == code
+        return lo + np.flatnonzero(mask)
+
+    def query(
+        self,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+        device: str | None = None,
+        room: str | None = None,
+    ) -> HistoryView:
+        """Return the events in [start, end), optionally for one device type and room.
+
+        Without device or room filters the columns are views, not copies.
+        """
+        rows = self._rows(start, end, device, room)
+        return HistoryView(*(column[rows] for column in self._columns()))
+
+    def records(
+        self,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+        device: str | None = None,
+        room: str | None = None,
+    ) -> list[dict]:
+        """Return the matching events as dicts with ISO times."""
+        rows = self._rows(start, end, device, room)
+        rows = range(rows.start, rows.stop) if isinstance(rows, slice) else rows.tolist()
+        records = []
+        for row in rows:
+            record = {
+                "device": self._devices.values[self._device[row]],
+                "room": self._rooms.values[self._room[row]],
+                "status": STATUSES[self._status[row]],
+                "time": to_isoformat(self._time[row]),
+            }
+            if row in self.notes:
+                record["note"] = self.notes[row]
+            records.append(record)
+        return records
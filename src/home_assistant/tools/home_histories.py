@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+from collections import OrderedDict
+
+from settings.config import Config
+from tools.history_archive import HistoryArchive
+from tools.history_store import DeviceHistoryStore
+from tools.rolling_aggregates import RollingAggregates
+from tools.rule_engine import RuleEngine
+
+logger = logging.getLogger(__name__)
+
+# Homes whose IDs start with this live only as long as one session and are never archived.
+PRIVATE_HOME_PREFIX = "session:"
+
+
+class HomeHistory:
+    """One home's event history with the aggregates and rules that follow it.
+
+    `rollups` holds the archived hourly usage of days past retention, as
+    returned by `HistoryArchive.rollups`, for homes loaded from an archive.
+    """
+    __slots__ = ("store", "aggregates", "rules", "rollups")
+
+    def __init__(self, store: DeviceHistoryStore, rollups=None):
+        self.store = store
+        self.rollups = rollups
+        self.aggregates = RollingAggregates.attach(store)
+        self.rules = RuleEngine.attach(store)
+
+
+class HomeHistories:
+    """Event histories for many homes in one process, beside DeviceRegistry.
+
+    A home's history is created the first time it is used: loaded from the
+    archive, after rolling up its days past retention, when one is
+    configured, and empty otherwise. Usage tools read only the history of
+    the home they act on, so households never see each other's data.
+
+    With an archive, at most `max_homes` named homes stay in memory; the
+    least recently used one is saved and dropped to make room for another,
+    except for the `pinned` homes. `load` reads a home off the event loop
+    and should be awaited before its tools run; `get` loads synchronously.
+    """
+
+    def __init__(
+        self,
+        archive: HistoryArchive | None = None,
+        max_homes: int = Config.HOMES.max_loaded_homes,
+        pinned: frozenset[str] = frozenset(),
+    ):
+        self.archive = archive
+        self.max_homes = max_homes
+        self.pinned = pinned
+        self._homes: OrderedDict[str, HomeHistory] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._homes)
+
+    def __contains__(self, home_id: str) -> bool:
+        return home_id in self._homes
+
+    def get(self, home_id: str) -> HomeHistory:
+        history = self._homes.get(home_id)
+        if history is None:
+            history = self._read(home_id)
+            self._homes[home_id] = history
+            for evicted_id, evicted in self._evict():
+                self.archive.save(evicted_id, evicted.store)
+        self._homes.move_to_end(home_id)
+        return history
+
+    async def load(self, home_id: str) -> HomeHistory:
+        """The history of home_id, read from the archive in a worker thread if needed."""
+        if home_id not in self._homes:
+            future = self._loading.get(home_id)
+            if future is None:
+                future = asyncio.ensure_future(asyncio.to_thread(self._read, home_id))
+                self._loading[home_id] = future
+                future.add_done_callback(lambda done: self._loading.pop(home_id, None))
+            history = await asyncio.shield(future)
+            # A synchronous get() may have loaded the home in the meantime.
+            self._homes.setdefault(home_id, history)
+            for evicted_id, evicted in self._evict():
+                await asyncio.to_thread(self.archive.save, evicted_id, evicted.store)
+        return self.get(home_id)
+
+    def _read(self, home_id: str) -> HomeHistory:
+        store, rollups = DeviceHistoryStore(), None
+        if self.archive is not None and not home_id.startswith(PRIVATE_HOME_PREFIX):
+            self.archive.apply_retention(home_id)
+            store = self.archive.load(home_id)
+            rollups = self.archive.rollups(home_id)
+        return HomeHistory(store, rollups)
+
+    def _evict(self) -> list[tuple[str, HomeHistory]]:
+        """Drop the least recently used named homes beyond max_homes, returning them for saving."""
+        if self.archive is None:
+            return []
+        named = [
+            home_id for home_id in self._homes
+            if not home_id.startswith(PRIVATE_HOME_PREFIX) and home_id not in self.pinned
+        ]
+        evicted = []
+        for home_id in named[:max(0, len(named) - self.max_homes)]:
+            evicted.append((home_id, self._homes.pop(home_id)))
+            logger.info("Unloaded home %s", home_id)
+        return evicted
+
+    def discard(self, home_id: str):
+        """Forget a home's history, e.g. one that only lived for a finished session."""
+        self._homes.pop(home_id, None)
+
+    def tick(self, now=None):
+        """Evaluate every home's time-based rules."""
+        for history in self._homes.values():
+            history.rules.tick(now)
+
+    async def run_rules(self, interval: float = Config.RULES.tick_interval):
+        """Tick every home's rules every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Rule evaluation failed")
+
+    def save(self):
+        """Archive the history of every home that outlives its sessions."""
+        if self.archive is None:
+            return
+        for home_id, history in self._homes.items():
+            if not home_id.startswith(PRIVATE_HOME_PREFIX):
+                self.archive.save(home_id, history.store)
@@ -0,0 +1,208 @@
+import os
+import json
+import asyncio
+import logging
+
+from collections import deque
+
+from settings.config import Config
+from tools.history_store import STATUSES, DeviceHistoryStore, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+def validate_event(event: dict) -> tuple[int, str, str, str, str | None]:
+    """Check a raw event and return it as (timestamp, device, room, status, note).
+
+    Raises ValueError if a field is missing or malformed.
+    """
+    if not isinstance(event, dict):
+        raise ValueError(f"Event must be an object, got {type(event).__name__}")
+    event_id = event.get("id")
+    if event_id is not None and (not isinstance(event_id, (str, int)) or isinstance(event_id, bool)):
+        raise ValueError(f"Event id must be a string or an integer, got {type(event_id).__name__}")
+    for field in ("device", "room"):
+        if not isinstance(event.get(field), str) or not event[field]:
+            raise ValueError(f"Event needs a non-empty string {field!r}")
+    status = event.get("status")
+    if status not in STATUSES:
+        raise ValueError(f"Invalid status: {status}. Expected one of {STATUSES}.")
+    try:
+        timestamp = to_timestamp(event["time"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid time: {event.get('time')!r}") from None
+    note = event.get("note")
+    return timestamp, event["device"], event["room"], status, note if isinstance(note, str) else None
+
+
+class _RecentKeys:
+    """Set of the last `size` keys seen, for duplicate detection in bounded memory."""
+
+    def __init__(self, size: int):
+        self._order: deque = deque()
+        self._keys: set = set()
+        self._size = size
+
+    def add(self, key) -> bool:
+        """Remember key; return False if it was already among the recent keys."""
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._order.append(key)
+        if len(self._order) > self._size:
+            self._keys.discard(self._order.popleft())
+        return True
+
+
+class EventIngestor:
+    """Streams device events from local sources into a history store.
+
+    Sources feed a bounded asyncio queue: `put` waits while it is full, so a
+    source that outruns the store is slowed down instead of buffering
+    without limit. The consumer drains the queue in micro-batches of up to
+    `batch_size` events or `batch_interval` seconds, drops malformed events
+    and events already seen (by `id` if present, otherwise by content),
+    and appends the rest in time order. Aggregates subscribed to the store
+    are updated as each event lands.
+    """
+
+    def __init__(
+        self,
+        store: DeviceHistoryStore,
+        queue_size: int = Config.INGEST.queue_size,
+        batch_size: int = Config.INGEST.batch_size,
+        batch_interval: float = Config.INGEST.batch_interval,
+        dedup_window: int = Config.INGEST.dedup_window,
+    ):
+        self.store = store
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._recent = _RecentKeys(dedup_window)
+        self.stats = {"accepted": 0, "duplicates": 0, "invalid": 0, "batches": 0}
+        self._tasks: list[asyncio.Task] = []
+
+    async def put(self, event: dict):
+        """Queue one event, waiting while the queue is full."""
+        await self.queue.put(event)
+
+    def start(self):
+        """Run the consumer in the background."""
+        self._tasks.append(asyncio.create_task(self.run()))
+
+    def add_source(self, source):
+        """Run a source coroutine, e.g. `tail_jsonl(...)`, for the ingestor's lifetime."""
+        self._tasks.append(asyncio.create_task(source))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        # Events already accepted by put() are not lost on shutdown.
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            self.ingest(batch)
+
+    async def run(self):
+        """Consume the queue in micro-batches until cancelled.
+
+        A batch being collected when the consumer is cancelled is still
+        ingested, and a batch that fails is logged without stopping the
+        consumer, so sources never block on a queue nobody drains.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                deadline = loop.time() + self.batch_interval
+                while len(batch) < self.batch_size:
+                    if self.queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        batch.append(self.queue.get_nowait())
+            finally:
+                try:
+                    self.ingest(batch)
+                except Exception:
+                    logger.exception("Failed to ingest a batch of %d events", len(batch))
+
+    def ingest(self, events: list[dict]) -> int:
+        """Validate, deduplicate and append a batch of events; return how many were added."""
+        rows = []
+        for event in events:
+            try:
+                row = validate_event(event)
+            except ValueError as e:
+                self.stats["invalid"] += 1
+                logger.debug("Dropping invalid event %r: %s", event, e)
+                continue
+            key = event.get("id") or row[:4]
+            if not self._recent.add(key):
+                self.stats["duplicates"] += 1
+                continue
+            rows.append(row)
+
+        rows.sort(key=lambda row: row[0])
+        for timestamp, device, room, status, note in rows:
+            self.store.append(timestamp, device, room, status, note)
+        self.stats["accepted"] += len(rows)
+        self.stats["batches"] += 1
+        return len(rows)
+
+    async def tail_jsonl(self, path: str, from_start: bool = True, poll_interval: float = Config.INGEST.poll_interval):
+        """Follow a JSONL file like `tail -f`, queueing each complete line as an event."""
+        with open(path, "r", encoding="utf-8") as file:
+            if not from_start:
+                file.seek(0, os.SEEK_END)
+            partial = ""
+            while True:
+                line = file.readline()
+                if not line:
+                    await asyncio.sleep(poll_interval)
+                    continue
+                if not line.endswith("\n"):
+                    # The writer has not finished this line yet.
+                    partial += line
+                    continue
+                await self._put_line(partial + line)
+                partial = ""
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        """Accept JSONL event streams on a Unix socket.
+
+        A client whose events cannot be queued is not read from until they
+        can, so backpressure reaches it through the socket buffers.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                async for line in reader:
+                    await self._put_line(line.decode("utf-8", errors="replace"))
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(handle, path=path)
+        self._tasks.append(asyncio.create_task(server.serve_forever()))
+        return server
+
+    async def _put_line(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            self.stats["invalid"] += 1
+            return
+        await self.put(event)
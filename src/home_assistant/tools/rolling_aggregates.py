@@ -0,0 +1,211 @@
+import numpy as np
+
+from tools.history_store import STATUSES, DeviceHistoryStore, to_isoformat, to_timestamp
+from tools.usage_analytics import DEFAULT_POWER_KW, DEVICE_POWER_KW, NON_ENERGY_DEVICES, hour_of_day_seconds
+
+_DAY = 24 * 3600
+_ON = STATUSES.index("ON")
+CHECKPOINT_FORMAT = 1
+
+
+class RollingAggregates:
+    """Usage aggregates kept up to date one event at a time.
+
+    For every device and room this keeps the last state, the on-time per
+    day and an hour-of-day histogram of on-time. An event only touches its
+    own device and room, and the days and hours its interval covers, so
+    questions about recent usage are answered from the aggregates instead
+    of rescanning the history.
+
+    Events older than the last one seen for the same device and room cannot
+    be folded in incrementally; they are counted in `late_events` and left
+    to the full analysis.
+    """
+
+    def __init__(self):
+        self.last_state: dict[tuple[str, str], tuple[str, int]] = {}
+        self.daily: dict[tuple[str, str], dict[int, int]] = {}
+        self.hourly: dict[tuple[str, str], np.ndarray] = {}
+        self.watermark: int | None = None
+        self.late_events = 0
+
+    @classmethod
+    def attach(cls, store: DeviceHistoryStore) -> "RollingAggregates":
+        """Aggregates over store's existing events that follow every new one."""
+        self = cls()
+        self.catch_up(store)
+        store.subscribe(self.add)
+        return self
+
+    def catch_up(self, store: DeviceHistoryStore):
+        """Fold in the store's events newer than the last one seen, e.g. after restore.
+
+        The events are folded in column-wise, one device and room at a time,
+        with the same result as adding them one by one.
+        """
+        start = None if self.watermark is None else self.watermark + 1
+        view = store.query(start=start)
+        if len(view.time) == 0:
+            return
+        devices, rooms = store.devices, store.rooms
+        energy = np.array([name not in NON_ENERGY_DEVICES for name in devices], dtype=bool)
+
+        group = view.device.astype(np.int64) << 16 | view.room
+        # lexsort is stable, so events at the same time keep their order.
+        order = np.lexsort((view.time, group))
+        order = order[energy[view.device[order]]]
+        if len(order) == 0:
+            return
+        group, time, status = group[order], view.time[order], view.status[order]
+
+        bounds = np.flatnonzero(np.r_[True, group[1:] != group[:-1], True])
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            key = (devices[group[lo] >> 16], rooms[group[lo] & 0xFFFF])
+            times, statuses = time[lo:hi], status[lo:hi]
+            last = self.last_state.get(key)
+            if last is not None:
+                late = int(np.searchsorted(times, last[1], side="left"))
+                self.late_events += late
+                times, statuses = times[late:], statuses[late:]
+                if len(times) == 0:
+                    continue
+            latest = int(times[-1])
+            self.watermark = latest if self.watermark is None else max(self.watermark, latest)
+            if last is not None:
+                times = np.r_[last[1], times]
+                statuses = np.r_[STATUSES.index(last[0]), statuses]
+
+            changed = np.r_[True, statuses[1:] != statuses[:-1]]
+            times, statuses = times[changed], statuses[changed]
+            self.last_state[key] = (STATUSES[statuses[-1]], int(times[-1]))
+            # Without repeats every ON but the last is followed by an OFF.
+            on = np.flatnonzero(statuses[:-1] == _ON)
+            self._add_intervals(key, times[on], times[on + 1])
+
+    def add(self, time, device: str, room: str, status: str):
+        if device in NON_ENERGY_DEVICES:
+            return
+        time = to_timestamp(time)
+        key = (device, room)
+        last = self.last_state.get(key)
+        if last is not None and time < last[1]:
+            self.late_events += 1
+            return
+        self.watermark = time if self.watermark is None else max(self.watermark, time)
+        if last is not None and last[0] == status:
+            return
+        self.last_state[key] = (status, time)
+        if status == "OFF" and last is not None:
+            self._add_intervals(key, np.array([last[1]]), np.array([time]))
+
+    def _add_intervals(self, key: tuple[str, str], start: np.ndarray, stop: np.ndarray):
+        keep = stop > start
+        start, stop = start[keep], stop[keep]
+        if len(start) == 0:
+            return
+        # One row per day each interval touches.
+        first_day = start // _DAY
+        spans = (stop - 1) // _DAY - first_day + 1
+        offset = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        day = np.repeat(first_day, spans) + offset
+        seconds = (
+            np.minimum(np.repeat(stop, spans), (day + 1) * _DAY)
+            - np.maximum(np.repeat(start, spans), day * _DAY)
+        )
+        days, index = np.unique(day, return_inverse=True)
+        totals = np.zeros(len(days), dtype=np.int64)
+        np.add.at(totals, index, seconds)
+
+        daily = self.daily.setdefault(key, {})
+        for day, seconds in zip(days.tolist(), totals.tolist()):
+            daily[day] = daily.get(day, 0) + seconds
+        histogram = self.hourly.setdefault(key, np.zeros(24))
+        histogram += hour_of_day_seconds(start, stop).sum(axis=0)
+
+    def summary(self, days: int = 7, end=None) -> dict:
+        """On-hours and estimated kWh per device and room over the last `days` days.
+
+        The period ends at `end` (by default the latest event seen) and
+        includes the time devices that are still on have been on so far.
+        """
+        if self.watermark is None:
+            return {"period": None, "devices": {}, "rooms": {}, "total_kwh": 0.0}
+        end = self.watermark if end is None else to_timestamp(end)
+        last_day = (end - 1) // _DAY
+        first_day = last_day - days + 1
+        start = first_day * _DAY
+
+        on_seconds: dict[tuple[str, str], int] = {}
+        for key, daily in self.daily.items():
+            on_seconds[key] = sum(daily.get(day, 0) for day in range(first_day, last_day + 1))
+        for key, (status, since) in self.last_state.items():
+            if status == "ON" and since < end:
+                on_seconds[key] = on_seconds.get(key, 0) + end - max(since, start)
+
+        devices: dict[str, dict] = {}
+        rooms: dict[str, dict] = {}
+        for (device, room), seconds in on_seconds.items():
+            hours = seconds / 3600
+            kwh = hours * DEVICE_POWER_KW.get(device, DEFAULT_POWER_KW)
+            for totals, name in ((devices, device), (rooms, room)):
+                entry = totals.setdefault(name, {"on_hours": 0.0, "kwh": 0.0})
+                entry["on_hours"] += hours
+                entry["kwh"] += kwh
+
+        return {
+            "period": {"start": to_isoformat(start), "end": to_isoformat(end)},
+            "devices": _rounded(devices),
+            "rooms": _rounded(rooms),
+            "total_kwh": round(sum(entry["kwh"] for entry in devices.values()), 2),
+        }
+
+    def hourly_profile(self, device: str | None = None, room: str | None = None) -> list[float]:
+        """All-time on-hours by hour of the day, optionally for one device type and room."""
+        profile = np.zeros(24)
+        for (key_device, key_room), histogram in self.hourly.items():
+            if device in (None, key_device) and room in (None, key_room):
+                profile += histogram
+        return [round(float(seconds) / 3600, 2) for seconds in profile]
+
+    def checkpoint(self) -> dict:
+        """The aggregate state as JSON-serializable data."""
+        return {
+            "format": CHECKPOINT_FORMAT,
+            "watermark": self.watermark,
+            "late_events": self.late_events,
+            "devices": [
+                {
+                    "device": device,
+                    "room": room,
+                    "last_state": self.last_state.get((device, room)),
+                    "daily": {str(day): seconds for day, seconds in self.daily.get((device, room), {}).items()},
+                    "hourly": self.hourly[(device, room)].tolist() if (device, room) in self.hourly else None,
+                }
+                for device, room in self.last_state
+            ],
+        }
+
+    @classmethod
+    def restore(cls, state: dict) -> "RollingAggregates":
+        """Rebuild aggregates from a checkpoint; call catch_up for newer events."""
+        if state.get("format") != CHECKPOINT_FORMAT:
+            raise ValueError(f"Unsupported checkpoint format: {state.get('format')}")
+        self = cls()
+        self.watermark = state["watermark"]
+        self.late_events = state["late_events"]
+        for entry in state["devices"]:
+            key = (entry["device"], entry["room"])
+            if entry["last_state"] is not None:
+                self.last_state[key] = tuple(entry["last_state"])
+            if entry["daily"]:
+                self.daily[key] = {int(day): seconds for day, seconds in entry["daily"].items()}
+            if entry["hourly"] is not None:
+                self.hourly[key] = np.array(entry["hourly"])
+        return self
+
+
+def _rounded(totals: dict[str, dict]) -> dict[str, dict]:
+    return {
+        name: {field: round(value, 2) for field, value in entry.items()}
+        for name, entry in totals.items()
+    }
@@ -0,0 +1,277 @@
+import math
+import logging
+
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime
+
+from settings.config import Config
+from tools.history_store import DeviceHistoryStore, to_isoformat, to_timestamp
+from tools.usage_analytics import OCCUPANCY
+
+logger = logging.getLogger(__name__)
+
+_HOUR = 3600
+_DAY = 24 * _HOUR
+
+
+@dataclass
+class Alert:
+    rule: str
+    device: str
+    room: str
+    time: int
+    message: str
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "time": to_isoformat(self.time)}
+
+
+class Rule:
+    """A condition evaluated one event at a time.
+
+    Rules keep a fixed amount of state per device and room. `on_event` sees
+    every event in time order; `on_tick` is called periodically so that
+    conditions that become true with the passing of time, like a device
+    left on, fire without waiting for the next event.
+    """
+    name = "rule"
+
+    def on_event(self, time: int, device: str, room: str, status: str) -> list[Alert]:
+        return []
+
+    def on_tick(self, now: int) -> list[Alert]:
+        return []
+
+
+class LongRunningDeviceRule(Rule):
+    """A device on for more than `max_hours` in a room nobody is in.
+
+    Rooms without an occupancy sensor count as empty.
+    """
+    name = "long_running"
+
+    def __init__(self, device: str = "AIR_CONDITIONER", max_hours: float = Config.RULES.long_running_hours):
+        self.device = device
+        self.max_seconds = max_hours * _HOUR
+        self._on_since: dict[str, int] = {}  # room -> when the device turned on
+        self._alerted: set[str] = set()
+        self._occupied: set[str] = set()
+
+    def on_event(self, time, device, room, status):
+        if device == OCCUPANCY:
+            if status == "ON":
+                self._occupied.add(room)
+            else:
+                self._occupied.discard(room)
+        elif device == self.device:
+            if status == "ON":
+                self._on_since.setdefault(room, time)
+            else:
+                self._on_since.pop(room, None)
+                self._alerted.discard(room)
+        return self._check(room, time)
+
+    def on_tick(self, now):
+        alerts = []
+        for room in self._on_since:
+            alerts.extend(self._check(room, now))
+        return alerts
+
+    def _check(self, room, now) -> list[Alert]:
+        since = self._on_since.get(room)
+        if since is None or room in self._alerted or room in self._occupied:
+            return []
+        if now - since <= self.max_seconds:
+            return []
+        self._alerted.add(room)
+        return [Alert(
+            self.name, self.device, room, now,
+            f"{self.device} in {room} has been on for {(now - since) / _HOUR:.1f} hours "
+            "with nobody in the room.",
+        )]
+
+
+class LateLightRule(Rule):
+    """A light still on well past the time it is usually switched off.
+
+    The usual off time is an exponentially weighted moving average of past
+    off times, measured from noon so that evenings and small hours compare
+    correctly across midnight.
+    """
+    name = "late_light"
+
+    def __init__(
+        self,
+        alpha: float = Config.RULES.off_time_alpha,
+        tolerance_minutes: float = Config.RULES.late_light_tolerance_minutes,
+        min_samples: int = Config.RULES.min_samples,
+    ):
+        self.alpha = alpha
+        self.tolerance = tolerance_minutes * 60
+        self.min_samples = min_samples
+        # room -> [usual off time in seconds after noon, samples, deadline of the current on-period]
+        self._state: dict[str, list] = {}
+
+    @staticmethod
+    def _since_noon(time: int) -> int:
+        return (time - 12 * _HOUR) % _DAY
+
+    def on_event(self, time, device, room, status):
+        if device != "LIGHT":
+            return []
+        state = self._state.setdefault(room, [0.0, 0, None])
+        if status == "ON":
+            if state[2] is None and state[1] >= self.min_samples:
+                # The first usual off time, plus tolerance, after the light came on.
+                deadline = time - self._since_noon(time) + int(state[0] + self.tolerance)
+                state[2] = deadline if deadline > time else deadline + _DAY
+            return self._check(room, state, time)
+        off = self._since_noon(time)
+        state[0] = off if state[1] == 0 else state[0] + self.alpha * (off - state[0])
+        state[1] += 1
+        state[2] = None
+        return []
+
+    def on_tick(self, now):
+        alerts = []
+        for room, state in self._state.items():
+            alerts.extend(self._check(room, state, now))
+        return alerts
+
+    def _check(self, room, state, now) -> list[Alert]:
+        if state[2] is None or now <= state[2]:
+            return []
+        state[2] = None  # one alert per on-period
+        usual_time = to_isoformat(int(state[0]) + 12 * _HOUR)[11:16]
+        return [Alert(
+            self.name, "LIGHT", room, now,
+            f"Light in {room} is still on; it is usually switched off around {usual_time}.",
+        )]
+
+
+class UsageSpikeRule(Rule):
+    """Hourly on-time more than `sigmas` standard deviations above its baseline.
+
+    The baseline for each device, room and hour of the day is a running
+    mean and variance (Welford's method) of that hour's on-seconds, so it
+    is 24 counters per device and room whatever the length of the history.
+    """
+    name = "usage_spike"
+
+    def __init__(
+        self,
+        sigmas: float = Config.RULES.spike_sigmas,
+        min_samples: int = Config.RULES.spike_min_samples,
+    ):
+        self.sigmas = sigmas
+        self.min_samples = min_samples
+        # (device, room) -> [current hour, on-seconds so far in it, on since, Welford (n, mean, m2) per hour]
+        self._state: dict[tuple[str, str], list] = {}
+
+    def on_event(self, time, device, room, status):
+        if device == OCCUPANCY:
+            return []
+        key = (device, room)
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [time // _HOUR, 0, None, [[0, 0.0, 0.0] for _ in range(24)]]
+        alerts = self._advance(key, state, time)
+        if status == "ON" and state[2] is None:
+            state[2] = time
+        elif status == "OFF" and state[2] is not None:
+            state[1] += time - max(state[2], state[0] * _HOUR)
+            state[2] = None
+        return alerts
+
+    def on_tick(self, now):
+        alerts = []
+        for key, state in self._state.items():
+            alerts.extend(self._advance(key, state, now))
+        return alerts
+
+    def _advance(self, key, state, time) -> list[Alert]:
+        """Close every hour before `time`, checking and then learning each."""
+        alerts = []
+        hour = time // _HOUR
+        if hour - state[0] > 7 * 24:
+            # Skip over long gaps: only the last week of hours is checked and learned.
+            state[0], state[1] = hour - 7 * 24, 0
+        while state[0] < hour:
+            start = state[0] * _HOUR
+            seconds = state[1]
+            if state[2] is not None:
+                seconds += start + _HOUR - max(state[2], start)
+            stats = state[3][state[0] % 24]
+            n, mean, m2 = stats
+            if n >= self.min_samples:
+                # A floor of a minute keeps near-constant baselines from flagging noise.
+                std = max(math.sqrt(m2 / (n - 1)), 60)
+                if seconds > mean + self.sigmas * std:
+                    alerts.append(Alert(
+                        self.name, key[0], key[1], start + _HOUR,
+                        f"{key[0]} in {key[1]} was on {seconds / 60:.0f} minutes between "
+                        f"{state[0] % 24:02d}:00 and {(state[0] + 1) % 24:02d}:00, "
+                        f"usually {mean / 60:.0f}.",
+                    ))
+            n += 1
+            delta = seconds - mean
+            mean += delta / n
+            stats[:] = [n, mean, m2 + delta * (seconds - mean)]
+            state[0] += 1
+            state[1] = 0
+        return alerts
+
+
+class RuleEngine:
+    """Runs rules over the device event stream and keeps their alerts.
+
+    Attached to a history store, every appended event is passed to each
+    rule, and `tick` lets time-based rules fire between events. The most
+    recent `max_alerts` alerts are kept for the assistant to surface.
+    """
+
+    def __init__(self, rules: list[Rule] | None = None, max_alerts: int = Config.RULES.max_alerts):
+        self.rules = rules if rules is not None else default_rules()
+        self.alerts: deque[Alert] = deque(maxlen=max_alerts)
+        # Kept apart, so a wall-clock tick does not make events that arrive
+        # a little after it, stamped a little before it, look late.
+        self._last_event: int | None = None
+        self._last_tick: int | None = None
+
+    @classmethod
+    def attach(cls, store: DeviceHistoryStore, rules: list[Rule] | None = None) -> "RuleEngine":
+        """An engine that sees every event appended to store from now on."""
+        self = cls(rules)
+        store.subscribe(self.on_event)
+        return self
+
+    def on_event(self, time: int, device: str, room: str, status: str):
+        if self._last_event is not None and time < self._last_event:
+            # Rules assume events in time order; late ones are left to the full analysis.
+            return
+        self._last_event = time
+        for rule in self.rules:
+            self._emit(rule.on_event(time, device, room, status))
+
+    def tick(self, now=None):
+        """Evaluate time-based conditions at `now` (by default the current wall-clock time)."""
+        now = to_timestamp(datetime.now() if now is None else now)
+        if self._last_tick is not None and now < self._last_tick:
+            return
+        self._last_tick = now
+        for rule in self.rules:
+            self._emit(rule.on_tick(now))
+
+    def _emit(self, alerts: list[Alert]):
+        for alert in alerts:
+            logger.info("Alert from %s: %s", alert.rule, alert.message)
+            self.alerts.append(alert)
+
+    def recent_alerts(self, limit: int = 10) -> list[dict]:
+        """The newest alerts first."""
+        return [alert.to_dict() for alert in list(self.alerts)[-limit:][::-1]]
+
+
+def default_rules() -> list[Rule]:
+    return [LongRunningDeviceRule(), LateLightRule(), UsageSpikeRule()]
@@ -0,0 +1,120 @@
+"""
+Unit tests for the energy analysis tool.
+"""
+
+import asyncio
+import threading
+import weakref
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("crewai")
+
+from tools.agent_tools import AgentTools
+from tools import energy_tools
+from tools.energy_tools import EnergyTools
+from tools.home_histories import HomeHistories
+
+
+class FakeEnergyAgent:
+    """Blocking stand-in for the crew that counts its runs."""
+
+    def __init__(self):
+        self.runs = 0
+        self.release = threading.Event()
+
+    def invoke(self, history, rollups=None):
+        self.history = history
+        self.release.wait(5)
+        self.runs += 1
+        return {"output": f"analysis {self.runs}"}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    fake = FakeEnergyAgent()
+    monkeypatch.setattr(AgentTools, "agent", fake)
+    monkeypatch.setattr(AgentTools, "_cached", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(EnergyTools, "HISTORIES", HomeHistories())
+    return fake
+
+
+class TestAnalyzeEnergyUsage:
+    """Test cases for AgentTools.analyze_energy_usage."""
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running(self, agent):
+        """The crew runs off the loop, and concurrent calls share one run."""
+        calls = [asyncio.create_task(AgentTools.analyze_energy_usage()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert not any(call.done() for call in calls)
+
+        agent.release.set()
+        results = await asyncio.gather(*calls)
+
+        assert results == [{"output": "analysis 1"}] * 3
+        assert agent.runs == 1
+
+    @pytest.mark.asyncio
+    async def test_result_is_cached_until_history_changes(self, agent):
+        """Unchanged history reuses the analysis; a new event triggers a new run."""
+        agent.release.set()
+        first = await AgentTools.analyze_energy_usage()
+        assert await AgentTools.analyze_energy_usage() == first
+
+        EnergyTools.history().store.append("2025-06-23T18:00:00", "LIGHT", "kitchen", "ON")
+
+        assert await AgentTools.analyze_energy_usage() == {"output": "analysis 2"}
+
+    @pytest.mark.asyncio
+    async def test_crew_reads_a_copy_of_the_history(self, agent):
+        """Events appended while the crew runs do not reach the copy it reads."""
+        EnergyTools.history().store.append("2025-06-23T18:00:00", "LIGHT", "kitchen", "ON")
+        call = asyncio.create_task(AgentTools.analyze_energy_usage())
+        await asyncio.sleep(0.05)
+
+        EnergyTools.history().store.append("2025-06-23T19:00:00", "LIGHT", "kitchen", "OFF")
+        agent.release.set()
+        await call
+
+        assert len(agent.history) == 1
+        assert agent.history is not EnergyTools.history().store
+
+    @pytest.mark.asyncio
+    async def test_each_home_is_analyzed_from_its_own_history(self, agent, monkeypatch):
+        """Homes do not share analyses or history."""
+        agent.release.set()
+        EnergyTools.history("home-1").store.append("2025-06-23T18:00:00", "LIGHT", "kitchen", "ON")
+
+        await AgentTools.analyze_energy_usage()
+        monkeypatch.setattr(energy_tools, "current_home_id", lambda: "home-1")
+        await AgentTools.analyze_energy_usage()
+
+        assert agent.runs == 2
+        assert len(agent.history) == 1
+
+    @pytest.mark.asyncio
+    async def test_homes_are_analyzed_in_parallel(self, agent, monkeypatch):
+        """A long run for one home does not hold up another home's run."""
+        started = threading.Barrier(2, timeout=5)
+        invoke = agent.invoke
+
+        def invoke_together(history, rollups=None):
+            started.wait()
+            return invoke(history, rollups)
+
+        monkeypatch.setattr(agent, "invoke", invoke_together)
+        first = asyncio.create_task(AgentTools.analyze_energy_usage())
+        await asyncio.sleep(0)
+        monkeypatch.setattr(energy_tools, "current_home_id", lambda: "home-1")
+        second = asyncio.create_task(AgentTools.analyze_energy_usage())
+        await asyncio.sleep(0.05)
+        agent.release.set()
+
+        await asyncio.gather(first, second)
+
+        assert agent.runs == 2
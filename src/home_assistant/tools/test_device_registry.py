@@ -0,0 +1,180 @@
+"""
+Unit tests for the multi-home device registry.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+from langchain_core.tools import tool
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.device_registry import DEFAULT_ROOMS, DeviceRegistry
+from tools.energy_tools import EnergyTools
+from tools.home_histories import HomeHistories
+
+
+class TestDeviceRegistry:
+    """Test cases for DeviceRegistry."""
+
+    def test_homes_are_created_with_the_default_layout(self):
+        """A new home has every device type in every default room, all off."""
+        registry = DeviceRegistry()
+
+        devices = registry.snapshot("home-1")
+
+        assert len(devices) == 2 * len(DEFAULT_ROOMS)
+        assert {device["status"] for device in devices} == {"OFF"}
+        assert registry.get("home-1", "kitchen", "LIGHT").status == "OFF"
+        assert registry.get("home-1", "garage", "LIGHT") is None
+        assert len(registry) == 1
+
+    def test_set_status_returns_previous(self):
+        """The previous status tells the caller whether anything changed."""
+        registry = DeviceRegistry()
+
+        async def run():
+            first, _ = await registry.set_status("home-1", "kitchen", "LIGHT", "ON")
+            second, device = await registry.set_status("home-1", "kitchen", "LIGHT", "ON")
+            return first, second, device
+
+        first, second, device = asyncio.run(run())
+
+        assert (first, second, device.status) == ("OFF", "ON", "ON")
+        assert device.changed_at is not None
+        assert registry.get("home-2", "kitchen", "LIGHT").status == "OFF"
+
+    def test_invalid_changes_raise(self):
+        """Unknown statuses and devices are rejected without changing state."""
+        registry = DeviceRegistry()
+
+        with pytest.raises(ValueError):
+            asyncio.run(registry.set_status("home-1", "kitchen", "LIGHT", "DIM"))
+        with pytest.raises(KeyError):
+            asyncio.run(registry.set_status("home-1", "garage", "LIGHT", "ON"))
+
+    def test_added_devices_extend_the_home(self):
+        """A device in a new room adds the room to that home only."""
+        registry = DeviceRegistry()
+
+        registry.add_device("home-1", "garage", "LIGHT")
+
+        assert "garage" in registry.home("home-1").rooms
+        assert "garage" not in registry.home("home-2").rooms
+
+    def test_concurrent_changes_to_one_home_are_serialized(self):
+        """Changes under the home lock do not interleave."""
+        registry = DeviceRegistry()
+        home = registry.home("home-1")
+
+        async def run():
+            async with home.lock:
+                change = asyncio.create_task(
+                    registry.set_status("home-1", "kitchen", "LIGHT", "ON")
+                )
+                other_home = await registry.set_status("home-2", "kitchen", "LIGHT", "ON")
+                await asyncio.sleep(0)
+                blocked = registry.get("home-1", "kitchen", "LIGHT").status
+            await change
+            return other_home, blocked
+
+        (previous, _), blocked = asyncio.run(run())
+
+        assert previous == "OFF"
+        assert blocked == "OFF"
+        assert registry.get("home-1", "kitchen", "LIGHT").status == "ON"
+
+    def test_apply_expands_wildcards_and_last_change_wins(self):
+        """'*' matches every room or type, and later changes override earlier ones."""
+        registry = DeviceRegistry()
+        changes = [("*", "*", "OFF"), ("kitchen", "LIGHT", "ON")]
+
+        applied, results = asyncio.run(registry.apply("home-1", changes))
+
+        assert applied
+        assert len(results) == 2 * len(DEFAULT_ROOMS)
+        assert {"room": "kitchen", "device": "LIGHT", "status": "ON", "result": "changed"} in results
+        assert [r["result"] for r in results].count("unchanged") == len(results) - 1
+        assert registry.get("home-1", "kitchen", "LIGHT").status == "ON"
+
+    def test_apply_is_all_or_nothing(self):
+        """One invalid change leaves every device untouched."""
+        registry = DeviceRegistry()
+        changes = [("kitchen", "LIGHT", "ON"), ("garage", "LIGHT", "ON")]
+
+        applied, results = asyncio.run(registry.apply("home-1", changes))
+
+        assert not applied
+        assert [r["room"] for r in results] == ["garage"]
+        assert registry.get("home-1", "kitchen", "LIGHT").status == "OFF"
+
+
+class TestEnergyDeviceTools:
+    """Test cases for the device tools acting on the session's home."""
+
+    @pytest.fixture(autouse=True)
+    def registry(self, monkeypatch):
+        registry = DeviceRegistry()
+        monkeypatch.setattr(EnergyTools, "DEVICES", registry)
+        monkeypatch.setattr(EnergyTools, "HISTORIES", HomeHistories())
+        return registry
+
+    def test_tools_act_on_the_configured_home(self, registry):
+        """The home_id in the graph config selects the home."""
+        change_light = tool(EnergyTools.change_light_status)
+        config = {"configurable": {"home_id": "home-1"}}
+
+        first = asyncio.run(change_light.ainvoke({"room": "kitchen", "status": "ON"}, config))
+        second = asyncio.run(change_light.ainvoke({"room": "kitchen", "status": "ON"}, config))
+
+        assert first == "Light in kitchen is now ON."
+        assert second == "Light in kitchen is already ON."
+        assert registry.get("home-1", "kitchen", "LIGHT").status == "ON"
+        assert registry.get("default", "kitchen", "LIGHT").status == "OFF"
+        # Each home's changes go into its own history.
+        assert len(EnergyTools.history("home-1").store) == 1
+        assert len(EnergyTools.history("default").store) == 0
+
+    def test_usage_tools_read_only_the_configured_home(self):
+        """A home's summary and forecast never include another home's usage."""
+        change_light = tool(EnergyTools.change_light_status)
+        summarize = tool(EnergyTools.summarize_energy_usage)
+        EnergyTools.history("default").store.append("2025-06-21T18:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+        EnergyTools.history("default").store.append("2025-06-21T22:00:00", "AIR_CONDITIONER", "bedroom", "OFF")
+        config = {"configurable": {"home_id": "home-1"}}
+
+        asyncio.run(change_light.ainvoke({"room": "kitchen", "status": "ON"}, config))
+        summary = summarize.invoke({}, config)
+
+        assert summary["events"] == 1
+        assert "AIR_CONDITIONER" not in summary["devices"]
+
+    def test_invalid_room(self):
+        """Rooms outside the home are reported, not created."""
+        result = asyncio.run(EnergyTools.change_air_conditioner_status("garage", "ON"))
+
+        assert result.startswith("Invalid room: garage.")
+
+    def test_scene_and_changes_in_one_call(self, registry):
+        """A scene is applied first, then the explicit changes."""
+        changes = [{"room": "kitchen", "device": "LIGHT", "status": "ON"}]
+
+        result = asyncio.run(EnergyTools.apply_device_changes(changes, scene="good_night"))
+
+        assert result["applied"]
+        assert registry.get("default", "bedroom", "AIR_CONDITIONER").status == "ON"
+        assert registry.get("default", "kitchen", "LIGHT").status == "ON"
+        assert registry.get("default", "living_room", "LIGHT").status == "OFF"
+        assert [(r["room"], r["device"], r["status"]) for r in EnergyTools.history("default").store.records()] == [
+            ("bedroom", "AIR_CONDITIONER", "ON"), ("kitchen", "LIGHT", "ON"),
+        ]
+
+    def test_unknown_scene(self, registry):
+        """An unknown scene changes nothing."""
+        result = asyncio.run(EnergyTools.apply_device_changes(scene="party"))
+
+        assert not result["applied"]
+        assert "Unknown scene" in result["error"]
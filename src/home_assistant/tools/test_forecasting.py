@@ -0,0 +1,118 @@
+"""
+Unit tests for the usage forecasts.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.forecasting import forecast_usage, hourly_kwh, seasonal_forecast
+from tools.history_store import DeviceHistoryStore, to_timestamp
+
+
+def nightly_store(days, on="19:00:00", off="23:00:00", device="LIGHT", room="living_room"):
+    store = DeviceHistoryStore()
+    for day in range(1, days + 1):
+        store.append(f"2025-06-{day:02d}T{on}", device, room, "ON")
+        store.append(f"2025-06-{day:02d}T{off}", device, room, "OFF")
+    return store
+
+
+class TestHourlyKwh:
+    """Test cases for spreading intervals into hours."""
+
+    def test_interval_split_across_hours_and_rows(self):
+        """Partial hours get their share, and each interval lands in its own row."""
+        start = np.array([1800, 3600], dtype=np.int64)
+        stop = np.array([3 * 3600, 4 * 3600 + 900], dtype=np.int64)
+
+        kwh = hourly_kwh(
+            start, stop, row=np.array([0, 1]), window_start=np.array([0, 0]),
+            power_kw=np.array([1.0, 2.0]), shape=(2, 5),
+        )
+
+        np.testing.assert_allclose(kwh[0], [0.5, 1.0, 1.0, 0.0, 0.0])
+        np.testing.assert_allclose(kwh[1], [0.0, 2.0, 2.0, 2.0, 0.5])
+
+
+class TestSeasonalForecast:
+    """Test cases for the hour-of-week profile."""
+
+    def test_recent_weeks_weigh_more(self):
+        """With alpha 0.5, the latest week counts twice as much as the one before."""
+        history = np.zeros((1, 2 * 168))
+        history[0, 5] = 3.0
+        history[0, 168 + 5] = 6.0
+
+        forecast = seasonal_forecast(history, np.array([0]), horizon=168, alpha=0.5)
+
+        assert forecast[0, 5] == 5.0
+        assert forecast[0].sum() == 5.0
+
+    def test_short_history_falls_back_to_hour_of_day(self):
+        """Hours of the week never observed use the same hour of other days."""
+        history = np.zeros((1, 168))
+        history[0, 168 - 48 + 3] = 1.0
+        history[0, 168 - 24 + 3] = 3.0
+
+        forecast = seasonal_forecast(history, np.array([168 - 48]), horizon=168)
+
+        assert forecast[0, 3] == forecast[0, 24 + 3] == 2.0
+        assert forecast[0, 168 - 48 + 3] == 1.0
+        assert forecast[0, 168 - 24 + 3] == 3.0
+
+
+class TestForecastUsage:
+    """Test cases for fleet forecasts."""
+
+    def test_steady_routine_is_forecast(self):
+        """Four hours of light every evening forecasts four hours a day."""
+        store = nightly_store(28)
+
+        forecast = forecast_usage({"home": store})["home"]
+
+        assert forecast["from"] == "2025-06-28T23:00:00"
+        assert forecast["next_day_kwh"] == 0.24
+        assert forecast["next_week_kwh"] == 1.68
+        assert forecast["rooms"] == {"living_room": {"next_day_kwh": 0.24, "next_week_kwh": 1.68}}
+
+    def test_occupancy_is_not_forecast(self):
+        """Occupancy sensor events add no forecast usage."""
+        store = nightly_store(28)
+        for day in range(1, 29):
+            store.append(f"2025-06-{day:02d}T08:00:00", "OCCUPANCY", "living_room", "ON")
+            store.append(f"2025-06-{day:02d}T20:00:00", "OCCUPANCY", "living_room", "OFF")
+
+        forecast = forecast_usage({"home": store})["home"]
+
+        assert list(forecast["devices"]) == ["LIGHT"]
+        assert forecast["next_day_kwh"] == 0.24
+
+    def test_homes_are_forecast_independently_in_one_pass(self):
+        """Each home keeps its own origin and devices."""
+        stores = {
+            "a": nightly_store(14),
+            "b": nightly_store(3, on="22:00:00", off="23:59:59", device="AIR_CONDITIONER", room="bedroom"),
+            "empty": DeviceHistoryStore(),
+        }
+
+        forecasts = forecast_usage(stores)
+
+        assert set(forecasts) == {"a", "b"}
+        assert list(forecasts["a"]["devices"]) == ["LIGHT"]
+        assert list(forecasts["b"]["devices"]) == ["AIR_CONDITIONER"]
+        assert forecasts["b"]["next_day_kwh"] == 3.0
+
+    def test_explicit_origin(self):
+        """Usage after the origin is not used for the forecast."""
+        store = nightly_store(14)
+        store.append("2025-06-15T00:00:00", "LIGHT", "kitchen", "ON")
+        store.append("2025-06-15T12:00:00", "LIGHT", "kitchen", "OFF")
+
+        forecast = forecast_usage({"home": store}, origin=to_timestamp("2025-06-15T00:00:00"))["home"]
+
+        assert list(forecast["rooms"]) == ["living_room"]
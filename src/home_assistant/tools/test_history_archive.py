@@ -0,0 +1,144 @@
+"""
+Unit tests for the on-disk device history archive.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.forecasting import forecast_usage
+from tools.history_archive import EVENT_DTYPE, HistoryArchive
+from tools.history_store import DeviceHistoryStore, to_timestamp
+from tools.usage_analytics import summarize_usage
+
+EVENTS = [
+    ("2025-06-20T19:00:00", "LIGHT", "living_room", "ON"),
+    ("2025-06-20T23:30:00", "LIGHT", "living_room", "OFF"),
+    ("2025-06-20T23:45:00", "AIR_CONDITIONER", "bedroom", "ON"),
+    ("2025-06-21T06:15:00", "AIR_CONDITIONER", "bedroom", "OFF"),
+    ("2025-06-22T18:00:00", "LIGHT", "kitchen", "ON"),
+    ("2025-06-22T18:30:00", "LIGHT", "kitchen", "OFF"),
+]
+
+
+def make_store(events=EVENTS):
+    store = DeviceHistoryStore()
+    for event in events:
+        store.append(*event)
+    return store
+
+
+def strip_notes(records):
+    return [{k: v for k, v in record.items() if k != "note"} for record in records]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return HistoryArchive(str(tmp_path))
+
+
+class TestHistoryArchive:
+    """Test cases for HistoryArchive."""
+
+    def test_round_trip_by_day(self, archive, tmp_path):
+        """Events are stored one file per day and load back unchanged."""
+        store = make_store()
+
+        archive.save("home", store)
+        loaded = archive.load("home")
+
+        assert [day.isoformat() for day in archive.days("home")] == ["2025-06-20", "2025-06-21", "2025-06-22"]
+        assert loaded.records() == store.records()
+        records = np.load(tmp_path / "home" / "days" / "2025-06-20.npy")
+        assert records.dtype == EVENT_DTYPE
+        assert records["delta"].tolist() == [19 * 3600, 4 * 3600 + 1800, 900]
+
+    def test_query_range_and_appends_after_load(self, archive):
+        """A range reads only its events, and a loaded store keeps accepting events."""
+        archive.save("home", make_store())
+
+        view, devices, rooms = archive.query("home", "2025-06-20T23:00:00", "2025-06-22T00:00:00")
+        loaded = archive.load("home")
+        loaded.append("2025-06-22T20:00:00", "LIGHT", "garage", "ON")
+
+        assert view.time.tolist() == [
+            to_timestamp("2025-06-20T23:30:00"),
+            to_timestamp("2025-06-20T23:45:00"),
+            to_timestamp("2025-06-21T06:15:00"),
+        ]
+        assert [devices[d] for d in view.device] == ["LIGHT", "AIR_CONDITIONER", "AIR_CONDITIONER"]
+        assert loaded.records()[-1]["room"] == "garage"
+
+    def test_incremental_save_keeps_codes_stable(self, archive):
+        """Saving again rewrites only the latest days and extends the dictionary."""
+        archive.save("home", make_store())
+        store = archive.load("home")
+        store.append("2025-06-23T07:00:00", "HEATER", "bathroom", "ON")
+
+        archive.save("home", store)
+
+        assert strip_notes(archive.load("home").records()) == strip_notes(store.records())
+        assert archive.load("home").devices == ["LIGHT", "AIR_CONDITIONER", "HEATER"]
+
+    def test_retention_rolls_up_old_days(self, archive):
+        """Days past retention become hourly rollups; newer days stay raw."""
+        archive.save("home", make_store())
+
+        archive.apply_retention("home", keep_days=1, today="2025-06-22T12:00:00")
+        rollups, devices, rooms = archive.rollups("home")
+
+        assert [day.isoformat() for day in archive.days("home")] == ["2025-06-22"]
+        assert [day.isoformat() for day in archive.days("home", "rollups")] == ["2025-06-20", "2025-06-21"]
+        by_hour = {
+            (int(r["time"]), devices[r["device"]], rooms[r["room"]]): (int(r["on_seconds"]), int(r["switched_on"]))
+            for r in rollups
+        }
+        assert by_hour[(to_timestamp("2025-06-20T19:00:00"), "LIGHT", "living_room")] == (3600, 1)
+        assert by_hour[(to_timestamp("2025-06-20T23:00:00"), "LIGHT", "living_room")] == (1800, 0)
+        assert by_hour[(to_timestamp("2025-06-20T23:00:00"), "AIR_CONDITIONER", "bedroom")] == (900, 1)
+        assert by_hour[(to_timestamp("2025-06-21T06:00:00"), "AIR_CONDITIONER", "bedroom")] == (900, 0)
+        assert sum(seconds for seconds, _ in by_hour.values()) == (4.5 + 6.5) * 3600
+
+    def test_rollups_feed_summaries_and_forecasts(self, archive):
+        """Usage summaries and forecasts still count the days that were rolled up."""
+        store = make_store()
+        archive.save("home", store)
+        archive.apply_retention("home", keep_days=1, today="2025-06-22T12:00:00")
+        loaded, rollups = archive.load("home"), archive.rollups("home")
+
+        summary = summarize_usage(loaded, rollups=rollups)
+        full = summarize_usage(store)
+        forecast = forecast_usage({"home": loaded}, origin="2025-06-23T00:00:00", rollups={"home": rollups})
+
+        assert summary["devices"] == full["devices"]
+        assert summary["rooms"] == full["rooms"]
+        assert summary["on_hours_by_hour_of_day"] == full["on_hours_by_hour_of_day"]
+        assert summary["period"] == full["period"]
+        assert summarize_usage(loaded, end="2025-06-21T00:00:00", rollups=rollups)["rooms"] == {
+            "living_room": {"on_hours": 4.5, "kwh": 0.27},
+            "bedroom": {"on_hours": 0.25, "kwh": 0.38},
+        }
+        assert forecast == forecast_usage({"home": store}, origin="2025-06-23T00:00:00")
+
+    def test_save_after_retention_keeps_rolled_up_days(self, archive):
+        """A store loaded before retention does not bring rolled-up days back as raw events."""
+        store = make_store()
+        archive.save("home", store)
+        archive.apply_retention("home", keep_days=1, today="2025-06-23T12:00:00")
+        assert archive.days("home") == []
+
+        store.append("2025-06-23T07:00:00", "LIGHT", "kitchen", "ON")
+        archive.save("home", store)
+
+        assert [day.isoformat() for day in archive.days("home")] == ["2025-06-23"]
+        assert len(archive.days("home", "rollups")) == 3
+
+    def test_missing_home(self, archive):
+        """A home with nothing archived loads as an empty store."""
+        assert len(archive.load("nobody")) == 0
+        assert len(archive.rollups("nobody")[0]) == 0
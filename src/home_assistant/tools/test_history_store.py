@@ -0,0 +1,90 @@
+"""
+Unit tests for the columnar device history store.
+"""
+
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_store import DeviceHistoryStore, STATUSES, to_timestamp
+
+
+def make_store():
+    store = DeviceHistoryStore(capacity=2)
+    store.append("2025-06-21T18:00:00", "LIGHT", "living_room", "ON", "Got dark")
+    store.append("2025-06-21T23:00:00", "LIGHT", "living_room", "OFF")
+    store.append("2025-06-22T06:30:00", "AIR_CONDITIONER", "bedroom", "OFF")
+    store.append("2025-06-22T06:45:00", "LIGHT", "kitchen", "ON")
+    return store
+
+
+class TestDeviceHistoryStore:
+    """Test cases for DeviceHistoryStore."""
+
+    def test_append_grows_and_encodes(self):
+        """Appends past the capacity keep every event with encoded names."""
+        store = make_store()
+
+        assert len(store) == 4
+        assert store.devices == ["LIGHT", "AIR_CONDITIONER"]
+        assert store.rooms == ["living_room", "bedroom", "kitchen"]
+
+    def test_time_range_is_half_open(self):
+        """query returns events in [start, end)."""
+        store = make_store()
+
+        view = store.query("2025-06-21T23:00:00", "2025-06-22T06:45:00")
+
+        assert view.time.tolist() == [
+            to_timestamp("2025-06-21T23:00:00"), to_timestamp("2025-06-22T06:30:00")
+        ]
+
+    def test_device_and_room_filters(self):
+        """Filters combine with the time range; unknown names match nothing."""
+        store = make_store()
+
+        lights = store.query(device="LIGHT", room="living_room")
+
+        assert [STATUSES[s] for s in lights.status] == ["ON", "OFF"]
+        assert len(store.query(device="HEATER").time) == 0
+
+    def test_late_event_keeps_time_order(self):
+        """An out-of-order event is inserted in place with its note."""
+        store = make_store()
+
+        store.append("2025-06-21T22:30:00", "AIR_CONDITIONER", "bedroom", "ON", "Before sleep")
+
+        records = store.records()
+        assert [r["time"] for r in records] == sorted(r["time"] for r in records)
+        assert records[1]["note"] == "Before sleep"
+        assert records[0]["note"] == "Got dark"
+        assert "note" not in records[2]
+
+    def test_invalid_status_is_rejected(self):
+        """Only ON and OFF are accepted."""
+        with pytest.raises(ValueError):
+            DeviceHistoryStore().append("2025-06-21T18:00:00", "LIGHT", "kitchen", "DIM")
+
+    def test_from_columns(self):
+        """A store built from columns matches one built by appending."""
+        store = make_store()
+        view = store.query()
+
+        rebuilt = DeviceHistoryStore.from_columns(*view, devices=store.devices, rooms=store.rooms)
+
+        assert [{k: v for k, v in r.items() if k != "note"} for r in store.records()] == rebuilt.records()
+        rebuilt.append("2025-06-23T00:00:00", "LIGHT", "kitchen", "ON")
+        assert len(rebuilt) == len(store) + 1
+
+    def test_copy_is_independent(self):
+        """A copy keeps its events, notes included, while the original changes."""
+        store = make_store()
+        copy = store.copy()
+
+        store.append("2025-06-20T00:00:00", "LIGHT", "garage", "ON")
+
+        assert copy.records() == store.records()[1:]
+        assert "garage" not in copy.rooms
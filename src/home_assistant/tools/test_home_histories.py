@@ -0,0 +1,104 @@
+"""
+Unit tests for the per-home event histories.
+"""
+
+import asyncio
+import sys
+import os
+import threading
+
+import pytest
+
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_archive import HistoryArchive
+from tools.history_store import DeviceHistoryStore
+from tools.home_histories import PRIVATE_HOME_PREFIX, HomeHistories
+from tools.rule_engine import LongRunningDeviceRule
+
+
+class TestHomeHistories:
+    """Test cases for HomeHistories."""
+
+    def test_homes_keep_their_own_history_aggregates_and_rules(self):
+        """Events of one home reach only that home's aggregates and rules."""
+        histories = HomeHistories()
+        histories.get("home-1").rules.rules = [LongRunningDeviceRule(max_hours=1)]
+        histories.get("home-1").store.append("2025-06-21T10:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+
+        histories.tick("2025-06-21T12:00:00")
+
+        assert len(histories.get("home-1").rules.alerts) == 1
+        assert "AIR_CONDITIONER" in histories.get("home-1").aggregates.summary(end="2025-06-21T12:00:00")["devices"]
+        assert len(histories.get("home-2").store) == 0
+        assert not histories.get("home-2").rules.alerts
+
+    def test_homes_are_loaded_from_and_saved_to_the_archive(self, tmp_path):
+        """Named homes round-trip through the archive; private session homes do not."""
+        archive = HistoryArchive(str(tmp_path))
+        yesterday = datetime.now() - timedelta(days=1)
+        store = DeviceHistoryStore()
+        store.append(yesterday, "LIGHT", "kitchen", "ON")
+        archive.save("home-1", store)
+        histories = HomeHistories(archive)
+
+        assert len(histories.get("home-1").store) == 1
+        histories.get("home-1").store.append(yesterday + timedelta(hours=1), "LIGHT", "kitchen", "OFF")
+        histories.get(PRIVATE_HOME_PREFIX + "ctx-1").store.append(yesterday, "LIGHT", "kitchen", "ON")
+        histories.save()
+
+        assert len(archive.load("home-1")) == 2
+        assert not os.path.exists(tmp_path / (PRIVATE_HOME_PREFIX + "ctx-1"))
+
+    def test_discard(self):
+        """A discarded home starts afresh."""
+        histories = HomeHistories()
+        histories.get("home-1").store.append("2025-06-21T18:00:00", "LIGHT", "kitchen", "ON")
+
+        histories.discard("home-1")
+
+        assert "home-1" not in histories
+        assert len(histories.get("home-1").store) == 0
+
+    @pytest.mark.asyncio
+    async def test_load_reads_the_archive_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Loading a home runs in a worker thread, once for concurrent callers."""
+        archive = HistoryArchive(str(tmp_path))
+        histories = HomeHistories(archive)
+        threads = []
+        read = histories._read
+
+        def record_thread(home_id):
+            threads.append(threading.current_thread())
+            return read(home_id)
+
+        monkeypatch.setattr(histories, "_read", record_thread)
+        first, second = await asyncio.gather(histories.load("home-1"), histories.load("home-1"))
+
+        assert first is second is histories.get("home-1")
+        assert threads and threads[0] is not threading.main_thread()
+        assert len(threads) == 1
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_homes_are_saved_and_unloaded(self, tmp_path):
+        """Beyond max_homes, the least recently used named home is archived and dropped."""
+        archive = HistoryArchive(str(tmp_path))
+        histories = HomeHistories(archive, max_homes=2, pinned=frozenset({"pinned"}))
+        yesterday = datetime.now() - timedelta(days=1)
+        (await histories.load("home-1")).store.append(yesterday, "LIGHT", "kitchen", "ON")
+        await histories.load("pinned")
+        await histories.load("home-2")
+        await histories.load(PRIVATE_HOME_PREFIX + "ctx-1")
+        histories.get("home-1")
+
+        await histories.load("home-3")
+
+        assert "home-2" not in histories
+        assert all(home_id in histories for home_id in ("home-1", "home-3", "pinned", PRIVATE_HOME_PREFIX + "ctx-1"))
+        histories.get("home-4")
+        assert "home-1" not in histories
+        assert len(archive.load("home-1")) == 1
+        assert len((await histories.load("home-1")).store) == 1
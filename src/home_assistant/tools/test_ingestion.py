@@ -0,0 +1,186 @@
+"""
+Unit tests for the device-event ingestion pipeline.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_store import DeviceHistoryStore, to_timestamp
+from tools.ingestion import EventIngestor, validate_event
+
+
+def event(time, device="LIGHT", room="kitchen", status="ON", **extra):
+    return {"time": time, "device": device, "room": room, "status": status, **extra}
+
+
+async def wait_for(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class TestValidateEvent:
+    """Test cases for event validation."""
+
+    def test_valid_event(self):
+        """A valid event is returned as a row."""
+        row = validate_event(event("2025-06-21T18:00:00", note="dusk"))
+
+        assert row == (to_timestamp("2025-06-21T18:00:00"), "LIGHT", "kitchen", "ON", "dusk")
+
+    @pytest.mark.parametrize("raw", [
+        event("2025-06-21T18:00:00", status="DIM"),
+        event("not a time"),
+        event("2025-06-21T18:00:00", room=""),
+        {"device": "LIGHT", "room": "kitchen", "status": "ON"},
+        event("2025-06-21T18:00:00", id=["x"]),
+        ["LIGHT"],
+    ])
+    def test_invalid_events(self, raw):
+        """Malformed events raise ValueError."""
+        with pytest.raises(ValueError):
+            validate_event(raw)
+
+
+class TestEventIngestor:
+    """Test cases for EventIngestor."""
+
+    def test_batch_is_validated_deduplicated_and_sorted(self):
+        """Duplicates and invalid events are dropped; the rest land in time order."""
+        store = DeviceHistoryStore()
+        ingestor = EventIngestor(store)
+
+        added = ingestor.ingest([
+            event("2025-06-21T19:00:00", status="OFF"),
+            event("2025-06-21T18:00:00"),
+            event("2025-06-21T18:00:00"),
+            event("2025-06-21T20:00:00", id="a"),
+            event("2025-06-21T20:30:00", id="a"),
+            event("2025-06-21T21:00:00", status="DIM"),
+        ])
+
+        assert added == 3
+        assert [r["time"] for r in store.records()] == [
+            "2025-06-21T18:00:00", "2025-06-21T19:00:00", "2025-06-21T20:00:00",
+        ]
+        assert ingestor.stats == {"accepted": 3, "duplicates": 2, "invalid": 1, "batches": 1}
+
+    def test_full_queue_applies_backpressure(self):
+        """put waits while the queue is full and resumes once it is drained."""
+        store = DeviceHistoryStore()
+
+        async def run():
+            ingestor = EventIngestor(store, queue_size=2, batch_interval=0.01)
+            await ingestor.put(event(1))
+            await ingestor.put(event(2, status="OFF"))
+            blocked = asyncio.create_task(ingestor.put(event(3)))
+            await asyncio.sleep(0.05)
+            was_blocked = not blocked.done()
+            ingestor.start()
+            await asyncio.wait_for(blocked, 1)
+            await wait_for(lambda: len(store) == 3)
+            await ingestor.stop()
+            return was_blocked
+
+        assert asyncio.run(run())
+
+    def test_stop_flushes_queued_events(self):
+        """Events queued before stop are still stored."""
+        store = DeviceHistoryStore()
+
+        async def run():
+            ingestor = EventIngestor(store)
+            await ingestor.put(event(1))
+            await ingestor.stop()
+
+        asyncio.run(run())
+
+        assert len(store) == 1
+
+    def test_stop_flushes_the_batch_being_collected(self):
+        """Events the consumer already took from the queue are stored on stop."""
+        store = DeviceHistoryStore()
+
+        async def run():
+            ingestor = EventIngestor(store, batch_interval=10)
+            ingestor.start()
+            await ingestor.put(event(1))
+            await wait_for(ingestor.queue.empty)
+            await ingestor.stop()
+
+        asyncio.run(run())
+
+        assert len(store) == 1
+
+    def test_failed_batch_does_not_stop_the_consumer(self):
+        """A batch that cannot be stored is logged and later events still land."""
+        store = DeviceHistoryStore()
+        failing = iter([True])
+        store.subscribe(lambda *event: next(failing, False) and 1 / 0)
+
+        async def run():
+            ingestor = EventIngestor(store, batch_interval=0.01)
+            ingestor.start()
+            await ingestor.put(event(1))
+            await wait_for(lambda: len(store) == 1)
+            await ingestor.put(event(2, status="OFF"))
+            await wait_for(lambda: len(store) == 2)
+            await ingestor.stop()
+
+        asyncio.run(run())
+
+    def test_tail_jsonl_follows_appended_lines(self, tmp_path):
+        """Lines written after tailing starts are ingested, even if written in pieces."""
+        path = tmp_path / "events.jsonl"
+        path.write_text(json.dumps(event("2025-06-21T18:00:00")) + "\n")
+        store = DeviceHistoryStore()
+
+        async def run():
+            ingestor = EventIngestor(store, batch_interval=0.01)
+            ingestor.start()
+            ingestor.add_source(ingestor.tail_jsonl(str(path), poll_interval=0.01))
+            await wait_for(lambda: len(store) == 1)
+            line = json.dumps(event("2025-06-21T19:00:00", status="OFF"))
+            with open(path, "a") as file:
+                file.write(line[:10])
+                file.flush()
+                await asyncio.sleep(0.05)
+                file.write(line[10:] + "\nnot json\n")
+            await wait_for(lambda: len(store) == 2)
+            await ingestor.stop()
+            return ingestor.stats
+
+        stats = asyncio.run(run())
+
+        assert store.records()[-1]["status"] == "OFF"
+        assert stats["invalid"] == 1
+
+    def test_unix_socket_source(self, tmp_path):
+        """Events sent over the Unix socket are ingested."""
+        path = str(tmp_path / "events.sock")
+        store = DeviceHistoryStore()
+
+        async def run():
+            ingestor = EventIngestor(store, batch_interval=0.01)
+            ingestor.start()
+            await ingestor.serve_unix(path)
+            _, writer = await asyncio.open_unix_connection(path)
+            writer.write("".join(
+                json.dumps(event(t, status=s)) + "\n" for t, s in ((1, "ON"), (2, "OFF"))
+            ).encode())
+            await writer.drain()
+            writer.close()
+            await wait_for(lambda: len(store) == 2)
+            await ingestor.stop()
+
+        asyncio.run(run())
+
+        assert [r["status"] for r in store.records()] == ["ON", "OFF"]
@@ -0,0 +1,142 @@
+"""
+Unit tests for the incremental usage aggregates.
+"""
+
+import sys
+import os
+import json
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_store import DeviceHistoryStore
+from tools.rolling_aggregates import RollingAggregates
+from tools.usage_analytics import summarize_usage
+
+EVENTS = [
+    ("2025-06-20T19:00:00", "LIGHT", "living_room", "ON"),
+    ("2025-06-20T22:00:00", "AIR_CONDITIONER", "bedroom", "ON"),
+    ("2025-06-20T23:30:00", "LIGHT", "living_room", "OFF"),
+    ("2025-06-21T06:00:00", "AIR_CONDITIONER", "bedroom", "OFF"),
+    ("2025-06-21T18:00:00", "LIGHT", "kitchen", "ON"),
+    ("2025-06-21T18:00:00", "LIGHT", "kitchen", "ON"),
+    ("2025-06-21T19:00:00", "LIGHT", "kitchen", "OFF"),
+]
+
+
+def make_store(events=EVENTS):
+    store = DeviceHistoryStore()
+    for time, device, room, status in events:
+        store.append(time, device, room, status)
+    return store
+
+
+class TestRollingAggregates:
+    """Test cases for RollingAggregates."""
+
+    def test_matches_full_analysis(self):
+        """Aggregates kept while appending agree with a full rescan."""
+        store = DeviceHistoryStore()
+        aggregates = RollingAggregates.attach(store)
+        for event in EVENTS:
+            store.append(*event)
+
+        summary = aggregates.summary(days=7)
+        full = summarize_usage(store)
+
+        assert summary["total_kwh"] == full["total_kwh"]
+        for device, usage in full["devices"].items():
+            assert summary["devices"][device]["on_hours"] == usage["on_hours"]
+        assert summary["rooms"] == full["rooms"]
+        assert aggregates.hourly_profile() == full["on_hours_by_hour_of_day"]
+
+    def test_interval_is_split_across_days(self):
+        """An interval crossing midnight counts toward both days."""
+        aggregates = RollingAggregates.attach(make_store(EVENTS[:4]))
+
+        yesterday = aggregates.summary(days=1, end="2025-06-21T00:00:00")
+        today = aggregates.summary(days=1, end="2025-06-22T00:00:00")
+
+        assert yesterday["rooms"] == {
+            "living_room": {"on_hours": 4.5, "kwh": 0.27},
+            "bedroom": {"on_hours": 2.0, "kwh": 3.0},
+        }
+        assert today["rooms"]["bedroom"]["on_hours"] == 6.0
+        assert today["rooms"]["living_room"]["on_hours"] == 0.0
+
+    def test_device_still_on_counts_until_end(self):
+        """A device that is on contributes the time since it was switched on."""
+        aggregates = RollingAggregates.attach(make_store(EVENTS[:1]))
+
+        summary = aggregates.summary(end="2025-06-20T21:00:00")
+
+        assert summary["devices"]["LIGHT"]["on_hours"] == 2.0
+
+    def test_occupancy_is_not_usage(self):
+        """Occupancy sensor events are left out of the aggregates."""
+        aggregates = RollingAggregates.attach(make_store(EVENTS + [
+            ("2025-06-21T20:00:00", "OCCUPANCY", "kitchen", "ON"),
+            ("2025-06-21T23:00:00", "OCCUPANCY", "kitchen", "OFF"),
+        ]))
+
+        assert "OCCUPANCY" not in aggregates.summary(days=7)["devices"]
+
+    def test_late_events_are_counted_not_folded_in(self):
+        """An event older than the device's last one is left to the full analysis."""
+        store = make_store()
+        aggregates = RollingAggregates.attach(store)
+        before = aggregates.summary()
+
+        store.append("2025-06-21T18:30:00", "LIGHT", "kitchen", "OFF")
+
+        assert aggregates.late_events == 1
+        assert aggregates.summary() == before
+
+    def test_checkpoint_restore_and_catch_up(self):
+        """A restored checkpoint picks up the events appended after it."""
+        store = make_store(EVENTS[:4])
+        aggregates = RollingAggregates.attach(store)
+        state = json.loads(json.dumps(aggregates.checkpoint()))
+
+        for event in EVENTS[4:]:
+            store.append(*event)
+        restored = RollingAggregates.restore(state)
+        restored.catch_up(store)
+
+        assert restored.summary() == aggregates.summary()
+        assert restored.hourly_profile() == aggregates.hourly_profile()
+
+    def test_catch_up_matches_adding_events_one_by_one(self):
+        """Folding in a store column-wise gives the same state as one add per event."""
+        events = EVENTS + [
+            ("2025-06-21T20:00:00", "OCCUPANCY", "kitchen", "ON"),
+            ("2025-06-21T21:00:00", "LIGHT", "living_room", "ON"),
+            ("2025-06-21T21:00:00", "LIGHT", "living_room", "OFF"),
+            ("2025-06-22T02:00:00", "AIR_CONDITIONER", "bedroom", "ON"),
+            ("2025-06-23T09:15:00", "AIR_CONDITIONER", "bedroom", "OFF"),
+            ("2025-06-23T10:00:00", "LIGHT", "kitchen", "ON"),
+        ]
+        store = make_store(events)
+        one_by_one = RollingAggregates()
+        for event in events:
+            one_by_one.add(*event)
+
+        caught_up = RollingAggregates()
+        caught_up.catch_up(store)
+
+        assert caught_up.last_state == one_by_one.last_state
+        assert caught_up.watermark == one_by_one.watermark
+        assert caught_up.summary(end="2025-06-24T00:00:00") == one_by_one.summary(end="2025-06-24T00:00:00")
+        assert caught_up.hourly_profile() == one_by_one.hourly_profile()
+
+    def test_catch_up_counts_events_older_than_a_restored_state(self):
+        """Events before a device's restored last state are late, as with add."""
+        aggregates = RollingAggregates.attach(make_store())
+        state = aggregates.checkpoint()
+        state["watermark"] = None
+        restored = RollingAggregates.restore(state)
+
+        restored.catch_up(make_store())
+
+        assert restored.late_events == 4
+        assert restored.summary() == aggregates.summary()
@@ -0,0 +1,139 @@
+"""
+Unit tests for the streaming rule engine.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_store import DeviceHistoryStore, to_timestamp
+from tools.rule_engine import (
+    OCCUPANCY,
+    LateLightRule,
+    LongRunningDeviceRule,
+    RuleEngine,
+    UsageSpikeRule,
+)
+
+
+def engine_with(rule):
+    store = DeviceHistoryStore()
+    return store, RuleEngine.attach(store, [rule])
+
+
+class TestLongRunningDeviceRule:
+    """Test cases for devices left on in empty rooms."""
+
+    def test_alerts_once_after_max_hours(self):
+        """The alert fires on the tick past the limit, and only once."""
+        store, engine = engine_with(LongRunningDeviceRule(max_hours=2))
+        store.append("2025-06-21T10:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+
+        engine.tick("2025-06-21T11:00:00")
+        assert not engine.alerts
+        engine.tick("2025-06-21T12:30:00")
+        engine.tick("2025-06-21T13:00:00")
+
+        assert [alert.room for alert in engine.alerts] == ["bedroom"]
+        assert "2.5 hours" in engine.alerts[0].message
+
+    def test_occupied_rooms_do_not_alert(self):
+        """A room with someone in it is not flagged until it empties."""
+        store, engine = engine_with(LongRunningDeviceRule(max_hours=2))
+        store.append("2025-06-21T10:00:00", OCCUPANCY, "bedroom", "ON")
+        store.append("2025-06-21T10:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+
+        engine.tick("2025-06-21T13:00:00")
+        assert not engine.alerts
+        store.append("2025-06-21T13:30:00", OCCUPANCY, "bedroom", "OFF")
+
+        assert len(engine.alerts) == 1
+
+
+class TestLateLightRule:
+    """Test cases for lights left on past their usual off time."""
+
+    def test_learns_usual_off_time_across_midnight(self):
+        """Off times around midnight average correctly, and lateness is judged against them."""
+        store, engine = engine_with(LateLightRule(tolerance_minutes=60, min_samples=3))
+        for day, off in (("20", "21T23:30"), ("21", "22T00:30"), ("22", "23T00:00")):
+            store.append(f"2025-06-{day}T19:00:00", "LIGHT", "living_room", "ON")
+            store.append(f"2025-06-{off}:00", "LIGHT", "living_room", "OFF")
+
+        store.append("2025-06-23T19:00:00", "LIGHT", "living_room", "ON")
+        engine.tick("2025-06-24T00:30:00")
+        assert not engine.alerts
+        engine.tick("2025-06-24T01:30:00")
+
+        assert len(engine.alerts) == 1
+        assert "around 23:45" in engine.alerts[0].message
+
+    def test_needs_enough_samples(self):
+        """Without a usual off time there is nothing to be late for."""
+        store, engine = engine_with(LateLightRule(min_samples=3))
+        store.append("2025-06-21T19:00:00", "LIGHT", "kitchen", "ON")
+
+        engine.tick("2025-06-22T12:00:00")
+
+        assert not engine.alerts
+
+
+class TestUsageSpikeRule:
+    """Test cases for hourly usage far above its baseline."""
+
+    def test_spike_above_baseline(self):
+        """An hour of use where ten minutes is normal is flagged once the hour ends."""
+        store, engine = engine_with(UsageSpikeRule(sigmas=3, min_samples=7))
+        for day in range(1, 9):
+            store.append(f"2025-06-{day:02d}T20:00:00", "LIGHT", "kitchen", "ON")
+            store.append(f"2025-06-{day:02d}T20:10:00", "LIGHT", "kitchen", "OFF")
+        store.append("2025-06-09T20:00:00", "LIGHT", "kitchen", "ON")
+
+        engine.tick("2025-06-09T20:59:00")
+        assert not engine.alerts
+        engine.tick("2025-06-09T21:00:00")
+
+        assert len(engine.alerts) == 1
+        alert = engine.alerts[0]
+        assert (alert.rule, alert.time) == ("usage_spike", to_timestamp("2025-06-09T21:00:00"))
+        assert "60 minutes" in alert.message
+
+    def test_normal_usage_is_quiet(self):
+        """Usage in line with the baseline raises nothing."""
+        store, engine = engine_with(UsageSpikeRule(min_samples=7))
+        for day in range(1, 12):
+            store.append(f"2025-06-{day:02d}T20:00:00", "LIGHT", "kitchen", "ON")
+            store.append(f"2025-06-{day:02d}T20:{10 + day % 3:02d}:00", "LIGHT", "kitchen", "OFF")
+
+        engine.tick("2025-06-12T00:00:00")
+
+        assert not engine.alerts
+
+
+class TestRuleEngine:
+    """Test cases for RuleEngine."""
+
+    def test_recent_alerts_newest_first_and_late_events_ignored(self):
+        """Alerts are listed newest first; events older than the last one are skipped."""
+        store, engine = engine_with(LongRunningDeviceRule(max_hours=1))
+        store.append("2025-06-21T10:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+        store.append("2025-06-21T10:30:00", "AIR_CONDITIONER", "kitchen", "ON")
+        store.append("2025-06-21T09:00:00", "AIR_CONDITIONER", "living_room", "ON")
+
+        engine.tick("2025-06-21T11:15:00")
+        engine.tick("2025-06-21T11:45:00")
+
+        assert [alert["room"] for alert in engine.recent_alerts()] == ["kitchen", "bedroom"]
+        assert engine.recent_alerts(1)[0]["time"] == "2025-06-21T11:45:00"
+
+    def test_events_just_before_a_tick_are_evaluated(self):
+        """A wall-clock tick does not make slightly older events look late."""
+        store, engine = engine_with(LongRunningDeviceRule(max_hours=1))
+        engine.tick("2025-06-21T10:00:02")
+        store.append("2025-06-21T10:00:00", "AIR_CONDITIONER", "bedroom", "ON")
+
+        engine.tick("2025-06-21T11:30:00")
+
+        assert [alert.room for alert in engine.alerts] == ["bedroom"]
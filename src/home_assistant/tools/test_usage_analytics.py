@@ -0,0 +1,95 @@
+"""
+Unit tests for the vectorized usage analytics.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to the path to import the tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history_store import DeviceHistoryStore, to_timestamp
+from tools.usage_analytics import hour_of_day_seconds, summarize_usage, usage_intervals
+
+
+def make_store(events):
+    store = DeviceHistoryStore()
+    for time, device, room, status in events:
+        store.append(time, device, room, status)
+    return store
+
+
+class TestUsageIntervals:
+    """Test cases for pairing ON and OFF events."""
+
+    def test_repeats_are_ignored_and_open_intervals_clipped(self):
+        """A repeated ON keeps the first; a device still on runs to `until`."""
+        store = make_store([
+            ("2025-06-21T18:00:00", "LIGHT", "kitchen", "ON"),
+            ("2025-06-21T18:30:00", "LIGHT", "kitchen", "ON"),
+            ("2025-06-21T19:00:00", "LIGHT", "kitchen", "OFF"),
+            ("2025-06-21T19:30:00", "LIGHT", "kitchen", "OFF"),
+            ("2025-06-21T20:00:00", "LIGHT", "bedroom", "ON"),
+        ])
+
+        intervals = usage_intervals(store.query(), until=to_timestamp("2025-06-21T21:00:00"))
+
+        assert ((intervals.stop - intervals.start) // 60).tolist() == [60, 60]
+        assert [store.rooms[r] for r in intervals.room] == ["kitchen", "bedroom"]
+
+    def test_hour_of_day_split_across_midnight(self):
+        """An interval crossing midnight is split between the hours it covers."""
+        start = np.array([to_timestamp("2025-06-21T23:30:00")])
+        stop = np.array([to_timestamp("2025-06-22T01:15:00")])
+
+        seconds = hour_of_day_seconds(start, stop)[0]
+
+        assert seconds[23] == 1800 and seconds[0] == 3600 and seconds[1] == 900
+        assert seconds.sum() == stop[0] - start[0]
+
+
+class TestSummarizeUsage:
+    """Test cases for summarize_usage."""
+
+    def test_summary(self):
+        """On-time, energy and overlap are computed per device and room."""
+        store = make_store([
+            ("2025-06-21T18:00:00", "LIGHT", "living_room", "ON"),
+            ("2025-06-21T22:00:00", "AIR_CONDITIONER", "bedroom", "ON"),
+            ("2025-06-21T23:00:00", "LIGHT", "living_room", "OFF"),
+            ("2025-06-22T06:00:00", "AIR_CONDITIONER", "bedroom", "OFF"),
+        ])
+
+        summary = summarize_usage(store)
+
+        assert summary["devices"]["LIGHT"]["on_hours"] == 5.0
+        assert summary["devices"]["AIR_CONDITIONER"]["kwh"] == 12.0
+        assert summary["rooms"]["bedroom"]["on_hours"] == 8.0
+        assert summary["on_hours_by_hour_of_day"][22] == 2.0
+        assert summary["overlap"] == {
+            "overlap_hours": 1.0, "peak_concurrent_devices": 2, "peak_kw": 1.56
+        }
+
+    def test_occupancy_is_not_energy(self):
+        """Occupancy sensor events count neither as on-time nor as kWh."""
+        store = make_store([
+            ("2025-06-21T18:00:00", "OCCUPANCY", "living_room", "ON"),
+            ("2025-06-21T19:00:00", "LIGHT", "living_room", "ON"),
+            ("2025-06-21T20:00:00", "LIGHT", "living_room", "OFF"),
+            ("2025-06-22T06:00:00", "OCCUPANCY", "living_room", "OFF"),
+        ])
+
+        summary = summarize_usage(store)
+
+        assert list(summary["devices"]) == ["LIGHT"]
+        assert summary["rooms"]["living_room"]["on_hours"] == 1.0
+        assert summary["total_kwh"] == 0.06
+
+    def test_empty_store(self):
+        """An empty period summarizes to zeros."""
+        summary = summarize_usage(DeviceHistoryStore())
+
+        assert summary["events"] == 0
+        assert summary["devices"] == {}
@@ -0,0 +1,233 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from tools.history_store import (
+    DeviceHistoryStore,
+    HistoryView,
+    STATUSES,
+    to_isoformat,
+    to_timestamp,
+)
+
+# Typical draw while on, used to estimate energy from on-time.
+DEVICE_POWER_KW = {"LIGHT": 0.06, "AIR_CONDITIONER": 1.5}
+DEFAULT_POWER_KW = 0.1
+OCCUPANCY = "OCCUPANCY"  # ON/OFF presence events from a room's occupancy sensor
+# Sensors recorded with the devices that draw no power and are left out of usage.
+NON_ENERGY_DEVICES = frozenset({OCCUPANCY})
+
+_ON = STATUSES.index("ON")
+_HOUR = 3600
+_DAY = 24 * _HOUR
+_HOURS = np.arange(24, dtype=np.int64) * _HOUR
+
+
+class Intervals(NamedTuple):
+    """Periods during which one device in one room was on."""
+    device: np.ndarray  # codes into DeviceHistoryStore.devices
+    room: np.ndarray  # codes into DeviceHistoryStore.rooms
+    start: np.ndarray  # int64 seconds
+    stop: np.ndarray  # int64 seconds, exclusive
+
+
+def usage_intervals(view: HistoryView, until: int | None = None) -> Intervals:
+    """Pair each device's ON events with its next OFF event.
+
+    Repeated ONs or OFFs for the same device and room are ignored, and a
+    device still on at the end is counted as on until `until` (by default
+    the last event in the view).
+    """
+    if len(view.time) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return Intervals(empty, empty, empty, empty)
+    until = int(view.time[-1]) if until is None else until
+
+    group = view.device.astype(np.int64) << 16 | view.room
+    order = np.lexsort((view.time, group))
+    group, time, status = group[order], view.time[order], view.status[order]
+
+    first_in_group = np.r_[True, group[1:] != group[:-1]]
+    changed = first_in_group | np.r_[True, status[1:] != status[:-1]]
+    group, time, status = group[changed], time[changed], status[changed]
+
+    # After dropping repeats, every ON is followed by an OFF of the same
+    # device and room unless it is the last event of its group.
+    on = np.flatnonzero(status == _ON)
+    closed = np.zeros(len(on), dtype=bool)
+    has_next = on + 1 < len(group)
+    closed[has_next] = group[on[has_next] + 1] == group[on[has_next]]
+    stop = np.full(len(on), until, dtype=np.int64)
+    stop[closed] = time[on[closed] + 1]
+
+    start = time[on]
+    keep = stop > start
+    return Intervals(
+        device=(group[on] >> 16)[keep].astype(np.uint16),
+        room=(group[on] & 0xFFFF)[keep].astype(np.uint16),
+        start=start[keep],
+        stop=stop[keep],
+    )
+
+
+def energy_intervals(intervals: Intervals, devices: list[str]) -> Intervals:
+    """The intervals of devices that use energy, without sensors like occupancy."""
+    energy = np.array([name not in NON_ENERGY_DEVICES for name in devices], dtype=bool)
+    if energy.all():
+        return intervals
+    keep = energy[intervals.device]
+    return Intervals(*(column[keep] for column in intervals))
+
+
+def add_rollups(
+    intervals: Intervals,
+    devices: list[str],
+    rooms: list[str],
+    rollups: tuple[np.ndarray, list[str], list[str]] | None,
+    start=None,
+    end=None,
+) -> tuple[Intervals, np.ndarray, list[str], list[str]]:
+    """Energy intervals plus the on-time of archived hourly rollups in [start, end).
+
+    Days past retention are kept only as `HistoryArchive.rollups`: the
+    seconds each device was on in each hour, and how often it was switched
+    on. Each such hour becomes one interval starting on the hour, so on-time
+    and energy by device, room and hour are exact, but not when within the
+    hour a device was on, nor its overlap with others. Returns the
+    intervals, each one's switch-ons (1 for raw intervals), and the device
+    and room names their codes refer to.
+    """
+    switch_ons = np.ones(len(intervals.start), dtype=np.int64)
+    if rollups is None or len(rollups[0]) == 0:
+        return intervals, switch_ons, devices, rooms
+    records, rollup_devices, rollup_rooms = rollups
+    devices, rooms = list(devices), list(rooms)
+    device_codes = _codes(rollup_devices, devices)
+    room_codes = _codes(rollup_rooms, rooms)
+
+    hour_start = records["time"].astype(np.int64)
+    hour_stop = hour_start + records["on_seconds"]
+    if start is not None:
+        hour_start = np.maximum(hour_start, to_timestamp(start))
+    if end is not None:
+        hour_stop = np.minimum(hour_stop, to_timestamp(end))
+    energy = np.array([name not in NON_ENERGY_DEVICES for name in rollup_devices], dtype=bool)
+    keep = (hour_stop > hour_start) & energy[records["device"]]
+
+    merged = Intervals(
+        device=np.concatenate([intervals.device, device_codes[records["device"][keep]]]).astype(np.uint16),
+        room=np.concatenate([intervals.room, room_codes[records["room"][keep]]]).astype(np.uint16),
+        start=np.concatenate([intervals.start, hour_start[keep]]),
+        stop=np.concatenate([intervals.stop, hour_stop[keep]]),
+    )
+    switch_ons = np.concatenate([switch_ons, records["switched_on"][keep].astype(np.int64)])
+    return merged, switch_ons, devices, rooms
+
+
+def _codes(names: list[str], known: list[str]) -> np.ndarray:
+    """The index of each name in known, appending the names it lacks."""
+    index = {name: code for code, name in enumerate(known)}
+    for name in names:
+        if name not in index:
+            index[name] = len(known)
+            known.append(name)
+    return np.array([index[name] for name in names], dtype=np.int64)
+
+
+def hour_of_day_seconds(start: np.ndarray, stop: np.ndarray) -> np.ndarray:
+    """Seconds each interval spends in each hour of the day, as an (n, 24) array.
+
+    F_h(t) = 3600 * (t // 86400) + clip(t % 86400 - 3600 h, 0, 3600) counts
+    the seconds before t that fall in hour h, so an interval's share of hour
+    h is F_h(stop) - F_h(start), whatever its length.
+    """
+    def seconds_in_hour_before(t):
+        t = t[:, None]
+        return _HOUR * (t // _DAY) + np.clip(t % _DAY - _HOURS, 0, _HOUR)
+
+    return seconds_in_hour_before(stop) - seconds_in_hour_before(start)
+
+
+def concurrency(intervals: Intervals, power_kw: np.ndarray) -> dict:
+    """Sweep the interval endpoints for overlap time, peak device count and peak load."""
+    if len(intervals.start) == 0:
+        return {"overlap_hours": 0.0, "peak_concurrent_devices": 0, "peak_kw": 0.0}
+    times = np.concatenate([intervals.start, intervals.stop])
+    steps = np.concatenate([np.ones(len(intervals.start)), -np.ones(len(intervals.stop))])
+    loads = np.concatenate([power_kw, -power_kw])
+    # At equal times, process stops before starts so touching intervals do not overlap.
+    order = np.lexsort((steps, times))
+    times, running, load = times[order], np.cumsum(steps[order]), np.cumsum(loads[order])
+
+    segment = np.diff(times)
+    overlap = segment[running[:-1] >= 2].sum()
+    return {
+        "overlap_hours": round(float(overlap) / _HOUR, 2),
+        "peak_concurrent_devices": int(running.max()),
+        "peak_kw": round(float(load.max()), 2),
+    }
+
+
+def summarize_usage(
+    store: DeviceHistoryStore,
+    start=None,
+    end=None,
+    rollups: tuple[np.ndarray, list[str], list[str]] | None = None,
+) -> dict:
+    """Compact usage summary for [start, end): on-time, energy, hourly profile and overlap.
+
+    Days past retention are covered by `rollups`, as returned by
+    `HistoryArchive.rollups`, when given.
+    """
+    view = store.query(start, end)
+    # Devices still on at the end of the period count as on until its end.
+    until = None if end is None else to_timestamp(end)
+    intervals = energy_intervals(usage_intervals(view, until), store.devices)
+    intervals, switch_ons, devices, rooms = add_rollups(
+        intervals, store.devices, store.rooms, rollups, start, end,
+    )
+
+    hours = (intervals.stop - intervals.start) / _HOUR
+    power_kw = np.array(
+        [DEVICE_POWER_KW.get(name, DEFAULT_POWER_KW) for name in devices], dtype=float
+    )[intervals.device]
+    kwh = hours * power_kw
+    by_hour = hour_of_day_seconds(intervals.start, intervals.stop) / _HOUR
+
+    device_hours = np.bincount(intervals.device, weights=hours, minlength=len(devices))
+    device_kwh = np.bincount(intervals.device, weights=kwh, minlength=len(devices))
+    sessions = np.bincount(intervals.device, weights=switch_ons, minlength=len(devices)).astype(np.int64)
+    one_hot = (intervals.device[None, :] == np.arange(len(devices))[:, None]).astype(float)
+    device_by_hour = one_hot @ by_hour
+    room_hours = np.bincount(intervals.room, weights=hours, minlength=len(rooms))
+    room_kwh = np.bincount(intervals.room, weights=kwh, minlength=len(rooms))
+
+    first = np.r_[view.time[:1], intervals.start]
+    last = view.time[-1:] if len(view.time) else intervals.stop
+    return {
+        "period": {
+            "start": to_isoformat(first.min()) if len(first) else None,
+            "end": to_isoformat(last.max()) if len(last) else None,
+        },
+        "events": int(len(view.time)),
+        "total_kwh": round(float(kwh.sum()), 2),
+        "devices": {
+            devices[d]: {
+                "on_hours": round(float(device_hours[d]), 2),
+                "kwh": round(float(device_kwh[d]), 2),
+                "sessions": int(sessions[d]),
+                "avg_session_hours": round(float(device_hours[d] / max(sessions[d], 1)), 2),
+                "busiest_hours": [int(h) for h in np.argsort(-device_by_hour[d], kind="stable")[:3]],
+            }
+            for d in range(len(devices)) if device_hours[d]
+        },
+        "rooms": {
+            rooms[r]: {
+                "on_hours": round(float(room_hours[r]), 2),
+                "kwh": round(float(room_kwh[r]), 2),
+            }
+            for r in range(len(rooms)) if room_hours[r]
+        },
+        "on_hours_by_hour_of_day": [round(float(h), 2) for h in by_hour.sum(axis=0)],
+        "overlap": concurrency(intervals, power_kw),
+    }